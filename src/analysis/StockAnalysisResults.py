@@ -1,4 +1,6 @@
-from tabulate import tabulate
+import pandas as pd
+
+from utils import report_sink
 
 class StockAnalysisResults:
     def __init__(self, company_id):
@@ -33,12 +35,15 @@ class StockAnalysisResults:
             'interpretation': interpretation
         }
 
-    def set_additional_insights(self, stock_price_volatility, dow_jones_volatility, avg_stock_volume, avg_dow_jones_volume):
+    def set_additional_insights(self, stock_price_volatility, dow_jones_volatility, avg_stock_volume, avg_dow_jones_volume,
+                                baseline_stock_price_volatility=None, baseline_avg_stock_volume=None):
         self.additional_insights = {
             'stock_price_volatility': stock_price_volatility,
             'dow_jones_volatility': dow_jones_volatility,
             'average_stock_volume': avg_stock_volume,
-            'average_dow_jones_volume': avg_dow_jones_volume
+            'average_dow_jones_volume': avg_dow_jones_volume,
+            'baseline_stock_price_volatility': baseline_stock_price_volatility,
+            'baseline_average_stock_volume': baseline_avg_stock_volume
         }
 
     def set_summary(self, stock_price_change_mean, dow_jones_change_mean, stock_volume_mean, dow_jones_volume_mean, stock_price_volatility, dow_jones_volatility):
@@ -52,7 +57,7 @@ class StockAnalysisResults:
         }
 
     def display_t_test_results(self):
-        print(f"\n T-test Results for Company ID: {self.company_id}")
+        report_sink.message(f"\n T-test Results for Company ID: {self.company_id}", report_sink.DETAIL)
         if self.t_test_results:
             t_test_table = [
                 ["T-statistic", f"{self.t_test_results['t_statistic']:.4f}"],
@@ -60,10 +65,10 @@ class StockAnalysisResults:
                 ["Significant", "Yes" if self.t_test_results['significant'] else "No"],
                 ["Interpretation", self.t_test_results['interpretation']]
             ]
-            print(tabulate(t_test_table, headers=["Metric", "Value"], tablefmt="grid"))
+            report_sink.table(None, pd.DataFrame(t_test_table, columns=["Metric", "Value"]), report_sink.DETAIL, tablefmt="grid", showindex=False)
 
     def display_wilcoxon_results(self):
-        print("\n Wilcoxon Signed-Rank Test Results:")
+        report_sink.message("\n Wilcoxon Signed-Rank Test Results:", report_sink.DETAIL)
         if self.wilcoxon_results:
             wilcoxon_table = [
                 ["Wilcoxon statistic", f"{self.wilcoxon_results['wilcoxon_statistic']:.4f}"],
@@ -71,10 +76,10 @@ class StockAnalysisResults:
                 ["Significant", "Yes" if self.wilcoxon_results['significant'] else "No"],
                 ["Interpretation", self.wilcoxon_results['interpretation']]
             ]
-            print(tabulate(wilcoxon_table, headers=["Metric", "Value"], tablefmt="grid"))
+            report_sink.table(None, pd.DataFrame(wilcoxon_table, columns=["Metric", "Value"]), report_sink.DETAIL, tablefmt="grid", showindex=False)
 
     def display_correlation_results(self):
-        print("\n Correlation Analysis:")
+        report_sink.message("\n Correlation Analysis:", report_sink.DETAIL)
         if self.correlation_results:
             correlation_table = [
                 ["Correlation coefficient", f"{self.correlation_results['correlation_coefficient']:.4f}"],
@@ -82,10 +87,10 @@ class StockAnalysisResults:
                 ["Significant", "Yes" if self.correlation_results['significant'] else "No"],
                 ["Interpretation", self.correlation_results['interpretation']]
             ]
-            print(tabulate(correlation_table, headers=["Metric", "Value"], tablefmt="grid"))
+            report_sink.table(None, pd.DataFrame(correlation_table, columns=["Metric", "Value"]), report_sink.DETAIL, tablefmt="grid", showindex=False)
 
     def display_additional_insights(self):
-        print("\n Additional Insights:")
+        report_sink.message("\n Additional Insights:", report_sink.DETAIL)
         if self.additional_insights:
             insights_table = [
                 ["Stock Price Volatility (Standard Deviation)", f"{self.additional_insights['stock_price_volatility']:.4f}"],
@@ -93,7 +98,12 @@ class StockAnalysisResults:
                 ["Average Stock Volume", f"{self.additional_insights['average_stock_volume']:.4f}"],
                 ["Average Dow Jones Volume", f"{self.additional_insights['average_dow_jones_volume']:.4f}"]
             ]
-            print(tabulate(insights_table, headers=["Metric", "Value"], tablefmt="grid"))
+            if self.additional_insights['baseline_stock_price_volatility'] is not None:
+                insights_table += [
+                    ["Baseline Stock Price Volatility", f"{self.additional_insights['baseline_stock_price_volatility']:.4f}"],
+                    ["Baseline Average Stock Volume", f"{self.additional_insights['baseline_average_stock_volume']:.4f}"]
+                ]
+            report_sink.table(None, pd.DataFrame(insights_table, columns=["Metric", "Value"]), report_sink.DETAIL, tablefmt="grid", showindex=False)
 
     def display_summary(self):
         if self.summary:
@@ -105,7 +115,7 @@ class StockAnalysisResults:
                 ["Stock Price Volatility", f"{self.summary['stock_price_volatility']:.4f}"],
                 ["Dow Jones Volatility", f"{self.summary['dow_jones_volatility']:.4f}"]
             ]
-            print(tabulate(summary_table, headers=["Metric", "Value"], tablefmt="grid"))
+            report_sink.table(None, pd.DataFrame(summary_table, columns=["Metric", "Value"]), report_sink.DETAIL, tablefmt="grid", showindex=False)
 
     def display_results(self):
         self.display_t_test_results()
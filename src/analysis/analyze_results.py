@@ -1,26 +1,26 @@
 import pandas as pd
-from datetime import timedelta
-import os
 
-from utils import display_utils, app_utils
+from utils import display_utils, app_utils, report_sink
 from database import db_functions
-from . import fetch_disclosure_dates as fetch_functions, static_analysis_utils, interpretation_utils, pdf_report
+from . import fetch_disclosure_dates as fetch_functions, static_analysis_utils, interpretation_utils, pdf_report, price_cube, result_cache, result_export, trading_calendar
 
-def fetch_and_process_company_info():
+def fetch_and_process_company_info(company_id=None):
     """
     Fetch and process the company information by displaying all companies, prompting for company ID, 
     and displaying the company info if available.
+    When a company ID is given, the listing and prompt are skipped.
     """
-    display_utils.display_all_companies()
-    company_id = app_utils.prompt_company_id()
+    if company_id is None:
+        display_utils.display_all_companies()
+        company_id = app_utils.prompt_company_id()
     
     if company_id == 0:
-        print("Analysis cancelled due to invalid company ID.")
+        report_sink.message("Analysis cancelled due to invalid company ID.")
         return None, None
 
     company_info = db_functions.get_company_info(company_id)
     if company_info.empty:
-        print(f"No company information available for Company ID: {company_id}.")
+        report_sink.message(f"No company information available for Company ID: {company_id}.")
         return None, None
     
     display_utils.display_company_info(company_info)
@@ -28,37 +28,47 @@ def fetch_and_process_company_info():
 
 def get_surrounding_stock_data(company_id, disclosure_date, window=7):
     """
-    Fetch 7 days of stock market data before and after the disclosure date.
+    Fetch 7 trading days of stock market data before and after the disclosure date.
     """
-    start_date = disclosure_date - timedelta(days=window)
-    end_date = disclosure_date + timedelta(days=window)
+    windows = get_surrounding_stock_data_for_dates(company_id, [disclosure_date], window)
+    return next(iter(windows.values()))
 
-    date_range = pd.date_range(start=start_date, end=end_date)
-    date_strings = date_range.strftime('%Y-%m-%d').tolist()
-    all_data = []
-
-    for date_str in date_strings:
-        data = db_functions.get_stock_data_with_disclosure_dates(company_id, pd.to_datetime(date_str))
-        if not data.empty:
-            all_data.append(data)
-
-    combined_data = pd.concat(all_data, ignore_index=True)
-    return combined_data
+def get_surrounding_stock_data_for_dates(company_id, disclosure_dates, window=7):
+    """
+    Fetch the stock market data of +/- window trading days around every disclosure date with a single query.
+    Returns a dict mapping each 'YYYY-MM-DD' disclosure date to its window DataFrame.
+    """
+    calendar = trading_calendar.get_trading_calendar()
+    event_ranges = []
+    for disclosure_date in disclosure_dates:
+        bounds = calendar.window_bounds(disclosure_date, window)
+        if bounds is not None:
+            event_ranges.append((disclosure_date, *bounds))
+
+    windows = db_functions.get_stock_data_for_date_ranges(company_id, event_ranges)
+    for disclosure_date in disclosure_dates:
+        date_str = pd.Timestamp(disclosure_date).strftime('%Y-%m-%d')
+        if date_str not in windows:
+            windows[date_str] = db_functions.empty_price_frame()
+    return windows
 
 def display_surrounding_data(disclosure_date, surrounding_data):
     """
     Display the surrounding stock data for the given disclosure date.
+    Price cube windows are only turned into a DataFrame when the report sink shows the table.
     """
-    print(f"\nSurrounding stock data for disclosure date: {disclosure_date}")
-    display_utils.display_dataframe_to_user(f"Surrounding Data for {disclosure_date}", surrounding_data)
+    frame = surrounding_data.to_frame if isinstance(surrounding_data, price_cube.EventWindow) else surrounding_data
+    report_sink.message(f"\nSurrounding stock data for disclosure date: {disclosure_date}", report_sink.DETAIL)
+    display_utils.display_dataframe_to_user(f"Surrounding Data for {disclosure_date}", frame, report_sink.DETAIL)
 
-def collect_test_results(company_id, disclosure_date, surrounding_data):
+def collect_test_results(company_id, disclosure_date, surrounding_data, statistical_results=None):
     """
     Perform statistical tests and collect results.
     """
-    test_results = static_analysis_utils.perform_t_test_analysis(company_id, disclosure_date, surrounding_data)
+    test_results = static_analysis_utils.perform_t_test_analysis(company_id, disclosure_date, surrounding_data, statistical_results)
     return {
         'disclosure_date': disclosure_date,
+        'observations': test_results.get('observations'),
         't_test_stat': test_results['t_test']['t_statistic'],
         't_test_p_value': test_results['t_test']['p_value'],
         'wilcoxon_stat': test_results['wilcoxon']['wilcoxon_statistic'],
@@ -66,67 +76,96 @@ def collect_test_results(company_id, disclosure_date, surrounding_data):
         'correlation_coeff': test_results['correlation']['correlation_coefficient'],
         'correlation_p_value': test_results['correlation']['p_value'],
         'mwu_stat': test_results['mannwhitneyu']['mwu_statistic'],
-        'mwu_p_value': test_results['mannwhitneyu']['p_value']
+        'mwu_p_value': test_results['mannwhitneyu']['p_value'],
+        **{key: test_results.get('baseline', {}).get(key) for key in static_analysis_utils.BASELINE_KEYS}
     }
 
-def perform_analysis(company_id, dates, availability):
+def perform_analysis(company_id, dates, availability, cube=None, export=True, window=7, charts=False):
     """
     Perform the full analysis for the given company and disclosure dates.
+    When a PriceCube is given, each window is a zero-copy view of +/- window trading days
+    instead of a DataFrame fetched from the database.
+    Test results are served from the result cache when the window's prices are unchanged.
+    With export=False the per-company PDF and Excel reports are skipped, for batch runs
+    that merge the results of many companies. Otherwise each event is appended to the
+    export files as soon as its tests have run. With charts, a downsampled chart of the company's
+    price history and a time series chart of every event are rendered off-screen across a process
+    pool and embedded in the PDF report.
     """
     disclosure_stock_data = fetch_functions.retrieve_stock_data(company_id, dates, availability)
     display_utils.display_stock_data(company_id, disclosure_stock_data)
 
     analysis_results = []
-
-    for _, row in disclosure_stock_data.iterrows():
-        disclosure_date = row['Date']
-        surrounding_data = get_surrounding_stock_data(company_id, pd.to_datetime(disclosure_date))
-        display_surrounding_data(disclosure_date, surrounding_data)
-        test_results = collect_test_results(company_id, disclosure_date, surrounding_data)
-        
-        # Collect surrounding stock data and test results
-        analysis_results.append({
-            'disclosure_date': disclosure_date,
-            'surrounding_data': surrounding_data,
-            'test_results': test_results
-        })
-
-    # Print the collected analysis results
-    print("\nCollected Analysis Results:")
+    event_dates = disclosure_stock_data['Date'].tolist()
+    if cube is None:
+        windows = get_surrounding_stock_data_for_dates(company_id, event_dates, window)
+    else:
+        windows = {event_date.strftime('%Y-%m-%d'): cube.window(company_id, event_date, window) for event_date in event_dates}
+
+    # Run the statistical tests for every uncached event window in one vectorized pass
+    statistical_results = result_cache.cached_statistical_tests(
+        company_id, event_dates, [windows[event_date.strftime('%Y-%m-%d')] for event_date in event_dates],
+        result_cache.window_definition(window))
+
+    exporter = result_export.ResultExporter(f"analysis_results_company_{company_id}") if export else None
+    try:
+        for event_date, event_results, (_, row) in zip(event_dates, statistical_results, disclosure_stock_data.iterrows()):
+            disclosure_date = row['Date'].date()
+            surrounding_data = windows[event_date.strftime('%Y-%m-%d')]
+            display_surrounding_data(disclosure_date, surrounding_data)
+            test_results = collect_test_results(company_id, disclosure_date, surrounding_data, event_results)
+            if exporter is not None:
+                exporter.add_event(company_id, disclosure_date, surrounding_data, test_results)
+
+            # Collect surrounding stock data and test results
+            analysis_results.append({
+                'disclosure_date': disclosure_date,
+                'surrounding_data': surrounding_data,
+                'test_results': test_results
+            })
+    finally:
+        if exporter is not None:
+            exporter.close()
+
+    # Report the collected analysis results
+    report_sink.message("\nCollected Analysis Results:", report_sink.DEBUG)
     for result in analysis_results:
-        print(result['test_results'])
+        report_sink.record('test_results', {'company_id': company_id, **result['test_results']})
 
-    # Analyze and display results using pdf_report module
-    pdf_report.analyze_results([result['test_results'] for result in analysis_results])
+    if export:
+        chart_files = {None: render_charts(company_id, analysis_results)} if charts else None
 
-    # Export results to Excel
-    export_results_to_excel(analysis_results, company_id)
+        # Analyze and display results using pdf_report module
+        pdf_report.analyze_results([result['test_results'] for result in analysis_results], charts=chart_files)
+        report_exported_files(exporter.paths)
 
     return analysis_results
 
-def export_results_to_excel(analysis_results, company_id):
+def render_charts(company_id, analysis_results, workers=None):
     """
-    Export analysis results to an Excel file with each element in a separate sheet.
+    Render the company's price history with every disclosure marked, then the chart of each event window,
+    and return their files.
     """
-    output_dir = "output"
-    if not os.path.exists(output_dir):
-        os.makedirs(output_dir)
+    from plots import render
 
-    results_file = os.path.join(output_dir, f"analysis_results_company_{company_id}.xlsx")
-    with pd.ExcelWriter(results_file, engine='xlsxwriter') as writer:
-        for result in analysis_results:
-            disclosure_date = result['disclosure_date']
-            surrounding_data = result['surrounding_data']
-            test_results_df = pd.DataFrame([result['test_results']])
-            
-            # Write surrounding data to a sheet
-            surrounding_data.to_excel(writer, sheet_name=f"Data_{disclosure_date}", index=False)
-            # Write test results to another sheet
-            test_results_df.to_excel(writer, sheet_name=f"Results_{disclosure_date}", index=False)
+    events = [(result['disclosure_date'], result_export.window_frame(result['surrounding_data'])) for result in analysis_results]
+    history = db_functions.get_stock_history(company_id).merge(db_functions.get_dow_jones_history(), on='Date', how='inner')
+    return render.render_event_charts(company_id, events, history, workers)
+
+def report_exported_files(paths):
+    report_sink.message(f"\nAnalysis results exported to {', '.join(paths)}")
 
-    print(f"\nAnalysis results exported to {results_file}")
+def export_results_to_excel(analysis_results, company_id):
+    """
+    Export already collected analysis results to the long-format files of the company,
+    with one Data and one Results sheet in the Excel workbook.
+    """
+    with result_export.ResultExporter(f"analysis_results_company_{company_id}") as exporter:
+        for result in analysis_results:
+            exporter.add_event(company_id, result['disclosure_date'], result['surrounding_data'], result['test_results'])
+    report_exported_files(exporter.paths)
 
-def stock_analysis_main():
+def stock_analysis_main(charts=False):
     """
     Main function to run the stock analysis.
     """
@@ -137,15 +176,15 @@ def stock_analysis_main():
 
         dates = fetch_functions.get_disclosure_dates(company_id)
         if not dates:
-            print("No disclosure dates found.")
+            report_sink.message("No disclosure dates found.")
             return
 
         availability = fetch_functions.check_stock_data_availability(company_id, dates)
         if not availability:
-            print(f"No stock data available for Company ID: {company_id}")
+            report_sink.message(f"No stock data available for Company ID: {company_id}")
             return
 
-        perform_analysis(company_id, dates, availability)
+        perform_analysis(company_id, dates, availability, charts=charts)
 
     except Exception as e:
-        print(f"An error occurred during stock analysis: {e}")
+        report_sink.message(f"An error occurred during stock analysis: {e}")
@@ -0,0 +1,165 @@
+# batch_analysis.py
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from database import db_connection, db_functions, price_cache
+from utils import report_sink
+from utils.setup_logging import setup_logger
+from . import analyze_results, fetch_disclosure_dates as fetch_functions, pdf_report, result_export, results_table, trading_calendar
+
+logger = setup_logger('app', log_file='app.log')
+
+def resolve_company_ids(company_ids):
+    """
+    Expand 'all' to every company in company_info; other values are parsed as company IDs.
+    """
+    if any(str(company_id).lower() == 'all' for company_id in company_ids):
+        return [int(company_id) for company_id in db_functions.get_company_info()['ID']]
+    return [int(company_id) for company_id in company_ids]
+
+def init_worker(sink='null', verbosity=report_sink.DETAIL, report_file=None):
+    """
+    Give each worker process its own database connection instead of sharing the parent's sockets,
+    and its own report sink.
+    """
+    db_functions.db_instance = db_connection.create_database_connection()
+    report_sink.set_sink(report_sink.create_sink(sink, verbosity, report_file))
+
+def analyze_company(company_id, export_data=True, charts=False):
+    """
+    Run the headless fetch_and_process_company_info -> perform_analysis pipeline for one company.
+    Returns a dict with the company's results table, or the reason it was skipped.
+    With export_data, it also carries the company's (company ID, disclosure date, window) events as 'data'.
+    With charts, the price history and event charts are rendered in this worker and listed in 'charts'.
+    """
+    start_time = time.time()
+    result = {'company_id': company_id, 'company_name': None, 'test_results': results_table.empty_table(), 'data': [], 'charts': [], 'error': None}
+    try:
+        company_id, company_info = analyze_results.fetch_and_process_company_info(company_id)
+        if company_id is None:
+            result['error'] = "No company information available"
+            return result
+        result['company_name'] = company_info.iloc[0]['Name']
+
+        dates = fetch_functions.get_disclosure_dates(company_id)
+        if not dates:
+            result['error'] = "No disclosure dates found"
+            return result
+
+        availability = fetch_functions.check_stock_data_availability(company_id, dates)
+        if not availability:
+            result['error'] = "No stock data available"
+            return result
+
+        analysis_results = analyze_results.perform_analysis(company_id, dates, availability, export=False)
+        result['test_results'] = results_table.from_records(
+            [analysis_result['test_results'] for analysis_result in analysis_results], company_id, result['company_name'])
+        if export_data:
+            result['data'] = [(company_id, analysis_result['disclosure_date'], result_export.window_frame(analysis_result['surrounding_data']))
+                              for analysis_result in analysis_results]
+        if charts:
+            # Companies are already spread over the batch's process pool, so render in this process
+            result['charts'] = analyze_results.render_charts(company_id, analysis_results, workers=1)
+    except Exception as e:
+        result['error'] = str(e)
+
+    logger.info(f"Company {company_id} analyzed in {time.time() - start_time:.2f} seconds")
+    return result
+
+def merge_results(company_results):
+    """
+    Merge the per-company results tables into one results table ordered by company.
+    """
+    tables = [result['test_results'] for result in sorted(company_results, key=lambda result: result['company_id'])
+              if not result['test_results'].empty]
+    if not tables:
+        return results_table.empty_table()
+    return pd.concat(tables, ignore_index=True)
+
+def export_company_result(exporter, company_result):
+    """
+    Append a finished company's windows and results to the batch export and drop its windows,
+    so that the parent process only holds the windows that are waiting to be written.
+    """
+    for company_id, disclosure_date, surrounding_data in company_result.pop('data', None) or []:
+        exporter.add_window(company_id, disclosure_date, surrounding_data)
+    exporter.add_results(company_result['test_results'])
+
+def export_batch_results(exporter, merged_results, company_results, output_dir="output"):
+    """
+    Finish the streamed export with a Companies sheet and write one PDF report, with the event
+    charts of each company when they were rendered.
+    """
+    exporter.add_sheet("Companies", pd.DataFrame([
+        {
+            'company_id': result['company_id'],
+            'company_name': result['company_name'],
+            'disclosures_analyzed': len(result['test_results']),
+            'error': result['error']
+        }
+        for result in sorted(company_results, key=lambda result: result['company_id'])
+    ]))
+    exporter.close()
+    report_sink.message(f"\nBatch results exported to {', '.join(exporter.paths)}")
+
+    if not merged_results.empty:
+        charts = {result['company_id']: result['charts'] for result in company_results if result['charts']}
+        pdf_report.analyze_results(merged_results, os.path.join(output_dir, "batch_analysis_results.pdf"), charts=charts)
+
+def run_batch(company_ids, workers=None, sink='null', verbosity=report_sink.DETAIL, report_file=None, export_data=True, charts=False):
+    """
+    Analyze the given company IDs (or 'all') across a process pool, one company per task,
+    and export the merged results.
+    Each company's results, and with export_data its event windows, are appended to the export
+    files as it completes, so memory does not grow with the number of events exported.
+    With charts, each worker renders its company's event charts for the PDF report.
+    The per-company output goes to the given report sink, which discards it by default.
+    """
+    with report_sink.using_sink(report_sink.create_sink(sink, verbosity, report_file, append=False)) as batch_sink:
+        try:
+            return run_batch_with_sink(company_ids, workers, (sink, verbosity, report_file), export_data, charts)
+        finally:
+            batch_sink.close()
+
+def run_batch_with_sink(company_ids, workers, sink_spec, export_data=True, charts=False):
+    """
+    Body of run_batch once its report sink is active; sink_spec is passed on to init_worker.
+    """
+    start_time = time.time()
+    company_ids = resolve_company_ids(company_ids)
+    if not company_ids:
+        report_sink.message("No companies to analyze.")
+        return results_table.empty_table()
+
+    # Load the shared caches once so that the workers only read them
+    trading_calendar.get_trading_calendar()
+    if price_cache.is_enabled():
+        price_cache.ensure_synced(None)
+
+    workers = min(workers or os.cpu_count() or 1, len(company_ids))
+    logger.info(f"Starting batch analysis of {len(company_ids)} companies with {workers} workers")
+
+    output_dir = "output"
+    exporter = result_export.ResultExporter("batch_analysis_results", output_dir)
+    company_results = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=sink_spec) as executor:
+        futures = {executor.submit(analyze_company, company_id, export_data, charts): company_id for company_id in company_ids}
+        for future in as_completed(futures):
+            company_result = future.result()
+            export_company_result(exporter, company_result)
+            company_results.append(company_result)
+            if company_result['error']:
+                report_sink.message(f"Company {company_result['company_id']}: skipped ({company_result['error']})")
+                logger.warning(f"Company {company_result['company_id']} skipped: {company_result['error']}")
+
+    merged_results = merge_results(company_results)
+    export_batch_results(exporter, merged_results, company_results, output_dir)
+
+    elapsed = time.time() - start_time
+    report_sink.message(f"\nAnalyzed {len(merged_results)} disclosures for {len(company_ids)} companies in {elapsed:.2f} seconds")
+    logger.info(f"Batch analysis finished in {elapsed:.2f} seconds")
+    return merged_results
@@ -0,0 +1,225 @@
+# batch_statistics.py
+
+from functools import lru_cache
+from math import comb
+
+import numpy as np
+from scipy import special
+
+# Sample sizes up to which scipy's method='auto' uses an exact null distribution
+MAX_EXACT_WILCOXON = 50
+MAX_PERMUTATION_WILCOXON = 13
+MAX_EXACT_MANNWHITNEYU = 8
+
+def stack_series(series_list):
+    """
+    Stack 1-D series of different lengths into an events x days array, padded with NaN.
+    """
+    width = max((len(series) for series in series_list), default=0)
+    stacked = np.full((len(series_list), width), np.nan)
+    for row, series in enumerate(series_list):
+        stacked[row, :len(series)] = np.asarray(series, dtype=float)
+    return stacked
+
+def compact(stock_changes, dow_jones_changes):
+    """
+    Move each event's complete observations to the front of its row and mask the rest with NaN.
+    Returns the two arrays, the validity mask and the number of observations per event.
+    """
+    stock_changes = np.atleast_2d(np.asarray(stock_changes, dtype=float))
+    dow_jones_changes = np.atleast_2d(np.asarray(dow_jones_changes, dtype=float))
+    valid = ~np.isnan(stock_changes) & ~np.isnan(dow_jones_changes)
+
+    order = np.argsort(~valid, axis=1, kind='stable')
+    valid = np.take_along_axis(valid, order, axis=1)
+    stock_changes = np.where(valid, np.take_along_axis(stock_changes, order, axis=1), np.nan)
+    dow_jones_changes = np.where(valid, np.take_along_axis(dow_jones_changes, order, axis=1), np.nan)
+    return stock_changes, dow_jones_changes, valid, valid.sum(axis=1)
+
+def rank_rows(values):
+    """
+    Average ranks within each row, and the size of the tie group of every element.
+    Masked elements should be +inf so that they rank after every observation.
+    Computed with one sort per row rather than scipy.stats.rankdata, so that the batch engine
+    does not import scipy.stats.
+    """
+    order = np.argsort(values, axis=1, kind='stable')
+    sorted_values = np.take_along_axis(values, order, axis=1)
+    positions = np.broadcast_to(np.arange(values.shape[1]), values.shape)
+
+    # Each element's tie group runs from the first to the last equal sorted value
+    group_start = np.ones(values.shape, dtype=bool)
+    group_start[:, 1:] = sorted_values[:, 1:] != sorted_values[:, :-1]
+    group_end = np.ones(values.shape, dtype=bool)
+    group_end[:, :-1] = group_start[:, 1:]
+    first = np.maximum.accumulate(np.where(group_start, positions, 0), axis=1)
+    last = np.minimum.accumulate(np.where(group_end, positions, values.shape[1] - 1)[:, ::-1], axis=1)[:, ::-1]
+
+    low = np.empty(values.shape)
+    high = np.empty(values.shape)
+    np.put_along_axis(low, order, first + 1.0, axis=1)
+    np.put_along_axis(high, order, last + 1.0, axis=1)
+    return (low + high) / 2, high - low + 1
+
+@lru_cache(maxsize=None)
+def wilcoxon_cdf(n):
+    """
+    Exact null CDF of the signed-rank statistic r+ for n observations, indexed by r+.
+    """
+    pmf = np.ones(1)
+    for k in range(1, n + 1):
+        previous = pmf
+        pmf = np.zeros(k * (k + 1) // 2 + 1)
+        pmf[:len(previous)] = previous * 0.5
+        pmf[-len(previous):] += previous * 0.5
+    return np.cumsum(pmf)
+
+@lru_cache(maxsize=None)
+def mannwhitneyu_counts(n1, n2):
+    """
+    Number of orderings of two samples giving each value of U, indexed by U.
+    """
+    if n1 == 0 or n2 == 0:
+        return np.ones(1)
+    counts = np.zeros(n1 * n2 + 1)
+    with_largest_in_first = mannwhitneyu_counts(n1 - 1, n2)
+    with_largest_in_second = mannwhitneyu_counts(n1, n2 - 1)
+    counts[n2:n2 + len(with_largest_in_first)] += with_largest_in_first
+    counts[:len(with_largest_in_second)] += with_largest_in_second
+    return counts
+
+@lru_cache(maxsize=None)
+def sign_patterns(n):
+    """
+    All 2**n subsets of n observations as a 0/1 matrix, one subset per row.
+    """
+    return ((np.arange(2 ** n)[:, None] >> np.arange(n)) & 1).astype(float)
+
+def paired_t_test(stock_changes, dow_jones_changes, valid, n):
+    """
+    Paired t-test of every event, as scipy.stats.ttest_rel.
+    """
+    differences = np.where(valid, stock_changes - dow_jones_changes, 0.0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = differences.sum(axis=1) / n
+        variance = (np.where(valid, differences - mean[:, None], 0.0) ** 2).sum(axis=1) / (n - 1)
+        t_stat = mean / np.sqrt(variance / n)
+        p_value = 2 * special.stdtr(n - 1, -np.abs(t_stat))
+    return t_stat, p_value
+
+def correlation_test(stock_changes, dow_jones_changes, valid, n):
+    """
+    Pearson correlation of every event, as scipy.stats.pearsonr.
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        stock_deviation = np.where(valid, stock_changes - np.nansum(stock_changes, axis=1, keepdims=True) / n[:, None], 0.0)
+        dow_jones_deviation = np.where(valid, dow_jones_changes - np.nansum(dow_jones_changes, axis=1, keepdims=True) / n[:, None], 0.0)
+        correlation = (stock_deviation * dow_jones_deviation).sum(axis=1) / np.sqrt(
+            (stock_deviation ** 2).sum(axis=1) * (dow_jones_deviation ** 2).sum(axis=1))
+        correlation = np.clip(correlation, -1.0, 1.0)
+
+        # Under the null hypothesis (r + 1) / 2 follows a Beta(n/2 - 1, n/2 - 1) distribution
+        shape = n / 2 - 1
+        p_value = 2 * special.betainc(shape, shape, 0.5 * (1 - np.abs(correlation)))
+    p_value = np.where(n == 2, np.where(np.isnan(correlation), np.nan, 1.0), p_value)
+    return correlation, np.clip(p_value, 0.0, 1.0)
+
+def wilcoxon_test(stock_changes, dow_jones_changes, valid, n):
+    """
+    Wilcoxon signed-rank test of every event, as scipy.stats.wilcoxon with its default
+    method='auto': exact without ties or zeros, a complete sign-flip enumeration for small
+    samples with ties or zeros, and the normal approximation otherwise.
+    """
+    differences = stock_changes - dow_jones_changes
+    nonzero = valid & (differences != 0)
+    ranks, tie_sizes = rank_rows(np.where(nonzero, np.abs(differences), np.inf))
+    ranks = np.where(nonzero, ranks, 0.0)
+
+    r_plus = (ranks * (differences > 0)).sum(axis=1)
+    r_minus = (ranks * (differences < 0)).sum(axis=1)
+    count = nonzero.sum(axis=1)
+    has_ties = (nonzero & (tie_sizes > 1)).any(axis=1)
+    has_zeros = (valid & (differences == 0)).any(axis=1)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        tie_correction = np.where(nonzero, tie_sizes ** 2 - 1.0, 0.0).sum(axis=1)
+        se = np.sqrt((count * (count + 1.0) * (2.0 * count + 1.0) - tie_correction / 2) / 24)
+        z = (r_plus - count * (count + 1.0) / 4) / se
+        p_value = 2 * special.ndtr(-np.abs(z))
+
+    exact = (n <= MAX_EXACT_WILCOXON) & ~has_ties & ~has_zeros
+    for size in np.unique(count[exact]):
+        rows = exact & (count == size)
+        cdf = wilcoxon_cdf(int(size))
+        statistic = r_plus[rows].astype(int)
+        lower = cdf[statistic]
+        upper = 1 - np.where(statistic > 0, cdf[statistic - 1], 0.0)
+        p_value[rows] = 2 * np.minimum(lower, upper)
+
+    enumerated = (n <= MAX_PERMUTATION_WILCOXON) & (has_ties | has_zeros)
+    for size in np.unique(n[enumerated]):
+        rows = enumerated & (n == size)
+        null_distribution = ranks[rows, :size] @ sign_patterns(int(size)).T
+        observed = r_plus[rows][:, None]
+        tolerance = np.abs(observed) * np.finfo(float).eps * 100
+        lower = (null_distribution <= observed + tolerance).mean(axis=1)
+        upper = (null_distribution >= observed - tolerance).mean(axis=1)
+        p_value[rows] = 2 * np.minimum(lower, upper)
+
+    statistic = np.where(n > 0, np.minimum(r_plus, r_minus), np.nan)
+    p_value = np.where(n > 0, p_value, np.nan)
+    return statistic, np.clip(p_value, 0.0, 1.0)
+
+def mannwhitneyu_test(stock_changes, dow_jones_changes, valid, n):
+    """
+    Mann-Whitney U test of every event, as scipy.stats.mannwhitneyu with its default
+    method='auto': exact for up to 8 observations without ties, otherwise the normal
+    approximation with tie and continuity corrections.
+    """
+    width = stock_changes.shape[1]
+    combined_valid = np.concatenate([valid, valid], axis=1)
+    combined = np.where(combined_valid, np.concatenate([stock_changes, dow_jones_changes], axis=1), np.inf)
+    ranks, tie_sizes = rank_rows(combined)
+
+    u1 = np.where(valid, ranks[:, :width], 0.0).sum(axis=1) - n * (n + 1) / 2
+    u = np.maximum(u1, n * n - u1)
+    has_ties = (combined_valid & (tie_sizes > 1)).any(axis=1)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        total = 2.0 * n
+        tie_term = np.where(combined_valid, tie_sizes ** 2 - 1.0, 0.0).sum(axis=1)
+        s = np.sqrt(n * n / 12 * ((total + 1) - tie_term / (total * (total - 1))))
+        p_value = 2 * special.ndtr(-(u - n * n / 2 - 0.5) / s)
+
+    exact = (n > 0) & (n <= MAX_EXACT_MANNWHITNEYU) & ~has_ties
+    for size in np.unique(n[exact]):
+        rows = exact & (n == size)
+        counts = mannwhitneyu_counts(int(size), int(size))
+        survival = np.cumsum(counts[::-1])[::-1] / comb(2 * int(size), int(size))
+        p_value[rows] = 2 * survival[u[rows].astype(int)]
+
+    statistic = np.where(n > 0, u1, np.nan)
+    p_value = np.where(n > 0, p_value, np.nan)
+    return statistic, np.clip(p_value, 0.0, 1.0)
+
+def run_statistical_tests(stock_changes, dow_jones_changes):
+    """
+    Run the t-test, Wilcoxon, Pearson and Mann-Whitney U tests on every event at once.
+    Inputs are events x days arrays of stock and Dow Jones changes; days where either value is
+    NaN are left out of that event. Returns a dict of per-event arrays in the layout of
+    static_analysis_utils.perform_statistical_tests, plus the number of observations.
+    """
+    stock_changes, dow_jones_changes, valid, n = compact(stock_changes, dow_jones_changes)
+
+    t_stat, t_p_value = paired_t_test(stock_changes, dow_jones_changes, valid, n)
+    wilcoxon_stat, wilcoxon_p_value = wilcoxon_test(stock_changes, dow_jones_changes, valid, n)
+    correlation, corr_p_value = correlation_test(stock_changes, dow_jones_changes, valid, n)
+    mwu_stat, mwu_p_value = mannwhitneyu_test(stock_changes, dow_jones_changes, valid, n)
+
+    return {
+        'observations': n,
+        't_test': {'t_statistic': t_stat, 'p_value': t_p_value},
+        'wilcoxon': {'wilcoxon_statistic': wilcoxon_stat, 'p_value': wilcoxon_p_value},
+        'correlation': {'correlation_coefficient': correlation, 'p_value': corr_p_value},
+        'mannwhitneyu': {'mwu_statistic': mwu_stat, 'p_value': mwu_p_value}
+    }
@@ -0,0 +1,144 @@
+# cross_correlation.py
+
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from utils import display_utils
+from . import price_cube, result_export
+
+DOW_JONES_LABEL = 'Dow Jones'
+
+# Pairs with fewer common trading days than this get no correlation
+DEFAULT_MIN_PERIODS = 20
+
+# Largest matrix also written to the Excel workbook; the full matrix always goes to its own file
+EXCEL_MATRIX_MAX_SIZE = 500
+
+def return_matrix(cube, since=None):
+    """
+    Daily close-to-close returns as a float32 dates x series matrix: the Dow Jones series first,
+    then one column per company of the cube. A return is NaN when either close is missing.
+    Returns the matrix and its column labels.
+    """
+    start = cube.position(since) if since is not None else 0
+    closes = np.column_stack([cube.dow_jones_close[start:], cube.stock_close[start:]])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns = (closes[1:] / closes[:-1] - 1).astype(np.float32)
+    return returns, [DOW_JONES_LABEL] + list(cube.company_ids)
+
+def pairwise_correlation(returns, min_periods=DEFAULT_MIN_PERIODS):
+    """
+    Pearson correlation of every pair of columns over the rows where both are present, like
+    DataFrame.corr, from a handful of float32 matrix products instead of a loop over pairs.
+    Columns are centred first, so that the float32 sums do not lose precision.
+    """
+    returns = np.asarray(returns, dtype=np.float64)
+    valid = ~np.isnan(returns)
+    means = np.where(valid, returns, 0.0).sum(axis=0) / np.maximum(valid.sum(axis=0), 1)
+    values = np.where(valid, returns - means, 0.0).astype(np.float32)
+    present = valid.astype(np.float32)
+
+    counts = present.T @ present
+    sums = values.T @ present
+    squares = (values * values).T @ present
+    products = values.T @ values
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        covariance = products - sums * sums.T / counts
+        variance = np.maximum(squares - sums * sums / counts, 0)
+        correlation = np.clip(covariance / np.sqrt(variance * variance.T), -1, 1)
+    correlation[counts < max(min_periods, 2)] = np.nan
+    return correlation
+
+def cluster_order(correlation):
+    """
+    Order the columns by average-linkage hierarchical clustering on 1 - correlation, so that
+    series that move together end up next to each other. Missing correlations count as unrelated.
+    """
+    from scipy.cluster import hierarchy
+    from scipy.spatial.distance import squareform
+
+    if len(correlation) < 3:
+        return np.arange(len(correlation))
+    distance = 1 - np.nan_to_num(np.asarray(correlation, dtype=np.float64), nan=0.0)
+    np.fill_diagonal(distance, 0)
+    distance = np.clip((distance + distance.T) / 2, 0, 2)
+    return hierarchy.leaves_list(hierarchy.linkage(squareform(distance, checks=False), method='average'))
+
+def cross_correlation(cube, since=None, min_periods=DEFAULT_MIN_PERIODS, cluster=True):
+    """
+    Correlation matrix of the daily returns of the Dow Jones and every company of the cube,
+    as a labelled DataFrame, reordered by hierarchical clustering.
+    """
+    returns, labels = return_matrix(cube, since)
+    correlation = pairwise_correlation(returns, min_periods)
+    order = cluster_order(correlation) if cluster else np.arange(len(labels))
+    labels = [labels[position] for position in order]
+    return pd.DataFrame(correlation[np.ix_(order, order)], index=labels, columns=labels)
+
+def index_comovement(correlation):
+    """
+    Each company's correlation with the Dow Jones and its mean correlation with the other companies.
+    """
+    companies = correlation.drop(index=DOW_JONES_LABEL, columns=DOW_JONES_LABEL)
+    peers = companies.to_numpy(float, copy=True)
+    np.fill_diagonal(peers, np.nan)
+    present = ~np.isnan(peers)
+    with np.errstate(invalid='ignore'):
+        mean_peers = np.where(present, peers, 0.0).sum(axis=1) / present.sum(axis=1)
+    return pd.DataFrame({
+        'company_id': companies.index,
+        'dow_jones_correlation': correlation.loc[companies.index, DOW_JONES_LABEL].to_numpy(float),
+        'mean_peer_correlation': mean_peers
+    }).sort_values('dow_jones_correlation', ascending=False, ignore_index=True)
+
+def main(argv=None):
+    from plots import render
+    from . import batch_analysis
+
+    parser = argparse.ArgumentParser(description="Correlate the daily returns of the companies with each other and the Dow Jones")
+    parser.add_argument('--companies', nargs='+', default=['all'], metavar='ID', help="Company IDs or 'all'")
+    parser.add_argument('--since', default=None, help="First date of the returns (default: the full history)")
+    parser.add_argument('--min-periods', type=int, default=DEFAULT_MIN_PERIODS,
+                        help="Fewest common trading days for a pair to be correlated")
+    parser.add_argument('--format', choices=render.FORMATS, default='png', help="Format of the heatmap")
+    args = parser.parse_args(argv)
+
+    company_ids = batch_analysis.resolve_company_ids(args.companies)
+    if not company_ids:
+        print("No companies to correlate.")
+        return 1
+
+    cube = price_cube.PriceCube.load(company_ids)
+    correlation = cross_correlation(cube, args.since, args.min_periods)
+    comovement = index_comovement(correlation)
+    display_utils.display_dataframe_to_user("Co-movement with the Dow Jones", comovement)
+
+    output_dir = "output"
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+    results_file = os.path.join(output_dir, "cross_correlation.xlsx")
+    with pd.ExcelWriter(results_file, engine='xlsxwriter') as writer:
+        comovement.to_excel(writer, sheet_name="Co-movement", index=False)
+        if len(correlation) <= EXCEL_MATRIX_MAX_SIZE:
+            correlation.to_excel(writer, sheet_name="Correlation")
+
+    matrix = correlation.rename(columns=str).rename_axis('series').reset_index()
+    matrix['series'] = matrix['series'].astype(str)
+    if result_export.parquet_available():
+        matrix_file = os.path.join(output_dir, "cross_correlation_matrix.parquet")
+        matrix.to_parquet(matrix_file, index=False)
+    else:
+        matrix_file = os.path.join(output_dir, "cross_correlation_matrix.csv")
+        matrix.to_csv(matrix_file, index=False)
+
+    figure_file = render.render_figure('cross_correlation', correlation, file_format=args.format)
+    print(f"\nCross-company correlations exported to {results_file}, {matrix_file} and {figure_file}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
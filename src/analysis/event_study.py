@@ -0,0 +1,215 @@
+# event_study.py
+
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+from scipy import special
+
+from database import db_functions
+from utils import display_utils
+from . import price_cube
+
+ESTIMATION_WINDOW = 120
+MIN_ESTIMATION_OBSERVATIONS = 30
+DEFAULT_EVENT_WINDOWS = [(-1, 1), (-3, 3), (-7, 7), (0, 1), (0, 5)]
+
+def get_disclosure_events(company_ids):
+    """
+    Return the (company ID, disclosure date) pairs of the given companies.
+    """
+    events = []
+    for company_id in company_ids:
+        disclosures = db_functions.get_data_breach_disclosures(company_id)
+        if disclosures.empty:
+            continue
+        for disclosure_date in pd.to_datetime(disclosures['Disclosure Date']):
+            events.append((company_id, disclosure_date))
+    return events
+
+def compute_returns(prices):
+    """
+    Simple daily returns along the first axis; the first day has no return.
+    """
+    returns = np.full(prices.shape, np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns[1:] = prices[1:] / prices[:-1] - 1
+    return returns
+
+def fit_market_model(stock_returns, market_returns):
+    """
+    Fit R_stock = alpha + beta * R_market by least squares for every event at once.
+    Inputs are events x days arrays; days where either return is NaN are left out of that event.
+    Returns alpha, beta, the residual standard deviation and the number of observations per event.
+    """
+    valid = ~np.isnan(stock_returns) & ~np.isnan(market_returns)
+    n = valid.sum(axis=1)
+    stock_returns = np.where(valid, stock_returns, 0.0)
+    market_returns = np.where(valid, market_returns, 0.0)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        stock_mean = stock_returns.sum(axis=1) / n
+        market_mean = market_returns.sum(axis=1) / n
+        stock_deviation = np.where(valid, stock_returns - stock_mean[:, None], 0.0)
+        market_deviation = np.where(valid, market_returns - market_mean[:, None], 0.0)
+
+        # Normal equations of the two-parameter model, solved for all events in closed form
+        beta = (stock_deviation * market_deviation).sum(axis=1) / (market_deviation ** 2).sum(axis=1)
+        alpha = stock_mean - beta * market_mean
+        residuals = np.where(valid, stock_deviation - beta[:, None] * market_deviation, 0.0)
+        sigma = np.sqrt((residuals ** 2).sum(axis=1) / (n - 2))
+
+    fitted = n >= MIN_ESTIMATION_OBSERVATIONS
+    return np.where(fitted, alpha, np.nan), np.where(fitted, beta, np.nan), np.where(fitted, sigma, np.nan), n
+
+def run_event_study(events, cube=None, estimation_window=ESTIMATION_WINDOW, event_windows=DEFAULT_EVENT_WINDOWS, gap=0):
+    """
+    Run a market-model event study for a list of (company ID, event date) pairs.
+
+    The market model of each event is fitted on the estimation_window trading days that end gap days
+    before the earliest event window starts. Abnormal returns are computed over the span of all event
+    windows, relative to the event day (the first trading day on or after the event date), and the
+    cumulative abnormal return (CAR) of each window is read off their running sum.
+
+    Returns a dict with:
+        'events': one row per event with the market model fit
+        'event_days': the event-relative day of every abnormal return column
+        'abnormal_returns': events x event days array of abnormal returns
+        'car': one row per event and window with the CAR, its t-statistic and p-value
+    """
+    if cube is None:
+        cube = price_cube.PriceCube.load(sorted({company_id for company_id, _ in events}))
+
+    first_day = min(start for start, _ in event_windows)
+    last_day = max(end for _, end in event_windows)
+    event_days = np.arange(first_day, last_day + 1)
+    estimation_days = np.arange(first_day - gap - estimation_window, first_day - gap)
+
+    stock_returns = compute_returns(cube.stock_close)
+    market_returns = compute_returns(cube.dow_jones_close)
+
+    positions = np.array([cube.position(event_date) for _, event_date in events], dtype=int)
+    columns = np.array([cube.company_positions[company_id] for company_id, _ in events], dtype=int)
+    # Event dates after the last trading day have no event window
+    positions = np.where(positions < len(cube.dates), positions, len(cube.dates) + estimation_window + last_day + 1)
+
+    alpha, beta, sigma, observations = fit_market_model(
+        price_cube.gather(stock_returns, positions, estimation_days, columns),
+        price_cube.gather(market_returns, positions, estimation_days)
+    )
+
+    abnormal_returns = (price_cube.gather(stock_returns, positions, event_days, columns)
+                        - (alpha[:, None] + beta[:, None] * price_cube.gather(market_returns, positions, event_days)))
+
+    # Running sums with a leading zero column, so that CAR(a, b) = total[b] - total[a - 1]
+    valid = ~np.isnan(abnormal_returns)
+    cumulative = np.concatenate([np.zeros((len(events), 1)), np.cumsum(np.where(valid, abnormal_returns, 0.0), axis=1)], axis=1)
+    cumulative_days = np.concatenate([np.zeros((len(events), 1)), np.cumsum(valid, axis=1)], axis=1)
+
+    event_frame = pd.DataFrame({
+        'company_id': [company_id for company_id, _ in events],
+        'event_date': [pd.Timestamp(event_date).date() for _, event_date in events],
+        'alpha': alpha,
+        'beta': beta,
+        'sigma': sigma,
+        'estimation_observations': observations
+    })
+
+    car_frames = []
+    for start, end in event_windows:
+        lower = start - first_day
+        upper = end - first_day + 1
+        days = cumulative_days[:, upper] - cumulative_days[:, lower]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            car = np.where(days > 0, cumulative[:, upper] - cumulative[:, lower], np.nan)
+            t_stat = car / (sigma * np.sqrt(days))
+            p_value = 2 * special.stdtr(observations - 2, -np.abs(t_stat))
+        car_frames.append(pd.DataFrame({
+            'company_id': event_frame['company_id'],
+            'event_date': event_frame['event_date'],
+            'window': f"[{start:+d}, {end:+d}]",
+            'window_start': start,
+            'window_end': end,
+            'observed_days': days,
+            'car': car,
+            'car_t_stat': t_stat,
+            'car_p_value': p_value
+        }))
+
+    return {
+        'events': event_frame,
+        'event_days': event_days,
+        'abnormal_returns': abnormal_returns,
+        'car': pd.concat(car_frames, ignore_index=True)
+    }
+
+def summarize_car(car_frame):
+    """
+    Cross-sectional test of the mean CAR of each event window across events.
+    """
+    def summarize(group):
+        car = group['car'].dropna().to_numpy()
+        n = len(car)
+        mean = car.mean() if n else np.nan
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t_stat = mean / (car.std(ddof=1) / np.sqrt(n)) if n > 1 else np.nan
+            p_value = 2 * special.stdtr(n - 1, -abs(t_stat)) if n > 1 else np.nan
+        return pd.Series({
+            'events': n,
+            'mean_car': mean,
+            'median_car': np.median(car) if n else np.nan,
+            'positive_share': (car > 0).mean() if n else np.nan,
+            't_stat': t_stat,
+            'p_value': p_value
+        })
+
+    summary = car_frame.groupby(['window_start', 'window_end', 'window'], sort=True)[['car']].apply(summarize)
+    return summary.reset_index().drop(columns=['window_start', 'window_end'])
+
+def parse_windows(text):
+    """
+    Parse event windows written as 'START:END,START:END', e.g. '-1:1,0:5'.
+    """
+    windows = []
+    for window in text.split(','):
+        start, end = window.split(':')
+        windows.append((int(start), int(end)))
+    return windows
+
+def main(argv=None):
+    from . import batch_analysis
+
+    parser = argparse.ArgumentParser(description="Market-model event study of the disclosure dates")
+    parser.add_argument('--companies', nargs='+', default=['all'], metavar='ID', help="Company IDs or 'all'")
+    parser.add_argument('--estimation-window', type=int, default=ESTIMATION_WINDOW,
+                        help="Trading days in the market model estimation window")
+    parser.add_argument('--gap', type=int, default=0, help="Trading days between the estimation and event windows")
+    parser.add_argument('--windows', type=parse_windows, default=DEFAULT_EVENT_WINDOWS,
+                        help="Event windows in trading days relative to the event day, e.g. --windows=-1:1,0:5")
+    args = parser.parse_args(argv)
+
+    company_ids = batch_analysis.resolve_company_ids(args.companies)
+    events = get_disclosure_events(company_ids)
+    if not events:
+        print("No disclosure dates found.")
+        return 1
+
+    results = run_event_study(events, estimation_window=args.estimation_window, event_windows=args.windows, gap=args.gap)
+    summary = summarize_car(results['car'])
+    display_utils.display_dataframe_to_user("Cumulative Abnormal Returns", summary)
+
+    output_dir = "output"
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+    results_file = os.path.join(output_dir, "event_study_results.xlsx")
+    with pd.ExcelWriter(results_file, engine='xlsxwriter') as writer:
+        summary.to_excel(writer, sheet_name="Summary", index=False)
+        results['car'].to_excel(writer, sheet_name="CAR", index=False)
+        results['events'].to_excel(writer, sheet_name="Market Model", index=False)
+    print(f"\nEvent study results exported to {results_file}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
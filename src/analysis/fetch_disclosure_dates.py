@@ -3,52 +3,56 @@
 import pandas as pd
 from datetime import timedelta
 from database import db_functions
+from utils import report_sink
 
 def get_disclosure_dates(company_id):
     dates = db_functions.get_data_breach_disclosures(company_id)
     if dates.empty:
-        print(f"No disclosure dates found for Company ID {company_id}.")
+        report_sink.message(f"No disclosure dates found for Company ID {company_id}.")
         return []
     return pd.to_datetime(dates['Disclosure Date']).tolist()
 
 def check_stock_data_availability(company_id, dates):
     availability = db_functions.fetch_stock_and_dow_jones_data(company_id, dates)
-    print("\nStock data availability for each date:")
-    for date, available in availability.items():
-        print(f"Date: {date}; Stock Data Available: {'Yes' if available else 'No'}")
+    if report_sink.enabled(report_sink.DETAIL):
+        report_sink.message("\nStock data availability for each date:", report_sink.DETAIL)
+        for date, available in availability.items():
+            report_sink.message(f"Date: {date}; Stock Data Available: {'Yes' if available else 'No'}", report_sink.DETAIL)
     return availability
 
 def find_next_available_date(company_id, start_date, max_days=7):
-    print(f"\nSearching for next available date from: {start_date.strftime('%Y-%m-%d')}")
-    for day in range(1, max_days + 1):
-        next_date = start_date + timedelta(days=day)
-        next_date_str = next_date.strftime('%Y-%m-%d')
-        print(f"Checking date: {next_date_str}")
-        data = db_functions.get_stock_data_with_disclosure_dates(company_id, next_date)
-        if not data.empty:
-            return next_date
-    print(f"\nNo available date found within {max_days} days after {start_date.strftime('%Y-%m-%d')}")
+    """
+    Return the first date within max_days after start_date that has both stock data for the company
+    and Dow Jones data, or None.
+    """
+    report_sink.message(f"\nSearching for next available date from: {start_date.strftime('%Y-%m-%d')}", report_sink.DETAIL)
+    first_date = start_date + timedelta(days=1)
+    next_date = db_functions.get_next_available_dates(company_id, [first_date], max_days - 1)[first_date.strftime('%Y-%m-%d')]
+    if next_date is not None:
+        return pd.Timestamp(next_date)
+    report_sink.message(f"\nNo available date found within {max_days} days after {start_date.strftime('%Y-%m-%d')}", report_sink.DETAIL)
     return None
 
-def retrieve_stock_data(company_id, dates, availability):
-    stock_data = []
-    print()
+def retrieve_stock_data(company_id, dates, availability, max_days=7):
+    stock_data = db_functions.get_next_available_stock_data(company_id, list(dates), max_days)
+    if report_sink.enabled(report_sink.DETAIL):
+        report_date_resolution(stock_data, dates, availability, max_days)
+    return stock_data.drop(columns=['Requested Date']).reset_index(drop=True)
+
+def report_date_resolution(stock_data, dates, availability, max_days=7):
+    resolved = {
+        pd.Timestamp(requested).strftime('%Y-%m-%d'): pd.Timestamp(date).strftime('%Y-%m-%d')
+        for requested, date in zip(stock_data['Requested Date'], stock_data['Date'])
+    }
+
+    lines = [""]
     for date in dates:
         date_str = date.strftime('%Y-%m-%d')
         if date_str in availability and availability[date_str]:
-            print(f"Fetching stock data for date: {date_str}")
-            data = db_functions.get_stock_data_with_disclosure_dates(company_id, date)
-            stock_data.append(data)
+            lines.append(f"Fetching stock data for date: {date_str}")
+        elif date_str in resolved:
+            lines.append(f"No stock data available for date: {date_str}")
+            lines.append(f"Next available date: {resolved[date_str]}")
         else:
-            print(f"No stock data available for date: {date_str}")
-            next_available_date = find_next_available_date(company_id, date)
-            if next_available_date:
-                next_date_str = next_available_date.strftime('%Y-%m-%d')
-                print(f"Next available date: {next_date_str}")
-                data = db_functions.get_stock_data_with_disclosure_dates(company_id, next_available_date)
-                stock_data.append(data)
-            else:
-                print(f"No stock data available within 7 days after {date_str}")
-    
-    combined_stock_data = pd.concat(stock_data, ignore_index=True)
-    return combined_stock_data
+            lines.append(f"No stock data available within {max_days} days after {date_str}")
+    report_sink.message("\n".join(lines), report_sink.DETAIL)
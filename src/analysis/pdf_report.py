@@ -1,30 +1,23 @@
 import os
-from reportlab.lib.pagesizes import letter
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Table, TableStyle, Image, Spacer
-from reportlab.lib.units import inch
-from reportlab.lib import colors
-import matplotlib.pyplot as plt
-from plots import plot_data
-
-def save_results_to_pdf(summary, interpretations, results, output_file):
-    doc = SimpleDocTemplate(output_file, pagesize=letter)
-    elements = []
-    
-    styles = getSampleStyleSheet()
-    styles.add(ParagraphStyle(name='Justify', alignment=1))
-    
-    # Title
-    title = Paragraph("Statistical Analysis Report", styles['Title'])
-    elements.append(title)
-    elements.append(Spacer(1, 12))
-    
-    # Summary Section
-    summary_title = Paragraph("Summary of Analysis Results", styles['Heading2'])
-    elements.append(summary_title)
-    elements.append(Spacer(1, 12))
-    
-    summary_data = [
+
+import numpy as np
+
+from utils import report_sink
+from . import results_table
+
+# Events per table; each table fits on one page, so reportlab never has to split a long table
+EVENT_TABLE_ROWS = 40
+
+EVENT_TABLE_HEADER = ["Disclosure Date", "Obs.", "T-test p", "Wilcoxon p", "Correlation", "Correlation p", "Mann-Whitney U p"]
+# Event charts per row of the chart grid, and rows per grid table
+CHARTS_PER_ROW = 2
+CHART_ROWS_PER_TABLE = 4
+
+# Column widths in points, fixed so that the columns of consecutive event tables line up
+EVENT_COLUMN_WIDTHS = [72, 32, 58, 62, 62, 72, 90]
+
+def summary_rows(summary):
+    return [
         ["Total disclosures analyzed", summary['total_disclosures']],
         ["Significant t-tests", f"{summary['significant_t_tests']} / {summary['total_disclosures']}"],
         ["Significant Wilcoxon tests", f"{summary['significant_wilcoxon_tests']} / {summary['total_disclosures']}"],
@@ -35,8 +28,41 @@ def save_results_to_pdf(summary, interpretations, results, output_file):
         ["Average correlation coefficient", f"{summary['average_correlation_coeff']:.4f}"],
         ["Average Mann-Whitney U statistic", f"{summary['average_mwu_stat']:.4f}"]
     ]
-    summary_table = Table(summary_data, hAlign='LEFT')
-    summary_table.setStyle(TableStyle([
+
+def format_values(values, significant=None):
+    """
+    Format a float column with 4 decimals, '-' for missing values and '*' for significant ones.
+    """
+    values = np.asarray(values, dtype=float)
+    text = np.char.mod('%.4f', np.nan_to_num(values)).astype(object)
+    if significant is not None:
+        text = np.where(significant, text + '*', text)
+    return np.where(np.isnan(values), '-', text)
+
+def event_rows(table, alpha=0.05):
+    """
+    One row of strings per event for the event tables, formatted column by column.
+    """
+    flags = results_table.significance_flags(table, alpha)
+    observations = table['observations']
+    columns = [
+        table['disclosure_date'].dt.strftime('%Y-%m-%d').fillna('-').to_numpy(object),
+        np.where(observations.isna(), '-', observations.astype(str)),
+        format_values(table['t_test_p_value'], flags['t_test_significant']),
+        format_values(table['wilcoxon_p_value'], flags['wilcoxon_significant']),
+        format_values(table['correlation_coeff']),
+        format_values(table['correlation_p_value'], flags['correlation_significant']),
+        format_values(table['mwu_p_value'], flags['mannwhitneyu_significant'])
+    ]
+    return np.column_stack(columns).tolist() if len(table) else []
+
+def get_styles():
+    from reportlab.lib import colors
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.platypus import TableStyle
+
+    styles = getSampleStyleSheet()
+    styles.summary_table = TableStyle([
         ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
         ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
         ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
@@ -44,47 +70,159 @@ def save_results_to_pdf(summary, interpretations, results, output_file):
         ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
         ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
         ('GRID', (0, 0), (-1, -1), 1, colors.black)
-    ]))
-    elements.append(summary_table)
-    elements.append(Spacer(1, 12))
-    
-    # Detailed Interpretations Section
-    interpretations_title = Paragraph("Detailed Interpretations", styles['Heading2'])
-    elements.append(interpretations_title)
-    elements.append(Spacer(1, 12))
-    
-    for interpretation in interpretations:
-        interpretation_paragraph = Paragraph(f"""
-        <b>Disclosure Date:</b> {interpretation['disclosure_date']}<br/>
-        <b>T-test:</b> {interpretation['t_test']}<br/>
-        <b>Wilcoxon:</b> {interpretation['wilcoxon']}<br/>
-        <b>Correlation:</b> {interpretation['correlation']} ({interpretation['correlation_coeff_interpretation']})<br/>
-        <b>Mann-Whitney U:</b> {interpretation['mwu']}<br/>
-        """, styles['Normal'])
-        elements.append(interpretation_paragraph)
-        elements.append(Spacer(1, 12))
-    
-    # Add significance plots
-    # plot_data.plot_significance(results)
-    # plt.savefig("significance_plot.png")
-    # elements.append(Paragraph("Significance Plots", styles['Heading2']))
-    # elements.append(Spacer(1, 12))
-    # elements.append(Paragraph("The following plots show the p-values over time for different tests.", styles['Normal']))
-    # elements.append(Spacer(1, 12))
-    # elements.append(Image("significance_plot.png", width=6*inch, height=3*inch))
-    
-    doc.build(elements)
-
-def analyze_results(results):
+    ])
+    styles.event_table = TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, -1), 8),
+        ('ALIGN', (1, 0), (-1, -1), 'RIGHT'),
+        ('TOPPADDING', (0, 0), (-1, -1), 1),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 1),
+        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.beige]),
+        ('GRID', (0, 0), (-1, -1), 0.25, colors.black)
+    ])
+    return styles
+
+def summary_section(summary, styles):
+    from reportlab.platypus import Paragraph, Spacer, Table
+
+    summary_table = Table(summary_rows(summary), hAlign='LEFT')
+    summary_table.setStyle(styles.summary_table)
+    return [Paragraph("Summary of Analysis Results", styles['Heading2']), Spacer(1, 12), summary_table, Spacer(1, 12)]
+
+def event_tables(table, styles, rows_per_table=EVENT_TABLE_ROWS):
+    """
+    Render the events of a results table as compact tables of rows_per_table events each.
+    """
+    from reportlab.platypus import Table
+
+    rows = event_rows(table)
+    tables = []
+    for start in range(0, len(rows), rows_per_table):
+        event_table = Table([EVENT_TABLE_HEADER] + rows[start:start + rows_per_table],
+                            colWidths=EVENT_COLUMN_WIDTHS, hAlign='LEFT', repeatRows=1)
+        event_table.setStyle(styles.event_table)
+        tables.append(event_table)
+    return tables
+
+def chart_tables(chart_files, rows_per_table=CHART_ROWS_PER_TABLE):
+    """
+    Lay out rendered event charts CHARTS_PER_ROW to a row, in tables of rows_per_table rows.
+    """
+    from reportlab.lib.units import inch
+    from reportlab.platypus import Image, Table
+
+    # Time series charts are twice as wide as they are high
+    images = [Image(chart_file, width=3.2*inch, height=1.6*inch) for chart_file in chart_files]
+    rows = [images[start:start + CHARTS_PER_ROW] for start in range(0, len(images), CHARTS_PER_ROW)]
+    if rows:
+        rows[-1] = rows[-1] + [''] * (CHARTS_PER_ROW - len(rows[-1]))
+    return [Table(rows[start:start + rows_per_table], hAlign='LEFT') for start in range(0, len(rows), rows_per_table)]
+
+def company_section(table, styles, title=None, chart_files=()):
+    """
+    The flowables of one section: a heading, a one-line summary, the event tables and the
+    event charts, if any were rendered.
+    Sections only depend on their own rows, so they can be built independently and concatenated.
+    """
+    from reportlab.platypus import CondPageBreak, Paragraph, Spacer
+
+    summary = results_table.summarize(table).iloc[0]
+    line = (f"{int(summary['total_disclosures'])} disclosures; significant t-tests: {int(summary['significant_t_tests'])}, "
+            f"Wilcoxon: {int(summary['significant_wilcoxon_tests'])}, correlations: {int(summary['significant_correlations'])}, "
+            f"Mann-Whitney U: {int(summary['significant_mwu_tests'])}")
+    section = [CondPageBreak(120)]
+    if title:
+        section.append(Paragraph(title, styles['Heading3']))
+    section.extend([Paragraph(line, styles['Normal']), Spacer(1, 6)])
+    section.extend(event_tables(table, styles))
+    section.extend(chart_tables(chart_files))
+    section.append(Spacer(1, 12))
+    return section
+
+def company_sections(table, styles, charts=None):
+    """
+    One section per company of a results table, or a single untitled section when the results
+    do not carry company IDs. charts maps company IDs, or None for results without one,
+    to the files of their rendered event charts.
+    """
+    charts = charts or {}
+    if table['company_id'].isna().all():
+        yield company_section(table, styles, chart_files=charts.get(None, ()))
+        return
+    for company_id, company_table in table.groupby('company_id', sort=True):
+        names = company_table['company_name'].dropna()
+        title = f"Company {company_id}" + (f": {names.iloc[0]}" if len(names) else "")
+        yield company_section(company_table, styles, title, charts.get(company_id, ()))
+
+class SectionStory(list):
+    """
+    A reportlab story that takes the flowables of the next section from an iterable of sections
+    only once every flowable before them has been laid out. Flowables are removed from the story
+    as they are drawn, so only the section being laid out is held in memory, however many
+    sections the report has.
+    """
+    def __init__(self, sections):
+        super().__init__()
+        self.sections = iter(sections)
+
+    def __len__(self):
+        while not super().__len__():
+            section = next(self.sections, None)
+            if section is None:
+                return 0
+            self.extend(section)
+        return super().__len__()
+
+def report_sections(summary, table, styles, include_plots=False, charts=None):
+    """
+    The sections of the report in order: the title and overall summary, one section per company
+    and, with include_plots, the significance plot. Each section is built when it is reached.
+    """
+    from reportlab.lib.units import inch
+    from reportlab.platypus import Image, Paragraph, Spacer
+
+    yield [Paragraph("Statistical Analysis Report", styles['Title']), Spacer(1, 12),
+           *summary_section(summary, styles),
+           Paragraph("Event Results", styles['Heading2']),
+           Paragraph("P-values marked * are significant at the 0.05 level.", styles['Normal']),
+           Spacer(1, 12)]
+    yield from company_sections(table, styles, charts)
+
+    if include_plots and not table.empty:
+        from plots import render
+
+        image_file = render.render_figure('significance', table.sort_values('disclosure_date', ignore_index=True))
+        yield [Paragraph("Significance Plots", styles['Heading2']), Spacer(1, 12),
+               Image(image_file, width=6*inch, height=4.3*inch)]
+
+def save_results_to_pdf(summary, results, output_file, include_plots=False, charts=None):
+    """
+    Write the report: the overall summary, then the events of each company as paginated tables,
+    with significant p-values marked '*'. The report is built section by section, see SectionStory.
+    With include_plots the significance plot is rendered to the figure cache and embedded;
+    charts maps company IDs to already rendered event charts, see company_sections.
+    """
+    # reportlab is only imported when a report is written
+    from reportlab.lib.pagesizes import letter
+    from reportlab.platypus import SimpleDocTemplate
+
+    table = results_table.as_table(results)
+    doc = SimpleDocTemplate(output_file, pagesize=letter)
+    doc.build(SectionStory(report_sections(summary, table, get_styles(), include_plots, charts)))
+
+def analyze_results(results, output_file=None, include_plots=False, charts=None):
     from .interpretation_utils import interpret_results, display_interpretations
 
-    summary, interpretations = interpret_results(results)
+    table = results_table.as_table(results)
+    summary, interpretations = interpret_results(table)
     display_interpretations(summary, interpretations)
 
     output_dir = "output"
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
 
-    output_file = os.path.join(output_dir, "analysis_results.pdf")
-    save_results_to_pdf(summary, interpretations, results, output_file)
-    print(f"\nAnalysis results saved to {output_file}")
+    output_file = output_file or os.path.join(output_dir, "analysis_results.pdf")
+    save_results_to_pdf(summary, table, output_file, include_plots, charts)
+    report_sink.message(f"\nAnalysis results saved to {output_file}")
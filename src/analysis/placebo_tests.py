@@ -0,0 +1,206 @@
+# placebo_tests.py
+
+import argparse
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from utils import display_utils, report_sink
+from . import batch_statistics, price_cube, results_table
+
+PLACEBO_COUNT = 10000
+RESAMPLE_COUNT = 10000
+RESAMPLE_CHUNK = 1000
+TESTS = {
+    't_test': 't_test_p_value',
+    'wilcoxon': 'wilcoxon_p_value',
+    'correlation': 'correlation_p_value',
+    'mannwhitneyu': 'mwu_p_value'
+}
+
+def draw_placebo_positions(cube, company_id, event_dates, count, window, rng):
+    """
+    Draw count random trading days with stock data for the company, at least window + 1 trading days
+    away from every real disclosure and with a complete window inside the history.
+    """
+    column = cube.company_positions[company_id]
+    traded = np.flatnonzero(~np.isnan(cube.stock_close[:, column]))
+    eligible = traded[(traded >= window) & (traded < len(cube.dates) - window)]
+
+    event_positions = np.array([cube.position(event_date) for event_date in event_dates], dtype=int)
+    if len(event_positions):
+        distance = np.abs(eligible[:, None] - event_positions[None, :]).min(axis=1)
+        eligible = eligible[distance > window]
+    if len(eligible) == 0:
+        return eligible
+    return rng.choice(eligible, size=count, replace=count > len(eligible))
+
+def empirical_p_values(real_p_values, placebo_p_values):
+    """
+    Share of placebo windows whose p-value is at least as small as each real p-value,
+    with the real window counted in the null (Davison & Hinkley).
+    """
+    placebo_p_values = np.sort(placebo_p_values[~np.isnan(placebo_p_values)])
+    real_p_values = np.asarray(real_p_values, dtype=float)
+    at_least_as_extreme = np.searchsorted(placebo_p_values, real_p_values, side='right')
+    return np.where(np.isnan(real_p_values), np.nan, (1 + at_least_as_extreme) / (len(placebo_p_values) + 1))
+
+def run_placebo(cube, company_id, test_results, count=PLACEBO_COUNT, window=7, rng=None):
+    """
+    Run the statistical tests on count placebo windows of a company and compare its real
+    results table against that empirical null.
+    Returns one row per real disclosure with its parametric and empirical p-values.
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    test_results = results_table.as_table(test_results)
+    event_dates = list(test_results['disclosure_date'])
+    positions = draw_placebo_positions(cube, company_id, event_dates, count, window, rng)
+
+    comparison = pd.DataFrame({
+        'company_id': company_id,
+        'disclosure_date': test_results['disclosure_date'].dt.date,
+        'placebo_windows': len(positions)
+    })
+    if len(positions) == 0:
+        return comparison
+
+    placebo = batch_statistics.run_statistical_tests(*price_cube.window_changes(cube, company_id, positions, window))
+    for test, p_value_key in TESTS.items():
+        real_p_values = test_results[p_value_key].to_numpy(float)
+        comparison[p_value_key] = real_p_values
+        comparison[f"{test}_empirical_p_value"] = empirical_p_values(real_p_values, placebo[test]['p_value'])
+        comparison[f"{test}_placebo_rejection_rate"] = np.nanmean(placebo[test]['p_value'] < 0.05)
+    return comparison
+
+def run_permutation(cube, company_id, event_dates, resamples=RESAMPLE_COUNT, window=7, rng=None):
+    """
+    Sign-flip permutation test and percentile bootstrap of the mean daily difference between
+    the stock and Dow Jones changes in each event window.
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    positions = np.array([cube.position(event_date) for event_date in event_dates], dtype=int)
+    stock_changes, dow_jones_changes, valid, n = batch_statistics.compact(*price_cube.window_changes(cube, company_id, positions, window))
+    differences = np.where(valid, stock_changes - dow_jones_changes, 0.0)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        observed = differences.sum(axis=1) / n
+    extreme_counts = np.zeros(len(positions))
+    bootstrap_means = []
+
+    for start in range(0, resamples, RESAMPLE_CHUNK):
+        size = min(RESAMPLE_CHUNK, resamples - start)
+        signs = rng.choice(np.array([-1.0, 1.0]), size=(size,) + differences.shape)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            permuted = (signs * differences).sum(axis=2) / n
+        extreme_counts += (np.abs(permuted) >= np.abs(observed) - 1e-12).sum(axis=0)
+
+        # Resample each event's observed days with replacement; valid days are at the front of each row
+        samples = np.floor(rng.random((size,) + differences.shape) * n[:, None]).astype(int)
+        resampled = np.take_along_axis(np.broadcast_to(differences, samples.shape), samples, axis=2)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            bootstrap_means.append(np.where(valid, resampled, 0.0).sum(axis=2) / n)
+
+    bootstrap_means = np.concatenate(bootstrap_means, axis=0)
+    with np.errstate(invalid='ignore'):
+        lower, upper = np.nanpercentile(bootstrap_means, [2.5, 97.5], axis=0) if resamples else (np.nan, np.nan)
+
+    return pd.DataFrame({
+        'company_id': company_id,
+        'disclosure_date': [pd.Timestamp(event_date).date() for event_date in event_dates],
+        'observations': n,
+        'mean_difference': observed,
+        'permutation_p_value': np.where(n > 0, (1 + extreme_counts) / (resamples + 1), np.nan),
+        'bootstrap_ci_lower': np.where(n > 0, lower, np.nan),
+        'bootstrap_ci_upper': np.where(n > 0, upper, np.nan)
+    })
+
+def run_company(cube, company_id, test_results, seed_sequence, placebo_count, resamples, window):
+    placebo_rng, permutation_rng = [np.random.default_rng(seed) for seed in seed_sequence.spawn(2)]
+    test_results = results_table.as_table(test_results)
+    placebo = run_placebo(cube, company_id, test_results, placebo_count, window, placebo_rng)
+    event_dates = list(test_results['disclosure_date'])
+    permutation = run_permutation(cube, company_id, event_dates, resamples, window, permutation_rng)
+    return placebo, permutation
+
+def run_placebo_tests(cube, company_test_results, placebo_count=PLACEBO_COUNT, resamples=RESAMPLE_COUNT,
+                      window=7, seed=0, workers=None):
+    """
+    Run the placebo and permutation modes for every company in a thread pool.
+    company_test_results maps each company ID to its results table.
+    Every company gets its own seed spawned from seed, so results do not depend on scheduling.
+    Returns the placebo comparison and the permutation results as two DataFrames.
+    """
+    company_ids = sorted(company_id for company_id, test_results in company_test_results.items() if len(test_results))
+    seed_sequences = np.random.SeedSequence(seed).spawn(len(company_ids))
+
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        futures = [
+            executor.submit(run_company, cube, company_id, company_test_results[company_id], seed_sequence,
+                            placebo_count, resamples, window)
+            for company_id, seed_sequence in zip(company_ids, seed_sequences)
+        ]
+        results = [future.result() for future in futures]
+
+    if not results:
+        return pd.DataFrame(), pd.DataFrame()
+    return (pd.concat([placebo for placebo, _ in results], ignore_index=True),
+            pd.concat([permutation for _, permutation in results], ignore_index=True))
+
+def collect_real_results(cube, company_ids, window=7):
+    """
+    Run the regular analysis of each company on the price cube and return its results table.
+    """
+    from . import analyze_results, fetch_disclosure_dates as fetch_functions
+
+    company_test_results = {}
+    for company_id in company_ids:
+        # The per-event tables and summaries of the regular analysis are not needed here
+        with report_sink.using_sink(report_sink.NullSink()):
+            dates = fetch_functions.get_disclosure_dates(company_id)
+            availability = fetch_functions.check_stock_data_availability(company_id, dates) if dates else {}
+            analysis_results = analyze_results.perform_analysis(
+                company_id, dates, availability, cube=cube, export=False, window=window) if availability else []
+        company_test_results[company_id] = results_table.from_records(
+            [result['test_results'] for result in analysis_results], company_id)
+    return company_test_results
+
+def main(argv=None):
+    from . import batch_analysis
+
+    parser = argparse.ArgumentParser(description="Placebo and permutation tests of the disclosure windows")
+    parser.add_argument('--companies', nargs='+', default=['all'], metavar='ID', help="Company IDs or 'all'")
+    parser.add_argument('--placebos', type=int, default=PLACEBO_COUNT, help="Placebo windows per company")
+    parser.add_argument('--resamples', type=int, default=RESAMPLE_COUNT, help="Permutation and bootstrap resamples")
+    parser.add_argument('--window', type=int, default=7, help="Trading days before and after each date")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    company_ids = batch_analysis.resolve_company_ids(args.companies)
+    cube = price_cube.PriceCube.load(company_ids)
+    company_test_results = collect_real_results(cube, company_ids, args.window)
+
+    placebo, permutation = run_placebo_tests(cube, company_test_results, args.placebos, args.resamples,
+                                             args.window, args.seed, args.workers)
+    if placebo.empty:
+        print("No disclosure windows to test.")
+        return 1
+
+    display_utils.display_dataframe_to_user("Placebo Comparison", placebo)
+    display_utils.display_dataframe_to_user("Permutation and Bootstrap Tests", permutation)
+
+    output_dir = "output"
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+    results_file = os.path.join(output_dir, "placebo_test_results.xlsx")
+    with pd.ExcelWriter(results_file, engine='xlsxwriter') as writer:
+        placebo.to_excel(writer, sheet_name="Placebo", index=False)
+        permutation.to_excel(writer, sheet_name="Permutation", index=False)
+    print(f"\nPlacebo test results exported to {results_file}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
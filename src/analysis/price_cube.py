@@ -0,0 +1,183 @@
+# price_cube.py
+
+import numpy as np
+import pandas as pd
+
+from database import db_functions, db_utils
+
+class EventWindow:
+    """
+    Zero-copy view of one company's prices and the Dow Jones series over a range of trading days.
+    """
+    def __init__(self, cube, company_position, start, stop, event_position):
+        self.cube = cube
+        self.company_position = company_position
+        self.start = start
+        self.stop = stop
+        self.event_position = event_position
+
+    def __len__(self):
+        return self.stop - self.start
+
+    @property
+    def dates(self):
+        return self.cube.dates[self.start:self.stop]
+
+    @property
+    def event_date(self):
+        return self.cube.dates[self.event_position]
+
+    @property
+    def stock_open(self):
+        return self.cube.stock_open[self.start:self.stop, self.company_position]
+
+    @property
+    def stock_close(self):
+        return self.cube.stock_close[self.start:self.stop, self.company_position]
+
+    @property
+    def stock_volume(self):
+        return self.cube.stock_volume[self.start:self.stop, self.company_position]
+
+    @property
+    def dow_jones_open(self):
+        return self.cube.dow_jones_open[self.start:self.stop]
+
+    @property
+    def dow_jones_close(self):
+        return self.cube.dow_jones_close[self.start:self.stop]
+
+    @property
+    def dow_jones_volume(self):
+        return self.cube.dow_jones_volume[self.start:self.stop]
+
+    def to_frame(self):
+        """
+        Build a DataFrame in the db_functions column layout, for display and export only.
+        Days without stock data are left out, matching the inner join used by the database queries.
+        """
+        frame = db_utils.apply_price_schema(pd.DataFrame({
+            'Date': self.dates,
+            'Stock Open': self.stock_open,
+            'Stock Close': self.stock_close,
+            'Stock Volume': self.stock_volume,
+            'Dow Jones Open': self.dow_jones_open,
+            'Dow Jones Close': self.dow_jones_close,
+            'Dow Jones Volume': self.dow_jones_volume
+        }))
+        return frame.dropna(subset=['Stock Close']).reset_index(drop=True)
+
+class PriceCube:
+    """
+    Preloaded dates x companies matrices of stock open, close and volume, plus the aligned
+    Dow Jones series, indexed by trading-day ordinal.
+    Matrices are column-major so that each company's series is contiguous and windows slice without copying.
+    """
+    def __init__(self, dates, company_ids, stock_open, stock_close, stock_volume,
+                 dow_jones_open, dow_jones_close, dow_jones_volume):
+        self.dates = dates
+        self.company_ids = list(company_ids)
+        self.company_positions = {company_id: position for position, company_id in enumerate(self.company_ids)}
+        self.stock_open = stock_open
+        self.stock_close = stock_close
+        self.stock_volume = stock_volume
+        self.dow_jones_open = dow_jones_open
+        self.dow_jones_close = dow_jones_close
+        self.dow_jones_volume = dow_jones_volume
+
+    @classmethod
+    def load(cls, company_ids):
+        """
+        Load the full price history of the given companies and the Dow Jones series.
+        """
+        dow_jones = db_functions.get_dow_jones_history()
+        stock_histories = {company_id: db_functions.get_stock_history(company_id) for company_id in company_ids}
+        return cls.from_frames(dow_jones, stock_histories)
+
+    @classmethod
+    def from_frames(cls, dow_jones, stock_histories):
+        """
+        Build a cube from a Dow Jones history frame and a dict of company ID -> stock history frame.
+        The trading days are the Dow Jones dates; stock values on other days are dropped,
+        and trading days without stock data are NaN.
+        """
+        dow_jones = db_utils.apply_price_schema(dow_jones).sort_values('Date')
+        dates = dow_jones['Date'].values.astype('datetime64[D]')
+        shape = (len(dates), len(stock_histories))
+
+        stock_open = np.full(shape, np.nan, order='F')
+        stock_close = np.full(shape, np.nan, order='F')
+        stock_volume = np.full(shape, np.nan, order='F')
+
+        for column, (company_id, history) in enumerate(stock_histories.items()):
+            if history.empty:
+                continue
+            history = db_utils.apply_price_schema(history)
+            stock_dates = history['Date'].values.astype('datetime64[D]')
+            rows = np.searchsorted(dates, stock_dates)
+            matched = rows < len(dates)
+            matched[matched] = dates[rows[matched]] == stock_dates[matched]
+
+            stock_open[rows[matched], column] = history['Stock Open'].to_numpy(float)[matched]
+            stock_close[rows[matched], column] = history['Stock Close'].to_numpy(float)[matched]
+            stock_volume[rows[matched], column] = history['Stock Volume'].to_numpy(float, na_value=np.nan)[matched]
+
+        return cls(
+            dates,
+            stock_histories.keys(),
+            stock_open,
+            stock_close,
+            stock_volume,
+            dow_jones['Dow Jones Open'].to_numpy(float),
+            dow_jones['Dow Jones Close'].to_numpy(float),
+            dow_jones['Dow Jones Volume'].to_numpy(float, na_value=np.nan)
+        )
+
+    def position(self, date):
+        """
+        Return the trading-day ordinal of date, or of the next trading day when date is not one.
+        """
+        return int(np.searchsorted(self.dates, np.datetime64(pd.Timestamp(date), 'D'), side='left'))
+
+    def window(self, company_id, event_date, before=7, after=None):
+        """
+        Return a zero-copy view of the trading days [t - before, t + after] around the event date,
+        clipped to the available history.
+        """
+        after = before if after is None else after
+        event_position = self.position(event_date)
+        start = max(event_position - before, 0)
+        stop = min(event_position + after + 1, len(self.dates))
+        return EventWindow(self, self.company_positions[company_id], start, stop, min(event_position, len(self.dates) - 1))
+
+def gather(values, positions, offsets, columns=None):
+    """
+    Gather values[position + offset] for every event and offset into an events x offsets array.
+    Positions outside the series are NaN. columns selects each event's company column of a matrix.
+    """
+    rows = positions[:, None] + offsets[None, :]
+    inside = (rows >= 0) & (rows < values.shape[0])
+    rows = np.clip(rows, 0, values.shape[0] - 1)
+    gathered = values[rows] if columns is None else values[rows, columns[:, None]]
+    return np.where(inside, gathered, np.nan)
+
+def window_changes(cube, company_id, positions, window):
+    """
+    Gather the daily stock and Dow Jones changes (Close - Open) of +/- window trading days
+    around every position into two events x days arrays. Days with any missing price or volume
+    are NaN, as prepare_data drops them.
+    """
+    offsets = np.arange(-window, window + 1)
+    columns = np.full(len(positions), cube.company_positions[company_id])
+    stock_open = gather(cube.stock_open, positions, offsets, columns)
+    stock_close = gather(cube.stock_close, positions, offsets, columns)
+    stock_volume = gather(cube.stock_volume, positions, offsets, columns)
+    dow_jones_open = gather(cube.dow_jones_open, positions, offsets)
+    dow_jones_close = gather(cube.dow_jones_close, positions, offsets)
+    dow_jones_volume = gather(cube.dow_jones_volume, positions, offsets)
+
+    complete = ~(np.isnan(stock_open) | np.isnan(stock_close) | np.isnan(stock_volume)
+                 | np.isnan(dow_jones_open) | np.isnan(dow_jones_close) | np.isnan(dow_jones_volume))
+    stock_changes = np.where(complete, stock_close - stock_open, np.nan)
+    dow_jones_changes = np.where(complete, dow_jones_close - dow_jones_open, np.nan)
+    return stock_changes, dow_jones_changes
@@ -0,0 +1,185 @@
+# result_cache.py
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from database import db_config, db_functions, db_utils
+from utils.setup_logging import setup_logger
+from . import price_cube, static_analysis_utils
+
+logger = setup_logger('app', log_file='app.log')
+
+# Bump when the tests or their parameters change, so that earlier results are recomputed
+TEST_SET = 'ttest_rel,wilcoxon,pearsonr,mannwhitneyu:auto:v2'
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def window_definition(before, after=None):
+    after = before if after is None else after
+    return f"trading_days:-{before}:+{after}"
+
+def hash_window(surrounding_data):
+    """
+    Hash the prices of a surrounding data window, so that a cached result is recomputed
+    when the underlying rows change.
+    """
+    digest = hashlib.sha256()
+    if isinstance(surrounding_data, price_cube.EventWindow):
+        digest.update(b'cube')
+        for values in (surrounding_data.dates, surrounding_data.stock_open, surrounding_data.stock_close,
+                       surrounding_data.stock_volume, surrounding_data.dow_jones_open,
+                       surrounding_data.dow_jones_close, surrounding_data.dow_jones_volume):
+            digest.update(np.ascontiguousarray(values).tobytes())
+    else:
+        digest.update(b'frame')
+        frame = surrounding_data[db_functions.STOCK_DATA_COLUMNS]
+        digest.update(pd.util.hash_pandas_object(frame, index=False).values.tobytes())
+    return digest.hexdigest()
+
+def to_json_value(value):
+    if isinstance(value, dict):
+        return {key: to_json_value(item) for key, item in value.items()}
+    if isinstance(value, (np.floating, np.integer)):
+        return value.item()
+    return value
+
+class ResultCache:
+    """
+    Persistent SQLite cache of statistical test results, keyed by company, disclosure date,
+    window definition and test set. Each entry stores the hash of the window's input data and
+    is ignored when the hash no longer matches. Least recently used entries are evicted
+    past max_entries.
+    """
+    def __init__(self, path=None, max_entries=None):
+        self.path = path or db_config.RESULT_CACHE_PATH
+        self.max_entries = max_entries or db_config.RESULT_CACHE_MAX_ENTRIES
+        self.connection = None
+        self.pid = None
+
+    def get_connection(self):
+        # Worker processes open their own connection rather than reusing one inherited on fork
+        if self.connection is None or self.pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+            self.connection = sqlite3.connect(self.path, timeout=30)
+            self.connection.execute("PRAGMA journal_mode=WAL;")
+            self.connection.execute("""
+                CREATE TABLE IF NOT EXISTS test_results (
+                    company_id INTEGER NOT NULL,
+                    disclosure_date TEXT NOT NULL,
+                    window TEXT NOT NULL,
+                    test_set TEXT NOT NULL,
+                    data_hash TEXT NOT NULL,
+                    results TEXT NOT NULL,
+                    last_used REAL NOT NULL,
+                    PRIMARY KEY (company_id, disclosure_date, window, test_set)
+                );
+            """)
+            self.connection.execute("CREATE INDEX IF NOT EXISTS idx_test_results_last_used ON test_results (last_used);")
+            self.connection.commit()
+            self.pid = os.getpid()
+        return self.connection
+
+    def get(self, company_id, disclosure_date, window, data_hash, test_set=TEST_SET):
+        """
+        Return the cached results, or None when missing or computed from different data.
+        """
+        connection = self.get_connection()
+        row = connection.execute(
+            "SELECT data_hash, results FROM test_results WHERE company_id = ? AND disclosure_date = ? AND window = ? AND test_set = ?;",
+            (company_id, disclosure_date, window, test_set)
+        ).fetchone()
+        if row is None or row[0] != data_hash:
+            return None
+
+        connection.execute(
+            "UPDATE test_results SET last_used = ? WHERE company_id = ? AND disclosure_date = ? AND window = ? AND test_set = ?;",
+            (time.time(), company_id, disclosure_date, window, test_set)
+        )
+        connection.commit()
+        return json.loads(row[1])
+
+    def put(self, company_id, disclosure_date, window, data_hash, results, test_set=TEST_SET):
+        connection = self.get_connection()
+        connection.execute(
+            "INSERT OR REPLACE INTO test_results VALUES (?, ?, ?, ?, ?, ?, ?);",
+            (company_id, disclosure_date, window, test_set, data_hash, json.dumps(to_json_value(results)), time.time())
+        )
+        self.evict(connection)
+        connection.commit()
+
+    def evict(self, connection):
+        """
+        Delete the least recently used entries beyond max_entries.
+        """
+        count = connection.execute("SELECT COUNT(*) FROM test_results;").fetchone()[0]
+        if count > self.max_entries:
+            connection.execute(
+                "DELETE FROM test_results WHERE rowid IN (SELECT rowid FROM test_results ORDER BY last_used LIMIT ?);",
+                (count - self.max_entries,)
+            )
+            logger.info(f"Result cache evicted {count - self.max_entries} entries")
+
+    def clear(self):
+        connection = self.get_connection()
+        connection.execute("DELETE FROM test_results;")
+        connection.commit()
+
+def get_result_cache():
+    """
+    Return the process-wide result cache, or None when it is disabled.
+    """
+    global _cache
+    if not db_config.RESULT_CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResultCache()
+    return _cache
+
+def cached_statistical_tests(company_id, disclosure_dates, windows, window):
+    """
+    Return the statistical test results of every window, computing only the windows that are
+    not cached or whose input data changed since they were cached.
+    """
+    cache = get_result_cache()
+    if cache is None:
+        return static_analysis_utils.perform_statistical_tests_for_windows(windows)
+
+    disclosure_dates = [db_utils.format_date_param(disclosure_date) for disclosure_date in disclosure_dates]
+    data_hashes = [hash_window(surrounding_data) for surrounding_data in windows]
+
+    results = []
+    misses = []
+    for position, (disclosure_date, data_hash) in enumerate(zip(disclosure_dates, data_hashes)):
+        try:
+            cached = cache.get(company_id, disclosure_date, window, data_hash)
+        except sqlite3.Error as e:
+            logger.error(f"Result cache lookup failed: {e}")
+            cached = None
+        results.append(cached)
+        if cached is None:
+            misses.append(position)
+
+    if misses:
+        computed = static_analysis_utils.perform_statistical_tests_for_windows([windows[position] for position in misses])
+        for position, event_results in zip(misses, computed):
+            results[position] = event_results
+            if event_results is None:
+                continue
+            try:
+                cache.put(company_id, disclosure_dates[position], window, data_hashes[position], event_results)
+            except sqlite3.Error as e:
+                logger.error(f"Result cache update failed: {e}")
+
+    logger.info(f"Result cache: {len(windows) - len(misses)} hits, {len(misses)} recomputed for company {company_id}")
+    return results
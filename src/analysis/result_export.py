@@ -0,0 +1,222 @@
+# result_export.py
+
+import math
+import os
+
+import numpy as np
+import pandas as pd
+
+from database import db_config, db_functions, db_utils
+from utils.setup_logging import setup_logger
+from . import price_cube, results_table
+
+logger = setup_logger('app', log_file='app.log')
+
+FORMATS = ['xlsx', 'parquet', 'csv']
+
+# Rows per worksheet in an .xlsx file, including the header row
+EXCEL_MAX_ROWS = 1048576
+
+def parquet_available():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+def window_frame(surrounding_data):
+    """
+    Return the surrounding data of an event as a DataFrame, converting a price cube EventWindow.
+    """
+    if isinstance(surrounding_data, price_cube.EventWindow):
+        return surrounding_data.to_frame()
+    return surrounding_data
+
+def data_rows(events):
+    """
+    Build long-format rows from (company ID, disclosure date, surrounding data) events in one pass:
+    the company ID and disclosure date of each row, then the db_functions price columns.
+    Surrounding data may be a DataFrame or a price cube EventWindow.
+    """
+    frames = [window_frame(surrounding_data) for _, _, surrounding_data in events]
+    lengths = [len(frame) for frame in frames]
+    frame = pd.concat([db_functions.empty_price_frame()] + [frame for frame in frames if len(frame)], ignore_index=True)
+    frame = db_utils.apply_price_schema(frame.reindex(columns=db_functions.STOCK_DATA_COLUMNS))
+    frame.insert(0, 'company_id', pd.array(np.repeat([company_id for company_id, _, _ in events], lengths), dtype='Int64'))
+    frame.insert(1, 'disclosure_date', pd.to_datetime(np.repeat(
+        [pd.Timestamp(disclosure_date) for _, disclosure_date, _ in events], lengths)).astype('datetime64[ns]'))
+    return frame
+
+def empty_data_frame():
+    return data_rows([])
+
+class ExcelSheet:
+    """
+    Rows of one table in a constant_memory workbook. Rows are written in order and flushed as they go;
+    when a worksheet is full the table continues on a new one, e.g. 'Data (2)'.
+    """
+    def __init__(self, workbook, name, columns):
+        self.workbook = workbook
+        self.name = name
+        self.columns = list(columns)
+        self.date_format = workbook.add_format({'num_format': 'yyyy-mm-dd'})
+        self.sheets = 0
+        self.add_worksheet()
+
+    def add_worksheet(self):
+        self.sheets += 1
+        self.worksheet = self.workbook.add_worksheet(self.name if self.sheets == 1 else f"{self.name} ({self.sheets})")
+        self.worksheet.write_row(0, 0, self.columns)
+        self.row = 1
+
+    def write(self, frame):
+        # Nulls are left as blank cells and infinities written as 'inf' and '-inf', as DataFrame.to_excel does
+        values = frame.astype(object).where(frame.notna(), None)
+        for values_row in values.itertuples(index=False, name=None):
+            if self.row == EXCEL_MAX_ROWS:
+                self.add_worksheet()
+            for column, value in enumerate(values_row):
+                if value is None:
+                    continue
+                if isinstance(value, pd.Timestamp):
+                    self.worksheet.write_datetime(self.row, column, value.to_pydatetime(), self.date_format)
+                elif isinstance(value, float) and math.isinf(value):
+                    self.worksheet.write_string(self.row, column, 'inf' if value > 0 else '-inf')
+                else:
+                    self.worksheet.write(self.row, column, value)
+            self.row += 1
+
+class LongFormatTable:
+    """
+    One long-format table written to every export format at once. Appended items are buffered
+    up to buffer_rows rows, then build turns them into one frame that is written as one Parquet
+    row group, so memory stays bounded however many events are exported.
+    """
+    def __init__(self, base_path, name, template, build, formats, workbook=None, buffer_rows=None):
+        self.template = template
+        self.build = build
+        self.columns = list(template.columns)
+        self.buffer_rows = buffer_rows or db_config.EXPORT_BUFFER_ROWS
+        self.buffer = []
+        self.buffered = 0
+        self.rows = 0
+        self.paths = []
+
+        self.parquet_writer = None
+        if 'parquet' in formats:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            path = f"{base_path}_{name.lower()}.parquet"
+            self.schema = pa.Schema.from_pandas(template, preserve_index=False)
+            self.parquet_writer = pq.ParquetWriter(path, self.schema)
+            self.paths.append(path)
+
+        self.csv_file = None
+        if 'csv' in formats:
+            path = f"{base_path}_{name.lower()}.csv"
+            self.csv_file = open(path, 'w', newline='', encoding='utf-8')
+            template.to_csv(self.csv_file, index=False)
+            self.paths.append(path)
+
+        self.sheet = ExcelSheet(workbook, name, self.columns) if workbook is not None else None
+
+    def append(self, item, rows):
+        if not rows:
+            return
+        self.buffer.append(item)
+        self.buffered += rows
+        if self.buffered >= self.buffer_rows:
+            self.flush()
+
+    def flush(self):
+        if not self.buffer:
+            return
+        chunk = self.build(self.buffer).reindex(columns=self.columns).astype(self.template.dtypes.to_dict())
+        self.buffer, self.buffered = [], 0
+
+        if self.parquet_writer is not None:
+            import pyarrow as pa
+
+            self.parquet_writer.write_table(pa.Table.from_pandas(chunk, schema=self.schema, preserve_index=False))
+        if self.csv_file is not None:
+            chunk.to_csv(self.csv_file, header=False, index=False, date_format='%Y-%m-%d')
+        if self.sheet is not None:
+            self.sheet.write(chunk)
+        self.rows += len(chunk)
+
+    def close(self):
+        self.flush()
+        if self.parquet_writer is not None:
+            self.parquet_writer.close()
+        if self.csv_file is not None:
+            self.csv_file.close()
+
+class ResultExporter:
+    """
+    Stream each event's surrounding data and test results to long-format files as the analysis
+    produces them: <name>_data and <name>_results as Parquet and CSV, and <name>.xlsx with a single
+    Data sheet and a single Results sheet written in xlsxwriter's constant_memory mode.
+    Formats default to db_config.EXPORT_FORMATS; Parquet is skipped when pyarrow is not installed.
+    """
+    def __init__(self, name, output_dir="output", formats=None, buffer_rows=None):
+        formats = [export_format for export_format in (formats or db_config.EXPORT_FORMATS) if export_format in FORMATS]
+        if 'parquet' in formats and not parquet_available():
+            logger.warning("pyarrow is not installed, skipping the Parquet export")
+            formats.remove('parquet')
+
+        if not os.path.exists(output_dir):
+            os.makedirs(output_dir)
+        base_path = os.path.join(output_dir, name)
+
+        self.workbook = None
+        self.workbook_path = None
+        if 'xlsx' in formats:
+            import xlsxwriter
+
+            self.workbook_path = f"{base_path}.xlsx"
+            self.workbook = xlsxwriter.Workbook(self.workbook_path, {'constant_memory': True})
+
+        self.data = LongFormatTable(base_path, 'Data', empty_data_frame(), data_rows, formats, self.workbook, buffer_rows)
+        self.results = LongFormatTable(base_path, 'Results', results_table.empty_table(), results_table.from_records,
+                                       formats, self.workbook, buffer_rows)
+
+    @property
+    def paths(self):
+        return ([self.workbook_path] if self.workbook_path else []) + self.data.paths + self.results.paths
+
+    def add_event(self, company_id, disclosure_date, surrounding_data, test_results, company_name=None):
+        """
+        Append one event: its window of prices and its collect_test_results dict.
+        """
+        self.add_window(company_id, disclosure_date, surrounding_data)
+        self.results.append({**test_results, 'company_id': company_id, 'company_name': company_name}, 1)
+
+    def add_window(self, company_id, disclosure_date, surrounding_data):
+        self.data.append((company_id, disclosure_date, surrounding_data), len(surrounding_data))
+
+    def add_results(self, table):
+        """
+        Append the rows of a results table.
+        """
+        for record in results_table.as_table(table).to_dict('records'):
+            self.results.append(record, 1)
+
+    def add_sheet(self, sheet_name, frame):
+        """
+        Write a small extra sheet, such as a per-company summary, to the workbook only.
+        """
+        if self.workbook is not None:
+            ExcelSheet(self.workbook, sheet_name, frame.columns).write(frame)
+
+    def close(self):
+        self.data.close()
+        self.results.close()
+        if self.workbook is not None:
+            self.workbook.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
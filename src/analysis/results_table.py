@@ -0,0 +1,122 @@
+# results_table.py
+
+import numpy as np
+import pandas as pd
+
+# One row per event: its identifiers, one column per test statistic and p-value, then the
+# comparison of the window with the company's baseline statistics
+RESULT_COLUMNS = {
+    'company_id': 'Int64',
+    'company_name': 'string',
+    'disclosure_date': 'datetime64[ns]',
+    'observations': 'Int64',
+    't_test_stat': 'float64',
+    't_test_p_value': 'float64',
+    'wilcoxon_stat': 'float64',
+    'wilcoxon_p_value': 'float64',
+    'correlation_coeff': 'float64',
+    'correlation_p_value': 'float64',
+    'mwu_stat': 'float64',
+    'mwu_p_value': 'float64',
+    'baseline_stock_price_volatility': 'float64',
+    'baseline_average_stock_volume': 'float64',
+    'stock_volatility_ratio': 'float64',
+    'stock_volume_ratio': 'float64'
+}
+
+# Test name -> (statistic key in batch_statistics.run_statistical_tests, statistic column, p-value column)
+TESTS = {
+    't_test': ('t_statistic', 't_test_stat', 't_test_p_value'),
+    'wilcoxon': ('wilcoxon_statistic', 'wilcoxon_stat', 'wilcoxon_p_value'),
+    'correlation': ('correlation_coefficient', 'correlation_coeff', 'correlation_p_value'),
+    'mannwhitneyu': ('mwu_statistic', 'mwu_stat', 'mwu_p_value')
+}
+
+# Summary column counting the significant results of each test, named like interpretation_utils.summarize_results
+SIGNIFICANT_COUNTS = {
+    't_test': 'significant_t_tests',
+    'wilcoxon': 'significant_wilcoxon_tests',
+    'correlation': 'significant_correlations',
+    'mannwhitneyu': 'significant_mwu_tests'
+}
+
+def empty_table():
+    return apply_schema(pd.DataFrame(columns=list(RESULT_COLUMNS)))
+
+def apply_schema(table):
+    """
+    Cast the columns of a results table that appear in RESULT_COLUMNS to their schema type,
+    adding missing ones as nulls. Extra columns are kept after the schema columns.
+    """
+    columns = {}
+    for column, dtype in RESULT_COLUMNS.items():
+        if column not in table.columns:
+            columns[column] = pd.Series(pd.NA if dtype in ('Int64', 'string') else np.nan, index=table.index, dtype=dtype)
+        elif table[column].dtype == dtype:
+            columns[column] = table[column]
+        elif dtype.startswith('datetime64'):
+            columns[column] = pd.to_datetime(table[column]).astype(dtype)
+        elif dtype == 'string':
+            columns[column] = table[column].astype(dtype)
+        else:
+            columns[column] = pd.to_numeric(table[column], errors='coerce').astype(dtype)
+    extra = [column for column in table.columns if column not in RESULT_COLUMNS]
+    return pd.concat([pd.DataFrame(columns, index=table.index), table[extra]], axis=1).reset_index(drop=True)
+
+def from_records(records, company_id=None, company_name=None):
+    """
+    Build a results table from a list of collect_test_results dicts.
+    company_id and company_name fill in the records that do not carry their own.
+    """
+    table = pd.DataFrame.from_records(list(records))
+    if company_id is not None and 'company_id' not in table.columns:
+        table['company_id'] = company_id
+    if company_name is not None and 'company_name' not in table.columns:
+        table['company_name'] = company_name
+    return apply_schema(table)
+
+def as_table(results):
+    """
+    Return results as a results table, converting a list of result dicts when needed.
+    """
+    if isinstance(results, pd.DataFrame):
+        return apply_schema(results)
+    return from_records(results)
+
+def significance_flags(table, alpha=0.05):
+    """
+    Boolean columns marking each test as significant at alpha; a missing p-value is not significant.
+    """
+    return pd.DataFrame({
+        f"{test}_significant": table[p_value_column].to_numpy(float) < alpha
+        for test, (_, _, p_value_column) in TESTS.items()
+    }, index=table.index)
+
+def summarize(table, by=None, alpha=0.05):
+    """
+    Count the significant results and average the statistics of each test in one pass.
+    by may be None for a single summary row, with zero counts and NaN averages for an empty table,
+    a column name, 'year' for the disclosure year, or a list of these.
+    """
+    table = as_table(table)
+    frame = pd.concat([table[[column for _, *columns in TESTS.values() for column in columns]],
+                       significance_flags(table, alpha)], axis=1)
+
+    aggregations = {'total_disclosures': ('t_test_p_value', 'size')}
+    for test in TESTS:
+        aggregations[SIGNIFICANT_COUNTS[test]] = (f"{test}_significant", 'sum')
+    for _, stat_column, _ in TESTS.values():
+        aggregations[f"average_{stat_column}"] = (stat_column, 'mean')
+
+    if by is None:
+        # Reduced column by column rather than grouped, so that an empty table still gets its row
+        return pd.DataFrame([{name: frame[column].agg(function) for name, (column, function) in aggregations.items()}])
+
+    keys = []
+    for key in ([by] if isinstance(by, str) else list(by)):
+        if key == 'year':
+            frame['year'] = table['disclosure_date'].dt.year
+        else:
+            frame[key] = table[key]
+        keys.append(key)
+    return frame.groupby(keys, dropna=False).agg(**aggregations).reset_index()
@@ -1,18 +1,21 @@
 # static_analysis_utils.py
 
-from scipy.stats import ttest_rel, wilcoxon, pearsonr, mannwhitneyu
+import numpy as np
 
 # Custom Modules
-from . import StockAnalysisResults
-from utils import app_utils
-from plots import plot_data
+from . import StockAnalysisResults, price_cube, batch_statistics
+from database import db_utils, price_stats
+from utils import report_sink
 
 def prepare_data(surrounding_data):
     """
     Prepare and clean the data for analysis.
     """
-    surrounding_data['Stock Volume'] = surrounding_data['Stock Volume'].apply(app_utils.convert_volume)
-    surrounding_data['Dow Jones Volume'] = surrounding_data['Dow Jones Volume'].apply(app_utils.convert_volume)
+    if isinstance(surrounding_data, price_cube.EventWindow):
+        return prepare_window(surrounding_data)
+
+    # Frames from the fetch functions already follow the price schema, so this is a no-op for them
+    surrounding_data = db_utils.apply_price_schema(surrounding_data)
 
     try:
         surrounding_data = surrounding_data.astype({
@@ -33,10 +36,36 @@ def prepare_data(surrounding_data):
 
     return surrounding_data
 
+def prepare_window(window):
+    """
+    Prepare a price cube window for analysis without building a DataFrame.
+    Returns a dict of arrays keyed like the prepared DataFrame columns; rows with missing
+    values are dropped, otherwise the arrays are views into the cube.
+    """
+    data = {
+        'Stock Open': window.stock_open,
+        'Stock Close': window.stock_close,
+        'Stock Volume': window.stock_volume,
+        'Dow Jones Open': window.dow_jones_open,
+        'Dow Jones Close': window.dow_jones_close,
+        'Dow Jones Volume': window.dow_jones_volume
+    }
+    data['Stock Price Change'] = data['Stock Close'] - data['Stock Open']
+    data['Dow Jones Change'] = data['Dow Jones Close'] - data['Dow Jones Open']
+
+    complete = ~np.isnan(np.column_stack(list(data.values()))).any(axis=1)
+    if not complete.all():
+        data = {column: values[complete] for column, values in data.items()}
+    data['Date'] = window.dates if complete.all() else window.dates[complete]
+
+    return data
+
 def perform_t_test(stock_changes, dow_jones_changes):
     """
     Perform a paired t-test.
     """
+    from scipy.stats import ttest_rel
+
     try:
         t_stat, p_value = ttest_rel(stock_changes, dow_jones_changes)
         return t_stat, p_value
@@ -47,6 +76,8 @@ def perform_wilcoxon_test(stock_changes, dow_jones_changes):
     """
     Perform Wilcoxon signed-rank test.
     """
+    from scipy.stats import wilcoxon
+
     try:
         wilcoxon_stat, wilcoxon_p_value = wilcoxon(stock_changes, dow_jones_changes)
         return wilcoxon_stat, wilcoxon_p_value
@@ -57,6 +88,8 @@ def perform_correlation_test(stock_changes, dow_jones_changes):
     """
     Perform Pearson correlation test.
     """
+    from scipy.stats import pearsonr
+
     try:
         correlation, corr_p_value = pearsonr(stock_changes, dow_jones_changes)
         return correlation, corr_p_value
@@ -67,6 +100,8 @@ def perform_mannwhitneyu_test(stock_changes, dow_jones_changes):
     """
     Perform Mann-Whitney U test.
     """
+    from scipy.stats import mannwhitneyu
+
     try:
         mwu_stat, mwu_p_value = mannwhitneyu(stock_changes, dow_jones_changes)
         return mwu_stat, mwu_p_value
@@ -77,48 +112,59 @@ def perform_statistical_tests(surrounding_data):
     """
     Perform all statistical tests on the prepared data.
     """
-    results = {}
+    return perform_statistical_tests_batch([surrounding_data])[0]
 
-    stock_changes = surrounding_data['Stock Price Change']
-    dow_jones_changes = surrounding_data['Dow Jones Change']
-
-    try:
-        t_stat, p_value = perform_t_test(stock_changes, dow_jones_changes)
-        results['t_test'] = {'t_statistic': t_stat, 'p_value': p_value}
-    except ValueError as e:
-        results['t_test'] = {'error': str(e)}
-
-    try:
-        wilcoxon_stat, wilcoxon_p_value = perform_wilcoxon_test(stock_changes, dow_jones_changes)
-        results['wilcoxon'] = {'wilcoxon_statistic': wilcoxon_stat, 'p_value': wilcoxon_p_value}
-    except ValueError as e:
-        results['wilcoxon'] = {'error': str(e)}
-
-    try:
-        correlation, corr_p_value = perform_correlation_test(stock_changes, dow_jones_changes)
-        results['correlation'] = {'correlation_coefficient': correlation, 'p_value': corr_p_value}
-    except ValueError as e:
-        results['correlation'] = {'error': str(e)}
-
-    try:
-        mwu_stat, mwu_p_value = perform_mannwhitneyu_test(stock_changes, dow_jones_changes)
-        results['mannwhitneyu'] = {'mwu_statistic': mwu_stat, 'p_value': mwu_p_value}
-    except ValueError as e:
-        results['mannwhitneyu'] = {'error': str(e)}
+def perform_statistical_tests_batch(prepared_windows):
+    """
+    Perform all statistical tests on a list of prepared windows in vectorized passes.
+    Returns one results dict per window, with the window's number of complete observations;
+    tests that cannot run on a window's observations are reported as {'error': ...}, as the
+    single-window scipy tests would raise.
+    """
+    stock_changes = batch_statistics.stack_series([window['Stock Price Change'] for window in prepared_windows])
+    dow_jones_changes = batch_statistics.stack_series([window['Dow Jones Change'] for window in prepared_windows])
+    batch_results = batch_statistics.run_statistical_tests(stock_changes, dow_jones_changes)
+
+    results = []
+    for position, observations in enumerate(batch_results['observations']):
+        event_results = {
+            test: {key: values[position] for key, values in test_results.items()}
+            for test, test_results in batch_results.items() if test != 'observations'
+        }
+        event_results['observations'] = int(observations)
+        if observations == 1 and np.nansum(stock_changes[position] - dow_jones_changes[position]) == 0:
+            event_results['wilcoxon'] = {'error': "Error performing Wilcoxon signed-rank test: "
+                                                  "each sample in `data` must contain two or more observations along `axis`."}
+        if observations < 2:
+            event_results['correlation'] = {'error': "Error calculating correlation: `x` and `y` must have length at least 2."}
+        results.append(event_results)
 
     return results
 
-def additional_insights(surrounding_data):
+# Insights comparing a window with the company's baseline, recorded with the test results
+BASELINE_KEYS = ['baseline_stock_price_volatility', 'baseline_average_stock_volume', 'stock_volatility_ratio', 'stock_volume_ratio']
+
+def additional_insights(surrounding_data, baseline=None):
     """
-    Generate additional insights from the data.
+    Generate additional insights from the data. baseline holds the company's statistics from
+    database.price_stats; when given, the window's volatility and volume are also compared with it.
     """
     insights = {
-        'stock_price_volatility': surrounding_data['Stock Price Change'].std(),
-        'dow_jones_volatility': surrounding_data['Dow Jones Change'].std(),
-        'average_stock_volume': surrounding_data['Stock Volume'].mean(),
-        'average_dow_jones_volume': surrounding_data['Dow Jones Volume'].mean()
+        'stock_price_volatility': np.std(np.asarray(surrounding_data['Stock Price Change'], dtype=float), ddof=1),
+        'dow_jones_volatility': np.std(np.asarray(surrounding_data['Dow Jones Change'], dtype=float), ddof=1),
+        'average_stock_volume': np.mean(np.asarray(surrounding_data['Stock Volume'], dtype=float)),
+        'average_dow_jones_volume': np.mean(np.asarray(surrounding_data['Dow Jones Volume'], dtype=float))
     }
 
+    if baseline is not None:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            insights.update({
+                'baseline_stock_price_volatility': baseline['stock_price_volatility'],
+                'baseline_average_stock_volume': baseline['average_stock_volume'],
+                'stock_volatility_ratio': np.float64(insights['stock_price_volatility']) / baseline['stock_price_volatility'],
+                'stock_volume_ratio': np.float64(insights['average_stock_volume']) / baseline['average_stock_volume']
+            })
+
     return insights
 
 def summarize_findings(insights, surrounding_data):
@@ -126,37 +172,82 @@ def summarize_findings(insights, surrounding_data):
     Summarize the findings of the analysis.
     """
     summary = {
-        'stock_price_change_mean': surrounding_data['Stock Price Change'].mean(),
-        'dow_jones_change_mean': surrounding_data['Dow Jones Change'].mean(),
+        'stock_price_change_mean': np.mean(np.asarray(surrounding_data['Stock Price Change'], dtype=float)),
+        'dow_jones_change_mean': np.mean(np.asarray(surrounding_data['Dow Jones Change'], dtype=float)),
         'stock_volume_mean': insights['average_stock_volume'],
         'dow_jones_volume_mean': insights['average_dow_jones_volume'],
         'stock_price_volatility': insights['stock_price_volatility'],
         'dow_jones_volatility': insights['dow_jones_volatility']
     }
+    for key in ('stock_volatility_ratio', 'stock_volume_ratio'):
+        if key in insights:
+            summary[key] = insights[key]
 
     return summary
 
-def perform_t_test_analysis(company_id, disclosure_date, surrounding_data):
+def get_baseline(company_id):
+    """
+    Return the company's baseline statistics from database.price_stats, or None when there are none.
+    """
+    try:
+        baseline = price_stats.get_baseline(company_id)
+    except (OSError, ValueError) as e:
+        report_sink.message(f"Price statistics unavailable for Company ID {company_id}: {e}", report_sink.DEBUG)
+        return None
+    return baseline if baseline['observations'] > 1 else None
+
+def perform_statistical_tests_for_windows(windows):
+    """
+    Prepare a list of surrounding data windows and run the statistical tests on all of them at once.
+    Windows that cannot be prepared get None.
+    """
+    prepared_windows = {}
+    for position, window in enumerate(windows):
+        try:
+            prepared_windows[position] = prepare_data(window)
+        except ValueError:
+            continue
+
+    batch_results = perform_statistical_tests_batch(list(prepared_windows.values())) if prepared_windows else []
+    results = [None] * len(windows)
+    for position, event_results in zip(prepared_windows, batch_results):
+        results[position] = event_results
+    return results
+
+def perform_t_test_analysis(company_id, disclosure_date, surrounding_data, statistical_results=None):
     """
     Perform comprehensive statistical analysis on stock data surrounding disclosure dates.
+    statistical_results may be passed in when the tests were already run for a batch of windows.
+    The results also carry the window's comparison with the company's baseline statistics, see
+    BASELINE_KEYS; the result tables are only built when the active report sink shows details.
     """
-    print(f"\nPerforming t-test analysis for disclosure date: {disclosure_date}")
+    report_sink.message(f"\nPerforming t-test analysis for disclosure date: {disclosure_date}", report_sink.DETAIL)
     plotData = False
     resultsSummary = False
 
-    results = StockAnalysisResults.StockAnalysisResults(company_id)
+    display = report_sink.enabled(report_sink.DETAIL)
 
     try:
         surrounding_data = prepare_data(surrounding_data)
     except ValueError as e:
-        print(e)
+        report_sink.message(str(e))
         return
 
-    try:
-        statistical_results = perform_statistical_tests(surrounding_data)
-    except ValueError as e:
-        print(e)
-        return
+    if statistical_results is None:
+        try:
+            statistical_results = perform_statistical_tests(surrounding_data)
+        except ValueError as e:
+            report_sink.message(str(e))
+            return
+
+    # The baseline comparison is part of the results whatever the sink shows, so it reaches the exports
+    insights = additional_insights(surrounding_data, get_baseline(company_id))
+    statistical_results = {**statistical_results, 'baseline': {key: insights.get(key, np.nan) for key in BASELINE_KEYS}}
+
+    if not display:
+        return statistical_results
+
+    results = StockAnalysisResults.StockAnalysisResults(company_id)
 
     t_test_significant = statistical_results['t_test']['p_value'] < 0.05 if 'p_value' in statistical_results['t_test'] else False
     wilcoxon_significant = statistical_results['wilcoxon']['p_value'] < 0.05 if 'p_value' in statistical_results['wilcoxon'] else False
@@ -195,18 +286,19 @@ def perform_t_test_analysis(company_id, disclosure_date, surrounding_data):
         if mwu_significant else "The Mann-Whitney U test result is not statistically significant, indicating no significant difference between stock price change and Dow Jones change."
     )
 
-    insights = additional_insights(surrounding_data)
     summary = summarize_findings(insights, surrounding_data)
 
     results.set_additional_insights(
         insights['stock_price_volatility'], 
         insights['dow_jones_volatility'], 
         insights['average_stock_volume'], 
-        insights['average_dow_jones_volume']
+        insights['average_dow_jones_volume'],
+        insights.get('baseline_stock_price_volatility'),
+        insights.get('baseline_average_stock_volume')
     )
 
     if resultsSummary:
-        print("\nSummary of Findings:")
+        report_sink.message("\nSummary of Findings:", report_sink.DETAIL)
         results.set_summary(
             summary['stock_price_change_mean'], 
             summary['dow_jones_change_mean'], 
@@ -219,6 +311,7 @@ def perform_t_test_analysis(company_id, disclosure_date, surrounding_data):
     results.display_results()
 
     # if plotData:
+    #     from plots import plot_data
     #     plot_data.plot_time_series(surrounding_data, company_id)
     #     plot_data.plot_histograms(surrounding_data)
     #     plot_data.plot_correlation_matrix(surrounding_data)
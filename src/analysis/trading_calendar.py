@@ -0,0 +1,106 @@
+# trading_calendar.py
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from database import db_config, db_functions
+
+_calendar = None
+
+class TradingCalendar:
+    """
+    Sorted trading days taken from the dow_jones dates, answering next/previous trading day
+    and trading-day window lookups by binary search.
+    """
+    def __init__(self, dates):
+        self.dates = np.unique(np.asarray(dates, dtype='datetime64[D]'))
+
+    def __len__(self):
+        return len(self.dates)
+
+    @classmethod
+    def load(cls, path=None):
+        """
+        Load the persisted calendar, extend it with any newer dow_jones dates and save it again.
+        """
+        path = path or db_config.TRADING_CALENDAR_PATH
+        if os.path.exists(path):
+            calendar = cls(np.load(path))
+        else:
+            calendar = cls([])
+
+        since = pd.Timestamp(calendar.dates[-1]) if len(calendar) else None
+        new_dates = db_functions.get_trading_dates(since)
+        if new_dates:
+            calendar = cls(np.concatenate([calendar.dates, np.asarray(new_dates, dtype='datetime64[D]')]))
+            calendar.save(path)
+        return calendar
+
+    def save(self, path=None):
+        path = path or db_config.TRADING_CALENDAR_PATH
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        np.save(path, self.dates)
+
+    def position(self, date):
+        """
+        Return the ordinal of the first trading day on or after date.
+        """
+        return int(np.searchsorted(self.dates, np.datetime64(pd.Timestamp(date), 'D'), side='left'))
+
+    def is_trading_day(self, date):
+        position = self.position(date)
+        return position < len(self.dates) and self.dates[position] == np.datetime64(pd.Timestamp(date), 'D')
+
+    def next_trading_day(self, date, inclusive=True):
+        """
+        Return the first trading day on or after date (strictly after when inclusive is False), or None.
+        """
+        date = np.datetime64(pd.Timestamp(date), 'D')
+        position = int(np.searchsorted(self.dates, date, side='left' if inclusive else 'right'))
+        if position >= len(self.dates):
+            return None
+        return pd.Timestamp(self.dates[position])
+
+    def previous_trading_day(self, date, inclusive=True):
+        """
+        Return the last trading day on or before date (strictly before when inclusive is False), or None.
+        """
+        date = np.datetime64(pd.Timestamp(date), 'D')
+        position = int(np.searchsorted(self.dates, date, side='right' if inclusive else 'left')) - 1
+        if position < 0:
+            return None
+        return pd.Timestamp(self.dates[position])
+
+    def trading_days_around(self, date, before, after=None):
+        """
+        Return the trading days [t - before, t + after], where t is the first trading day on or
+        after date, clipped to the calendar. Dates past the last trading day have no window.
+        """
+        after = before if after is None else after
+        position = self.position(date)
+        if position >= len(self.dates):
+            return self.dates[:0]
+        return self.dates[max(position - before, 0):min(position + after + 1, len(self.dates))]
+
+    def window_bounds(self, date, before, after=None):
+        """
+        Return the (start date, end date) of the trading-day window around date, or None
+        when the calendar has no trading days there.
+        """
+        days = self.trading_days_around(date, before, after)
+        if len(days) == 0:
+            return None
+        return pd.Timestamp(days[0]), pd.Timestamp(days[-1])
+
+def get_trading_calendar():
+    """
+    Return the process-wide trading calendar, loading it on first use.
+    """
+    global _calendar
+    if _calendar is None:
+        _calendar = TradingCalendar.load()
+    return _calendar
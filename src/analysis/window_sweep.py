@@ -0,0 +1,169 @@
+# window_sweep.py
+
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+from scipy import special
+
+from utils import display_utils
+from . import batch_statistics, event_study, price_cube
+
+DEFAULT_WINDOWS = [1, 3, 5, 7, 10, 20]
+
+def prefix_sums(values, valid):
+    """
+    Running sums along each row with a leading zero column, so that the sum of
+    columns [a, b) is sums[:, b] - sums[:, a].
+    """
+    values = np.where(valid, values, 0.0)
+    return np.concatenate([np.zeros((values.shape[0], 1)), np.cumsum(values, axis=1)], axis=1)
+
+def moment_statistics(stock_changes, dow_jones_changes, half_width, windows):
+    """
+    Paired t-test and Pearson correlation of every event for every +/- window, from prefix sums
+    of the widest window. Column half_width of the inputs is the event day.
+    """
+    valid = ~np.isnan(stock_changes) & ~np.isnan(dow_jones_changes)
+    differences = stock_changes - dow_jones_changes
+    lower = half_width - np.asarray(windows)
+    upper = half_width + np.asarray(windows) + 1
+
+    def window_sums(values):
+        sums = prefix_sums(values, valid)
+        return sums[:, upper] - sums[:, lower]
+
+    n = window_sums(np.ones_like(stock_changes))
+    difference_sum = window_sums(differences)
+    difference_squares = window_sums(differences ** 2)
+    stock_sum = window_sums(stock_changes)
+    dow_jones_sum = window_sums(dow_jones_changes)
+    stock_squares = window_sums(stock_changes ** 2)
+    dow_jones_squares = window_sums(dow_jones_changes ** 2)
+    cross_products = window_sums(stock_changes * dow_jones_changes)
+
+    def deviation(squares, sums, values):
+        # Differences of prefix sums carry roundoff of the order of eps times the sums of squares
+        # of the whole row, so a constant series would keep a tiny positive deviation; count it as zero
+        with np.errstate(divide='ignore', invalid='ignore'):
+            deviation = squares - sums ** 2 / n
+        tolerance = np.finfo(float).eps * values.shape[1] * np.where(valid, values ** 2, 0.0).sum(axis=1, keepdims=True)
+        return np.where(deviation > tolerance, deviation, 0.0)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean_difference = difference_sum / n
+        variance = deviation(difference_squares, difference_sum, differences) / (n - 1)
+        t_stat = mean_difference / np.sqrt(variance / n)
+        t_p_value = 2 * special.stdtr(n - 1, -np.abs(t_stat))
+
+        # A constant series has no correlation, as in scipy.stats.pearsonr
+        stock_deviation = deviation(stock_squares, stock_sum, stock_changes)
+        dow_jones_deviation = deviation(dow_jones_squares, dow_jones_sum, dow_jones_changes)
+        correlation = np.where((stock_deviation == 0) | (dow_jones_deviation == 0), np.nan, np.clip(
+            (cross_products - stock_sum * dow_jones_sum / n) / np.sqrt(stock_deviation * dow_jones_deviation), -1.0, 1.0))
+        shape = n / 2 - 1
+        corr_p_value = np.clip(2 * special.betainc(shape, shape, 0.5 * (1 - np.abs(correlation))), 0.0, 1.0)
+    corr_p_value = np.where(n == 2, np.where(np.isnan(correlation), np.nan, 1.0), corr_p_value)
+
+    return {
+        'observations': n.astype(int),
+        'mean_difference': mean_difference,
+        't_statistic': t_stat,
+        't_test_p_value': t_p_value,
+        'correlation_coefficient': correlation,
+        'correlation_p_value': corr_p_value
+    }
+
+def sweep_windows(cube, events, windows=DEFAULT_WINDOWS):
+    """
+    Evaluate the statistical tests of every (company ID, event date) pair over several
+    +/- trading-day windows. The widest window is gathered once per event; narrower windows are
+    column slices of it. Means, variances and correlations come from prefix sums, and the rank
+    tests run on the slices. Returns a tidy table with one row per event and window.
+    """
+    windows = sorted(windows)
+    half_width = windows[-1]
+
+    stock_parts, dow_jones_parts = [], []
+    for company_id in sorted({company_id for company_id, _ in events}):
+        positions = np.array([cube.position(event_date) for event_company, event_date in events if event_company == company_id], dtype=int)
+        stock_changes, dow_jones_changes = price_cube.window_changes(cube, company_id, positions, half_width)
+        stock_parts.append(stock_changes)
+        dow_jones_parts.append(dow_jones_changes)
+
+    events = sorted(events, key=lambda event: event[0])
+    stock_changes = np.concatenate(stock_parts, axis=0)
+    dow_jones_changes = np.concatenate(dow_jones_parts, axis=0)
+    moments = moment_statistics(stock_changes, dow_jones_changes, half_width, windows)
+
+    frames = []
+    for position, window in enumerate(windows):
+        columns = slice(half_width - window, half_width + window + 1)
+        sliced = batch_statistics.compact(stock_changes[:, columns], dow_jones_changes[:, columns])
+        wilcoxon_stat, wilcoxon_p_value = batch_statistics.wilcoxon_test(*sliced)
+        mwu_stat, mwu_p_value = batch_statistics.mannwhitneyu_test(*sliced)
+
+        frames.append(pd.DataFrame({
+            'company_id': [company_id for company_id, _ in events],
+            'event_date': [pd.Timestamp(event_date).date() for _, event_date in events],
+            'window': window,
+            'observations': moments['observations'][:, position],
+            'mean_difference': moments['mean_difference'][:, position],
+            't_test_stat': moments['t_statistic'][:, position],
+            't_test_p_value': moments['t_test_p_value'][:, position],
+            'wilcoxon_stat': wilcoxon_stat,
+            'wilcoxon_p_value': wilcoxon_p_value,
+            'correlation_coeff': moments['correlation_coefficient'][:, position],
+            'correlation_p_value': moments['correlation_p_value'][:, position],
+            'mwu_stat': mwu_stat,
+            'mwu_p_value': mwu_p_value
+        }))
+
+    return pd.concat(frames, ignore_index=True).sort_values(['company_id', 'event_date', 'window'], ignore_index=True)
+
+def summarize_sweep(sweep):
+    """
+    Share of events with a significant result, per window and test.
+    """
+    p_value_columns = ['t_test_p_value', 'wilcoxon_p_value', 'correlation_p_value', 'mwu_p_value']
+    significant = sweep[p_value_columns].lt(0.05).where(sweep[p_value_columns].notna())
+    significant['window'] = sweep['window']
+    summary = significant.groupby('window').mean()
+    summary.columns = [column.replace('_p_value', '_significant_share') for column in summary.columns]
+    summary.insert(0, 'events', sweep.groupby('window').size())
+    return summary.reset_index()
+
+def main(argv=None):
+    from . import batch_analysis
+
+    parser = argparse.ArgumentParser(description="Evaluate the disclosure windows over several window lengths")
+    parser.add_argument('--companies', nargs='+', default=['all'], metavar='ID', help="Company IDs or 'all'")
+    parser.add_argument('--windows', nargs='+', type=int, default=DEFAULT_WINDOWS,
+                        help="Trading days before and after each disclosure")
+    args = parser.parse_args(argv)
+
+    company_ids = batch_analysis.resolve_company_ids(args.companies)
+    events = event_study.get_disclosure_events(company_ids)
+    if not events:
+        print("No disclosure dates found.")
+        return 1
+
+    cube = price_cube.PriceCube.load(sorted({company_id for company_id, _ in events}))
+    sweep = sweep_windows(cube, events, args.windows)
+    summary = summarize_sweep(sweep)
+    display_utils.display_dataframe_to_user("Window Sweep", summary)
+
+    output_dir = "output"
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+    results_file = os.path.join(output_dir, "window_sweep_results.xlsx")
+    with pd.ExcelWriter(results_file, engine='xlsxwriter') as writer:
+        summary.to_excel(writer, sheet_name="Summary", index=False)
+        sweep.to_excel(writer, sheet_name="Events", index=False)
+    print(f"\nWindow sweep results exported to {results_file}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,4 +6,34 @@ import os
 DB_NAME = os.getenv('DB_NAME', 'strasbourg')
 DB_USER = os.getenv('DB_USER', 'root')
 DB_PASSWORD = os.getenv('DB_PASSWORD', '')
-DB_HOST = os.getenv('DB_HOST', 'localhost')
\ No newline at end of file
+DB_HOST = os.getenv('DB_HOST', 'localhost')
+
+# Backend: 'mysql' for the MySQL server, or 'sqlite' / 'duckdb' for an embedded database file
+DB_BACKEND = os.getenv('DB_BACKEND', 'mysql')
+DB_PATH = os.getenv('DB_PATH', f'{DB_NAME}.db')
+
+# Connection Pool Configuration
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '10'))
+DB_STATEMENT_CACHE_SIZE = int(os.getenv('DB_STATEMENT_CACHE_SIZE', '32'))
+
+# Local Price Cache Configuration
+PRICE_CACHE_ENABLED = os.getenv('PRICE_CACHE_ENABLED', '1') == '1'
+PRICE_CACHE_DIR = os.getenv('PRICE_CACHE_DIR', 'cache')
+TRADING_CALENDAR_PATH = os.getenv('TRADING_CALENDAR_PATH', os.path.join(PRICE_CACHE_DIR, 'trading_calendar.npy'))
+
+# Statistical Result Cache Configuration
+RESULT_CACHE_ENABLED = os.getenv('RESULT_CACHE_ENABLED', '1') == '1'
+RESULT_CACHE_PATH = os.getenv('RESULT_CACHE_PATH', os.path.join(PRICE_CACHE_DIR, 'results.sqlite'))
+RESULT_CACHE_MAX_ENTRIES = int(os.getenv('RESULT_CACHE_MAX_ENTRIES', '10000'))
+
+# Online Price Statistics Configuration
+PRICE_STATS_PATH = os.getenv('PRICE_STATS_PATH', os.path.join(PRICE_CACHE_DIR, 'price_stats.json'))
+PRICE_STATS_ROLLING_WINDOW = int(os.getenv('PRICE_STATS_ROLLING_WINDOW', '60'))
+
+# Result Export Configuration
+EXPORT_FORMATS = [export_format.strip() for export_format in os.getenv('EXPORT_FORMATS', 'xlsx,parquet,csv').split(',') if export_format.strip()]
+EXPORT_BUFFER_ROWS = int(os.getenv('EXPORT_BUFFER_ROWS', '50000'))
+
+# Plot Configuration
+FIGURE_CACHE_DIR = os.getenv('FIGURE_CACHE_DIR', os.path.join(PRICE_CACHE_DIR, 'figures'))
+PLOT_MAX_POINTS = int(os.getenv('PLOT_MAX_POINTS', '2000'))
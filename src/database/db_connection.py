@@ -1,14 +1,26 @@
 import mysql.connector
 from mysql.connector import Error, pooling
-from . import db_config, db_conn_err
+from collections import OrderedDict
+import pandas as pd
+import threading
+import weakref
+from . import db_config, db_conn_err, db_embedded
 from utils.setup_logging import setup_logger
 import time
 
 # Configure logging to database.log
 logger = setup_logger('database', log_file='database.log')
 
+def create_database_connection():
+    """
+    Create the connection for the backend configured in db_config.DB_BACKEND.
+    """
+    if db_config.DB_BACKEND == 'mysql':
+        return DatabaseConnection()
+    return db_embedded.EmbeddedDatabaseConnection(db_config.DB_BACKEND, db_config.DB_PATH)
+
 class DatabaseConnection:
-    def __init__(self):
+    def __init__(self, pool_size=None):
         self.config = {
             "database": db_config.DB_NAME,
             "user": db_config.DB_USER,
@@ -17,10 +29,38 @@ class DatabaseConnection:
             "use_pure": True,
             "ssl_disabled": False,
         }
-        self.pool = mysql.connector.pooling.MySQLConnectionPool(pool_size=10, **self.config)
-    
+        self.pool_size = pool_size or db_config.DB_POOL_SIZE
+        self.pool = None
+        self.connection = None
+        self._pool_lock = threading.Lock()
+        # Prepared statements per physical connection: {connection: (connection_id, {query: (query, cursor)})}.
+        # Entries go away with their connection, and are dropped when it reconnects under a new ID.
+        self._statement_cache = weakref.WeakKeyDictionary()
+
+    def get_pool(self):
+        """
+        Create the connection pool on first use, so that importing the database layer never blocks on MySQL.
+        """
+        if self.pool is None:
+            with self._pool_lock:
+                if self.pool is None:
+                    # Keep sessions between checkouts so that prepared statements stay valid
+                    self.pool = mysql.connector.pooling.MySQLConnectionPool(
+                        pool_size=self.pool_size, pool_reset_session=False, **self.config
+                    )
+                    logger.info(f"Connection pool created with {self.pool_size} connections")
+        return self.pool
+
     def get_connection(self):
-        return self.pool.get_connection()
+        return self.get_pool().get_connection()
+
+    def reset_pool(self):
+        """
+        Drop the connection pool and every cached prepared statement; the next query creates a new pool.
+        """
+        with self._pool_lock:
+            self._statement_cache.clear()
+            self.pool = None
 
     def __enter__(self):
         self.connection = self.get_connection()
@@ -58,3 +98,76 @@ class DatabaseConnection:
 
     def fetch_query_results(self, query, data=None):
         return self.execute_query(query, data, commit=False)
+
+    def execute_many(self, query, rows, commit=True):
+        """
+        Execute a statement for every row in one round trip; INSERTs are sent as a multi-row insert.
+        """
+        if not self.connection or not self.connection.is_connected():
+            self.connection = self.get_connection()
+        start_time = time.time()
+        try:
+            with self.connection.cursor() as cursor:
+                cursor.executemany(query, rows)
+            if commit:
+                self.connection.commit()
+            logger.info(f"Batch of {len(rows)} rows executed in {time.time() - start_time:.2f} seconds")
+        except Error as e:
+            self.connection.rollback()
+            logger.error(f"Error executing batch: {e}")
+            raise db_conn_err.DatabaseConnectionError(f"Error executing batch: {e}")
+
+    def get_prepared_cursor(self, connection, query):
+        """
+        Return the server-side prepared statement for this query shape on this connection,
+        preparing it on first use. Least recently used statements are closed past the cache size.
+        """
+        # Pooled connections are checked out as a new wrapper around the same physical connection
+        physical_connection = getattr(connection, '_cnx', connection)
+        connection_id, statements = self._statement_cache.get(physical_connection, (None, None))
+        if statements is None or connection_id != physical_connection.connection_id:
+            # A reconnected session lost the statements prepared by the old one
+            statements = OrderedDict()
+            self._statement_cache[physical_connection] = (physical_connection.connection_id, statements)
+
+        cached = statements.get(query)
+        if cached is not None:
+            statements.move_to_end(query)
+            return cached
+
+        # The cursor only reuses its statement when executed with the identical query object
+        cached = (query, connection.cursor(prepared=True))
+        statements[query] = cached
+        if len(statements) > db_config.DB_STATEMENT_CACHE_SIZE:
+            _, (_, evicted_cursor) = statements.popitem(last=False)
+            evicted_cursor.close()
+        return cached
+
+    def fetch_dataframe(self, query, params=None):
+        """
+        Execute a parameterized query as a cached prepared statement and return the results in a DataFrame.
+        """
+        params = tuple(param.item() if hasattr(param, 'item') else param for param in (params or ()))
+        start_time = time.time()
+        try:
+            connection = self.get_connection()
+        except Error as e:
+            logger.error(f"Error: Could not make connection to the MySQL database: {e}")
+            raise db_conn_err.DatabaseConnectionError(f"Could not make connection to the MySQL database: {e}")
+
+        try:
+            prepared_query, cursor = self.get_prepared_cursor(connection, query)
+            cursor.execute(prepared_query, params)
+            if not cursor.with_rows:
+                return pd.DataFrame()
+
+            rows = cursor.fetchall()
+            columns = [desc[0] for desc in cursor.description]
+            logger.info(f"Prepared query executed in {time.time() - start_time:.2f} seconds")
+            return pd.DataFrame(rows, columns=columns)
+        except Error as e:
+            self._statement_cache.pop(getattr(connection, '_cnx', connection), None)
+            logger.error(f"Error executing query: {e}")
+            raise db_conn_err.DatabaseConnectionError(f"Error executing query: {e}")
+        finally:
+            connection.close()
@@ -0,0 +1,184 @@
+# database/db_embedded.py
+
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import date
+
+import pandas as pd
+
+from . import db_conn_err
+from utils.setup_logging import setup_logger
+
+logger = setup_logger('database', log_file='database.log')
+
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'sql', 'database_schema.sql')
+
+# The embedded engines have no migration history, so the keys added by sql/migrations are created with the schema
+EMBEDDED_INDEXES = [
+    "CREATE UNIQUE INDEX IF NOT EXISTS idx_stock_data_company_date ON stock_data (CompanyID, Date);",
+    "CREATE INDEX IF NOT EXISTS idx_stock_data_date ON stock_data (Date);",
+    "CREATE UNIQUE INDEX IF NOT EXISTS idx_dow_jones_date ON dow_jones (Date);",
+    "CREATE UNIQUE INDEX IF NOT EXISTS idx_company_info_id ON company_info (CompanyID);",
+    "CREATE INDEX IF NOT EXISTS idx_disclosures_company_date ON data_breach_disclosures (CompanyID, DisclosureDate);",
+]
+
+sqlite3.register_converter('date', lambda value: date.fromisoformat(value.decode()))
+
+def translate_schema(schema_sql):
+    """
+    Translate the MySQL dump in sql/database_schema.sql to portable SQL.
+    """
+    schema_sql = schema_sql.replace("\\'", "''").replace('\\"', '"')
+    schema_sql = re.sub(r'\b(int|bigint)\(\d+\)', lambda match: match.group(1).upper(), schema_sql, flags=re.IGNORECASE)
+    return schema_sql.replace('`', '')
+
+class EmbeddedDatabaseConnection:
+    """
+    In-process SQLite or DuckDB database file with the same query interface as DatabaseConnection.
+    The file is created from sql/database_schema.sql on first use.
+    """
+    def __init__(self, backend, path):
+        if backend not in ('sqlite', 'duckdb'):
+            raise ValueError(f"Unsupported embedded database backend: {backend}")
+        self.backend = backend
+        self.path = path
+        self.connection = None
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._initialized = False
+
+    def open_connection(self):
+        if self.backend == 'sqlite':
+            return sqlite3.connect(self.path, detect_types=sqlite3.PARSE_DECLTYPES)
+        import duckdb
+        return duckdb.connect(self.path)
+
+    def get_connection(self):
+        """
+        Return this thread's connection, creating the database from the schema on first use.
+        """
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            try:
+                connection = self.open_connection()
+            except Exception as e:
+                logger.error(f"Error: Could not open the {self.backend} database {self.path}: {e}")
+                raise db_conn_err.DatabaseConnectionError(f"Could not open the {self.backend} database {self.path}: {e}")
+            self._local.connection = connection
+            self.initialize(connection)
+        return connection
+
+    def initialize(self, connection):
+        with self._init_lock:
+            if self._initialized:
+                return
+            if not self.has_table(connection, 'company_info'):
+                self.load_schema(connection)
+            self._initialized = True
+
+    def has_table(self, connection, table_name):
+        if self.backend == 'sqlite':
+            query = "SELECT name FROM sqlite_master WHERE type = 'table' AND name = ?;"
+        else:
+            query = "SELECT table_name FROM information_schema.tables WHERE table_name = ?;"
+        return bool(connection.execute(query, [table_name]).fetchall())
+
+    def load_schema(self, connection, schema_path=SCHEMA_PATH):
+        """
+        Create the tables and seed rows from the MySQL schema dump.
+        """
+        start_time = time.time()
+        with open(schema_path, encoding='utf-8') as schema_file:
+            schema_sql = translate_schema(schema_file.read())
+
+        if self.backend == 'sqlite':
+            connection.executescript(schema_sql + ";\n" + "\n".join(EMBEDDED_INDEXES))
+        else:
+            connection.execute(schema_sql + ";\n" + "\n".join(EMBEDDED_INDEXES))
+        self.commit(connection)
+        logger.info(f"Loaded {schema_path} into {self.backend} database {self.path} in {time.time() - start_time:.2f} seconds")
+
+    def translate_query(self, query):
+        """
+        Translate a db_functions query to the embedded engine's dialect.
+        """
+        query = query.replace('%s', '?')
+        if self.backend == 'sqlite':
+            # SQLite stores dates as 'YYYY-MM-DD' text; CAST AS DATE would turn them into numbers
+            query = re.sub(r'CAST\(\?\s+AS\s+DATE\)', '?', query)
+        return query
+
+    def commit(self, connection):
+        # DuckDB runs in autocommit mode unless a transaction was started explicitly
+        if self.backend == 'sqlite':
+            connection.commit()
+
+    def rollback(self, connection):
+        if self.backend == 'sqlite':
+            connection.rollback()
+
+    def __enter__(self):
+        self.connection = self.get_connection()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        self.connection = None
+
+    def execute_query(self, query, data=None, commit=True):
+        connection = self.get_connection()
+        start_time = time.time()
+        try:
+            cursor = connection.execute(self.translate_query(query), list(data or ()))
+            results = cursor.fetchall() if cursor.description else None
+            if commit:
+                self.commit(connection)
+            logger.info(f"Query executed in {time.time() - start_time:.2f} seconds: {query}")
+            return results
+        except Exception as e:
+            self.rollback(connection)
+            logger.error(f"Error executing query: {e}")
+            raise db_conn_err.DatabaseConnectionError(f"Error executing query: {e}")
+
+    def fetch_query_results(self, query, data=None):
+        return self.execute_query(query, data, commit=False)
+
+    def execute_many(self, query, rows, commit=True):
+        """
+        Execute a statement for every row in a single call.
+        """
+        connection = self.get_connection()
+        start_time = time.time()
+        try:
+            connection.executemany(self.translate_query(query), [list(row) for row in rows])
+            if commit:
+                self.commit(connection)
+            logger.info(f"Batch of {len(rows)} rows executed in {time.time() - start_time:.2f} seconds")
+        except Exception as e:
+            self.rollback(connection)
+            logger.error(f"Error executing batch: {e}")
+            raise db_conn_err.DatabaseConnectionError(f"Error executing batch: {e}")
+
+    def fetch_dataframe(self, query, params=None):
+        """
+        Execute a parameterized query and return the results in a DataFrame.
+        """
+        params = [param.item() if hasattr(param, 'item') else param for param in (params or ())]
+        connection = self.get_connection()
+        start_time = time.time()
+        try:
+            cursor = connection.execute(self.translate_query(query), params)
+            if not cursor.description:
+                return pd.DataFrame()
+            rows = cursor.fetchall()
+            columns = [desc[0] for desc in cursor.description]
+            logger.info(f"Query executed in {time.time() - start_time:.2f} seconds")
+            return pd.DataFrame(rows, columns=columns)
+        except Exception as e:
+            logger.error(f"Error executing query: {e}")
+            raise db_conn_err.DatabaseConnectionError(f"Error executing query: {e}")
@@ -1,27 +1,33 @@
 import pandas as pd
-from mysql.connector import Error
-from datetime import datetime
-from . import db_connection, db_utils
+from datetime import datetime, timedelta
+from . import db_connection, db_conn_err, db_utils, price_cache
+from utils.setup_logging import setup_logger
 
-# Create an instance of the DatabaseConnection
-db_instance = db_connection.DatabaseConnection()
+logger = setup_logger('database', log_file='database.log')
+
+STOCK_DATA_COLUMNS = ['Date', 'Stock Open', 'Stock Close', 'Stock Volume',
+                      'Dow Jones Open', 'Dow Jones Close', 'Dow Jones Volume']
+
+def empty_price_frame(columns=STOCK_DATA_COLUMNS):
+    """
+    Return an empty price frame with the column types of db_utils.PRICE_SCHEMA.
+    """
+    return db_utils.apply_price_schema(pd.DataFrame(columns=columns))
+
+# Create the configured database connection; its pool or file is opened on the first query
+db_instance = db_connection.create_database_connection()
 
 def execute_query(sql, params=None):
     """
-    Execute an SQL query and return the results in a DataFrame.
+    Execute a parameterized SQL query and return the results in a DataFrame.
     """
     try:
-        with db_instance.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute(sql, params or ())
-            result = cursor.fetchall()
-            if result:
-                columns = [desc[0] for desc in cursor.description]
-                return pd.DataFrame(result, columns=columns)
-            else:
-                return pd.DataFrame()
-    except Error as e:
-        print(f"SQL execution error: {e}")
+        result = db_instance.fetch_dataframe(sql, params)
+        if result.empty:
+            return pd.DataFrame()
+        return result
+    except db_conn_err.DatabaseConnectionError as e:
+        logger.error(f"SQL execution error: {e}")
         return pd.DataFrame()
 
 def get_data_breach_disclosures(company_id):
@@ -52,40 +58,120 @@ def get_company_info(company_id=None):
         return execute_query(query)
 
 def fetch_stock_and_dow_jones_data(company_id, dates):
+    """
+    Check which dates have both stock and Dow Jones data, using a single query for all dates.
+    Returns a dict mapping each 'YYYY-MM-DD' date to True or False.
+    """
+    if not isinstance(dates, list):
+        dates = [dates]
+
+    available_dates = get_next_available_dates(company_id, dates, max_days=0)
+    return {date_str: available_date is not None for date_str, available_date in available_dates.items()}
+
+def get_next_available_dates(company_id, dates, max_days=7):
+    """
+    Resolve every date to the first date on or after it, within max_days, that has both
+    stock and Dow Jones data, using a single query for all dates.
+    Returns a dict mapping each 'YYYY-MM-DD' date to the resolved 'YYYY-MM-DD' date, or None.
+    """
     if not isinstance(dates, list):
         dates = [dates]
+    if not dates:
+        return {}
+
+    requested = [pd.Timestamp(date) for date in dates]
+    if price_cache.covers(company_id, max(requested) + timedelta(days=max_days)):
+        return price_cache.get_next_available_dates(company_id, requested, max_days)
+
+    query, params = build_next_available_dates_query(company_id, requested, max_days)
+    results = execute_query(query, params)
+
+    available_dates = {db_utils.format_date_param(date): None for date in requested}
+    for _, row in results.iterrows():
+        if pd.notna(row['Available Date']):
+            requested_key = db_utils.format_date_param(pd.Timestamp(row['Requested Date']))
+            available_dates[requested_key] = db_utils.format_date_param(pd.Timestamp(row['Available Date']))
+    return available_dates
+
+def get_next_available_stock_data(company_id, dates, max_days=7):
+    """
+    Fetch the stock and Dow Jones data for the first available date on or after each
+    requested date, within max_days, in a single query.
+    The 'Requested Date' column maps each row back to the date it resolves.
+    """
+    if not isinstance(dates, list):
+        dates = [dates]
+    if not dates:
+        return empty_price_frame(['Requested Date'] + STOCK_DATA_COLUMNS)
+
+    if price_cache.covers(company_id, max(pd.Timestamp(date) for date in dates) + timedelta(days=max_days)):
+        return price_cache.get_next_available_stock_data(company_id, dates, max_days)
 
-    results_dict = {}
-    for date in dates:
-        formatted_date = date.strftime('%Y-%m-%d')
-        sql = f"""
-            SELECT x.Date, COUNT(x.Date) > 0 AS HasStockData
-            FROM stock_data x
-            LEFT JOIN dow_jones y ON y.Date = x.Date
-            WHERE x.CompanyID = {company_id} AND x.Date = '{formatted_date}'
-            GROUP BY x.Date;
-        """
-        df = execute_query(sql)
-        if df.empty:
-            results_dict[formatted_date] = False
-        else:
-            has_data = df.iloc[0]['HasStockData']
-            results_dict[formatted_date] = bool(has_data)
-
-    return results_dict
+    query, params = build_next_available_stock_data_query(company_id, dates, max_days)
+    results = execute_query(query, params)
+    if results.empty:
+        return empty_price_frame(['Requested Date'] + STOCK_DATA_COLUMNS)
+    return db_utils.apply_price_schema(results)
+
+def build_next_available_dates_query(company_id, dates, max_days=7):
+    """
+    Build the query resolving each date to its first date with stock and Dow Jones data.
+    """
+    date_rows = [(pd.Timestamp(date), pd.Timestamp(date) + timedelta(days=max_days)) for date in dates]
+    date_table, params = db_utils.build_date_table(date_rows, ['RequestedDate', 'EndDate'])
+
+    query = f"""
+        SELECT e.RequestedDate AS 'Requested Date', MIN(y.Date) AS 'Available Date'
+        FROM {date_table} e
+        LEFT JOIN stock_data x ON x.CompanyID = %s AND x.Date BETWEEN e.RequestedDate AND e.EndDate
+        LEFT JOIN dow_jones y ON y.Date = x.Date
+        GROUP BY e.RequestedDate;
+    """
+    return query, params + [company_id]
+
+def build_next_available_stock_data_query(company_id, dates, max_days=7):
+    """
+    Build the query fetching the stock and Dow Jones rows for the first available date of each date.
+    """
+    date_rows = [(pd.Timestamp(date), pd.Timestamp(date) + timedelta(days=max_days)) for date in dates]
+    date_table, params = db_utils.build_date_table(date_rows, ['RequestedDate', 'EndDate'])
+
+    query = f"""
+        SELECT r.RequestedDate AS 'Requested Date',
+            x.Date,
+            x.Open AS 'Stock Open',
+            x.Close AS 'Stock Close',
+            x.Volume AS 'Stock Volume',
+            y.Open AS 'Dow Jones Open',
+            y.Close AS 'Dow Jones Close',
+            y.Volume AS 'Dow Jones Volume'
+        FROM (
+            SELECT e.RequestedDate, MIN(y.Date) AS AvailableDate
+            FROM {date_table} e
+            JOIN stock_data x ON x.CompanyID = %s AND x.Date BETWEEN e.RequestedDate AND e.EndDate
+            JOIN dow_jones y ON y.Date = x.Date
+            GROUP BY e.RequestedDate
+        ) r
+        JOIN stock_data x ON x.CompanyID = %s AND x.Date = r.AvailableDate
+        JOIN dow_jones y ON y.Date = x.Date
+        ORDER BY r.RequestedDate;
+    """
+    return query, params + [company_id, company_id]
 
 def get_stock_data_with_disclosure_dates(company_id, disclosure_date):
     """
     Fetch detailed stock and Dow Jones data for a specific date, ensuring date handling is robust.
     """
     # Format the date for the query
-    formatted_date = db_utils.format_date_for_query(disclosure_date)
+    formatted_date = db_utils.format_date_param(disclosure_date)
     if formatted_date is None:
-        print(f"Invalid date format for: {disclosure_date}")
-        return pd.DataFrame(columns=['Date', 'Stock Open', 'Stock Close', 'Stock Volume',
-                                     'Dow Jones Open', 'Dow Jones Close', 'Dow Jones Volume'])
+        logger.warning(f"Invalid date format for: {disclosure_date}")
+        return empty_price_frame()
 
-    query = f"""
+    if price_cache.covers(company_id, formatted_date):
+        return price_cache.get_range(company_id, formatted_date, formatted_date)
+
+    query = """
         SELECT x.Date,
             x.Open AS 'Stock Open',
             x.Close AS 'Stock Close',
@@ -95,9 +181,148 @@ def get_stock_data_with_disclosure_dates(company_id, disclosure_date):
             y.Volume AS 'Dow Jones Volume'
         FROM stock_data x
         JOIN dow_jones y ON y.Date = x.Date
-        WHERE x.CompanyID = {company_id} AND x.Date = {formatted_date}
+        WHERE x.CompanyID = %s AND x.Date = %s
         ORDER BY x.Date;
     """
-    
-    results = execute_query(query)
-    return results
+
+    results = execute_query(query, (company_id, formatted_date))
+    if results.empty:
+        return empty_price_frame()
+    return db_utils.apply_price_schema(results)
+
+def get_stock_data_for_event_windows(company_id, disclosure_dates, window=7):
+    """
+    Fetch stock and Dow Jones data for the windows of +/- window days around every
+    disclosure date of a company in a single query.
+    Returns a dict mapping each 'YYYY-MM-DD' disclosure date to its window DataFrame.
+    """
+    if not isinstance(disclosure_dates, list):
+        disclosure_dates = [disclosure_dates]
+    if not disclosure_dates:
+        return {}
+
+    events = [pd.Timestamp(date) for date in disclosure_dates]
+    event_ranges = [(date, date - timedelta(days=window), date + timedelta(days=window)) for date in events]
+    return get_stock_data_for_date_ranges(company_id, event_ranges)
+
+def get_stock_data_for_date_ranges(company_id, event_ranges):
+    """
+    Fetch stock and Dow Jones data for a list of (event date, start date, end date) ranges
+    of a company in a single query.
+    Returns a dict mapping each 'YYYY-MM-DD' event date to its window DataFrame.
+    """
+    if not event_ranges:
+        return {}
+
+    event_ranges = [tuple(pd.Timestamp(date) for date in event_range) for event_range in event_ranges]
+    if price_cache.covers(company_id, max(end_date for _, _, end_date in event_ranges)):
+        return price_cache.get_date_ranges(company_id, event_ranges)
+
+    query, params = build_event_windows_query(company_id, event_ranges)
+    results = execute_query(query, params)
+    return split_event_windows(results, [event_date for event_date, _, _ in event_ranges])
+
+def build_event_windows_query(company_id, event_ranges):
+    """
+    Build the query fetching the stock and Dow Jones rows of every (event date, start date, end date) range.
+    """
+    event_table, params = db_utils.build_date_table(event_ranges, ['EventDate', 'StartDate', 'EndDate'])
+
+    query = f"""
+        SELECT e.EventDate AS 'Event Date',
+            x.Date,
+            x.Open AS 'Stock Open',
+            x.Close AS 'Stock Close',
+            x.Volume AS 'Stock Volume',
+            y.Open AS 'Dow Jones Open',
+            y.Close AS 'Dow Jones Close',
+            y.Volume AS 'Dow Jones Volume'
+        FROM {event_table} e
+        JOIN stock_data x ON x.Date BETWEEN e.StartDate AND e.EndDate
+        JOIN dow_jones y ON y.Date = x.Date
+        WHERE x.CompanyID = %s
+        ORDER BY e.EventDate, x.Date;
+    """
+    return query, params + [company_id]
+
+def split_event_windows(results, disclosure_dates):
+    """
+    Split a combined result set with an 'Event Date' column into one DataFrame per disclosure date.
+    Dates without any rows get an empty DataFrame.
+    """
+    windows = {db_utils.format_date_param(date): empty_price_frame() for date in disclosure_dates}
+    if results.empty:
+        return windows
+
+    # Cast the combined result set once rather than every window
+    results = db_utils.apply_price_schema(results)
+    event_keys = pd.to_datetime(results['Event Date']).dt.strftime('%Y-%m-%d')
+    for event_key, frame in results.drop(columns=['Event Date']).groupby(event_keys, sort=False):
+        windows[event_key] = frame.reset_index(drop=True)
+    return windows
+
+def get_stock_history(company_id, since=None):
+    """
+    Fetch the stock price history of a company after the since date (the full history when None), ordered by date.
+    """
+    if price_cache.is_enabled() and price_cache.ensure_synced(company_id):
+        history = price_cache.get_stock_history(company_id)
+        if since is not None:
+            history = history[history['Date'] > pd.Timestamp(since)].reset_index(drop=True)
+        return history
+
+    query = """
+        SELECT Date, Open AS 'Stock Open', Close AS 'Stock Close', Volume AS 'Stock Volume'
+        FROM stock_data
+        WHERE CompanyID = %s AND Date > %s
+        ORDER BY Date;
+    """
+    since = db_utils.format_date_param(since) if since is not None else '0001-01-01'
+    results = execute_query(query, (company_id, since))
+    if results.empty:
+        return empty_price_frame(['Date', 'Stock Open', 'Stock Close', 'Stock Volume'])
+    return db_utils.apply_price_schema(results)
+
+def get_trading_dates(since=None):
+    """
+    Fetch the Dow Jones trading dates after the since date (all dates when None), ordered by date.
+    """
+    if price_cache.is_enabled() and price_cache.ensure_synced(None):
+        dates = price_cache.get_dow_jones_history()['Date']
+        if since is not None:
+            dates = dates[dates > pd.Timestamp(since)]
+        return dates.sort_values().tolist()
+
+    query = """
+        SELECT Date
+        FROM dow_jones
+        WHERE Date > %s
+        ORDER BY Date;
+    """
+    since = db_utils.format_date_param(since) if since is not None else '0001-01-01'
+    results = execute_query(query, (since,))
+    if results.empty:
+        return []
+    return pd.to_datetime(results['Date']).tolist()
+
+def get_dow_jones_history(since=None):
+    """
+    Fetch the Dow Jones history after the since date (the full history when None), ordered by date.
+    """
+    if price_cache.is_enabled() and price_cache.ensure_synced(None):
+        history = price_cache.get_dow_jones_history()
+        if since is not None:
+            history = history[history['Date'] > pd.Timestamp(since)].reset_index(drop=True)
+        return history
+
+    query = """
+        SELECT Date, Open AS 'Dow Jones Open', Close AS 'Dow Jones Close', Volume AS 'Dow Jones Volume'
+        FROM dow_jones
+        WHERE Date > %s
+        ORDER BY Date;
+    """
+    since = db_utils.format_date_param(since) if since is not None else '0001-01-01'
+    results = execute_query(query, (since,))
+    if results.empty:
+        return empty_price_frame(['Date', 'Dow Jones Open', 'Dow Jones Close', 'Dow Jones Volume'])
+    return db_utils.apply_price_schema(results)
@@ -0,0 +1,201 @@
+# database/db_ingest.py
+
+import argparse
+import csv
+import os
+import sys
+import time
+from datetime import datetime
+
+from . import db_config, db_conn_err, db_functions, price_cache, price_stats
+from utils import app_utils
+from utils.setup_logging import setup_logger
+
+logger = setup_logger('database', log_file='database.log')
+
+BATCH_SIZE = 5000
+DATE_FORMATS = ['%Y-%m-%d', '%m/%d/%Y', '%m-%d-%Y', '%b %d, %Y', '%d-%b-%Y']
+
+# Header aliases of the supported CSV exports (Yahoo Finance, Investing.com, Nasdaq), keyed by table column
+STOCK_COLUMNS = {
+    'Date': ['Date'],
+    'Open': ['Open'],
+    'High': ['High'],
+    'Low': ['Low'],
+    'Close': ['Close', 'Close/Last', 'Price'],
+    'AdjClose': ['Adj Close', 'AdjClose', 'Adj. Close'],
+    'Volume': ['Volume', 'Vol.'],
+}
+DOW_JONES_COLUMNS = {
+    'Date': ['Date'],
+    'Price': ['Price', 'Close', 'Close/Last'],
+    'Open': ['Open'],
+    'Close': ['Close', 'Close/Last', 'Price'],
+    'High': ['High'],
+    'Low': ['Low'],
+    'Volume': ['Volume', 'Vol.'],
+    'Change_Percent': ['Change %', 'Change_Percent', 'Change'],
+}
+
+def parse_date(value, date_formats=DATE_FORMATS):
+    """
+    Parse a date in any of the supported formats into 'YYYY-MM-DD'.
+    """
+    value = value.strip().strip('"')
+    for date_format in date_formats:
+        try:
+            return datetime.strptime(value, date_format).strftime('%Y-%m-%d')
+        except ValueError:
+            continue
+    raise ValueError(f"Unrecognized date: {value}")
+
+def parse_decimal(value):
+    """
+    Parse a price or percentage such as '25,010.50', '$10.25' or '0.55%'; empty values become None.
+    """
+    if value is None:
+        return None
+    value = value.strip().replace(',', '').replace('$', '').rstrip('%')
+    if value in ('', '-', 'null', 'N/A'):
+        return None
+    return float(value)
+
+def parse_volume(value):
+    """
+    Parse a volume such as '350.2M' or '1,234,567' into an integer number of shares.
+    """
+    if value is None:
+        return None
+    volume = app_utils.convert_volume(value)
+    return None if volume != volume else int(round(volume))
+
+def resolve_columns(header, column_aliases):
+    """
+    Map each table column to its position in the CSV header.
+    """
+    positions = {name.strip().strip('﻿').strip('"'): position for position, name in enumerate(header)}
+    columns = {}
+    for column, aliases in column_aliases.items():
+        for alias in aliases:
+            if alias in positions:
+                columns[column] = positions[alias]
+                break
+    if 'Date' not in columns:
+        raise ValueError(f"CSV header has no Date column: {header}")
+    return columns
+
+def read_price_rows(path, column_aliases, key_values=()):
+    """
+    Stream normalized rows from a CSV price file, one tuple per line, in the order of column_aliases.
+    key_values are prepended to every row (e.g. the CompanyID).
+    """
+    with open(path, newline='', encoding='utf-8') as price_file:
+        reader = csv.reader(price_file)
+        columns = resolve_columns(next(reader), column_aliases)
+        for line in reader:
+            if not line or not line[columns['Date']].strip():
+                continue
+            row = list(key_values)
+            for column in column_aliases:
+                position = columns.get(column)
+                value = line[position] if position is not None and position < len(line) else None
+                if column == 'Date':
+                    row.append(parse_date(value))
+                elif column == 'Volume':
+                    row.append(parse_volume(value))
+                else:
+                    row.append(parse_decimal(value))
+            yield tuple(row)
+
+def batches(rows, key_length, batch_size=BATCH_SIZE):
+    """
+    Group rows into batches, keeping only the last row for each key within a batch.
+    """
+    batch = {}
+    for row in rows:
+        batch[row[:key_length]] = row
+        if len(batch) >= batch_size:
+            yield list(batch.values())
+            batch = {}
+    if batch:
+        yield list(batch.values())
+
+def load_rows(table, columns, key_columns, rows, batch_size=BATCH_SIZE):
+    """
+    Bulk-load rows into a table in batches. Existing rows with the same key are replaced,
+    so reloading a file never creates duplicates.
+    Returns the number of rows loaded and the earliest date loaded.
+    """
+    insert_sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))});"
+    loaded = 0
+    first_date = None
+    with db_functions.db_instance as db:
+        for batch in batches(rows, len(key_columns), batch_size):
+            # Delete the batch's keys first, keyed on the leading key columns and the date
+            fixed_keys = key_columns[:-1]
+            dates = [row[len(key_columns) - 1] for row in batch]
+            conditions = [f"{column} = %s" for column in fixed_keys]
+            conditions.append(f"{key_columns[-1]} IN ({', '.join(['%s'] * len(dates))})")
+            delete_sql = f"DELETE FROM {table} WHERE {' AND '.join(conditions)};"
+
+            db.execute_query(delete_sql, list(batch[0][:len(fixed_keys)]) + dates, commit=False)
+            db.execute_many(insert_sql, batch)
+            loaded += len(batch)
+            first_date = min([first_date] + dates if first_date else dates)
+    return loaded, first_date
+
+def ingest_stock_file(path, company_id, batch_size=BATCH_SIZE):
+    rows = read_price_rows(path, STOCK_COLUMNS, key_values=(company_id,))
+    loaded, first_date = load_rows('stock_data', ['CompanyID'] + list(STOCK_COLUMNS), ['CompanyID', 'Date'], rows, batch_size)
+    price_cache.invalidate(company_id)
+    if first_date is not None:
+        # Appended days are picked up by the next update; reloaded days require a rebuild
+        price_stats.invalidate(company_id, first_date)
+    return loaded
+
+def ingest_dow_jones_file(path, batch_size=BATCH_SIZE):
+    rows = read_price_rows(path, DOW_JONES_COLUMNS)
+    loaded, first_date = load_rows('dow_jones', list(DOW_JONES_COLUMNS), ['Date'], rows, batch_size)
+    price_cache.invalidate(None)
+    if first_date is not None:
+        price_stats.invalidate(None, first_date)
+    if os.path.exists(db_config.TRADING_CALENDAR_PATH):
+        os.remove(db_config.TRADING_CALENDAR_PATH)
+    return loaded
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk-load daily price CSV files")
+    subparsers = parser.add_subparsers(dest='table', required=True)
+    stock_parser = subparsers.add_parser('stock', help="Load stock prices for one company")
+    stock_parser.add_argument('--company-id', type=int, required=True)
+    stock_parser.add_argument('files', nargs='+')
+    dow_parser = subparsers.add_parser('dow-jones', help="Load Dow Jones index prices")
+    dow_parser.add_argument('files', nargs='+')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    total_rows = 0
+    total_start = time.time()
+    for path in args.files:
+        start_time = time.time()
+        try:
+            if args.table == 'stock':
+                loaded = ingest_stock_file(path, args.company_id, args.batch_size)
+            else:
+                loaded = ingest_dow_jones_file(path, args.batch_size)
+        except (ValueError, OSError, db_conn_err.DatabaseConnectionError) as e:
+            print(f"Failed to load {path}: {e}")
+            logger.error(f"Failed to load {path}: {e}")
+            return 1
+
+        elapsed = max(time.time() - start_time, 1e-9)
+        print(f"Loaded {loaded} rows from {path} in {elapsed:.2f} seconds ({loaded / elapsed:,.0f} rows/sec)")
+        logger.info(f"Loaded {loaded} rows from {path} into {args.table} in {elapsed:.2f} seconds")
+        total_rows += loaded
+
+    elapsed = max(time.time() - total_start, 1e-9)
+    print(f"Total: {total_rows} rows in {elapsed:.2f} seconds ({total_rows / elapsed:,.0f} rows/sec)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
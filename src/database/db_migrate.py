@@ -0,0 +1,230 @@
+# database/db_migrate.py
+
+import argparse
+import os
+import re
+import sys
+from datetime import datetime
+
+import pandas as pd
+
+from . import db_config, db_functions, db_conn_err
+from utils.setup_logging import setup_logger
+
+logger = setup_logger('database', log_file='database.log')
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'sql', 'migrations')
+MIGRATION_FILE_PATTERN = re.compile(r'^(\d+)_(\w+)\.sql$')
+
+# Tables whose lookups must be served by an index; derived tables are expected to be scanned
+INDEXED_TABLES = {'stock_data', 'dow_jones', 'company_info', 'data_breach_disclosures'}
+
+def load_migrations(migrations_dir=MIGRATIONS_DIR):
+    """
+    Load the versioned migration files, ordered by version number.
+    Returns a list of (version, name, path) tuples.
+    """
+    migrations = []
+    for file_name in os.listdir(migrations_dir):
+        match = MIGRATION_FILE_PATTERN.match(file_name)
+        if match:
+            migrations.append((int(match.group(1)), match.group(2), os.path.join(migrations_dir, file_name)))
+    return sorted(migrations)
+
+def split_statements(sql_text):
+    """
+    Split a migration file into individual statements, dropping comment lines.
+    """
+    lines = [line for line in sql_text.splitlines() if not line.strip().startswith('--')]
+    return [statement.strip() for statement in '\n'.join(lines).split(';') if statement.strip()]
+
+def ensure_version_table(db):
+    """
+    Create the schema_version table, and the schema_migration_steps table that records the
+    statements of a migration that were applied before it failed, if they do not exist yet.
+    """
+    db.execute_query("""
+        CREATE TABLE IF NOT EXISTS `schema_version` (
+          `Version` int(11) NOT NULL,
+          `Name` varchar(255) NOT NULL,
+          `AppliedAt` datetime NOT NULL,
+          PRIMARY KEY (`Version`)
+        );
+    """)
+    db.execute_query("""
+        CREATE TABLE IF NOT EXISTS `schema_migration_steps` (
+          `Version` int(11) NOT NULL,
+          `Step` int(11) NOT NULL,
+          `AppliedAt` datetime NOT NULL,
+          PRIMARY KEY (`Version`, `Step`)
+        );
+    """)
+
+def get_schema_version(db):
+    """
+    Return the highest applied schema version, or 0 for the baseline schema.
+    """
+    ensure_version_table(db)
+    rows = db.fetch_query_results("SELECT COALESCE(MAX(Version), 0) FROM schema_version;")
+    return int(rows[0][0]) if rows else 0
+
+def get_applied_steps(db, version):
+    """
+    Return the numbers of the statements of a migration that were already applied.
+    """
+    rows = db.fetch_query_results("SELECT Step FROM schema_migration_steps WHERE Version = %s;", (version,))
+    return {int(row[0]) for row in rows or []}
+
+def apply_migrations(target_version=None):
+    """
+    Apply every migration newer than the recorded schema version, up to target_version,
+    stopping at the first failure. MySQL commits every DDL statement on its own, so each statement
+    is recorded as it succeeds and a rerun resumes a half-applied migration after its last
+    applied statement. A migration's version is recorded once all of its statements succeed.
+    Returns the versions applied.
+    """
+    applied = []
+    with db_functions.db_instance as db:
+        current_version = get_schema_version(db)
+        for version, name, path in load_migrations():
+            if version <= current_version or (target_version is not None and version > target_version):
+                continue
+
+            print(f"Applying migration {version:03d}: {name}")
+            with open(path, encoding='utf-8') as migration_file:
+                statements = split_statements(migration_file.read())
+
+            applied_steps = get_applied_steps(db, version)
+            if applied_steps:
+                print(f" Resuming after {len(applied_steps)} statement(s) applied by an earlier run")
+            try:
+                for step, statement in enumerate(statements, start=1):
+                    if step in applied_steps:
+                        continue
+                    db.execute_query(statement)
+                    db.execute_query(
+                        "INSERT INTO schema_migration_steps (Version, Step, AppliedAt) VALUES (%s, %s, %s);",
+                        (version, step, datetime.now())
+                    )
+            except db_conn_err.DatabaseConnectionError as e:
+                logger.error(f"Migration {version:03d} ({name}) failed at statement {step}: {e}")
+                print(f"Migration {version:03d} failed at statement {step}: {e}")
+                break
+
+            db.execute_query(
+                "INSERT INTO schema_version (Version, Name, AppliedAt) VALUES (%s, %s, %s);",
+                (version, name, datetime.now())
+            )
+            db.execute_query("DELETE FROM schema_migration_steps WHERE Version = %s;", (version,))
+            logger.info(f"Applied migration {version:03d} ({name})")
+            applied.append(version)
+
+    return applied
+
+def migration_status():
+    """
+    Return the current schema version and the migrations still pending.
+    """
+    with db_functions.db_instance as db:
+        current_version = get_schema_version(db)
+    pending = [(version, name) for version, name, _ in load_migrations() if version > current_version]
+    return current_version, pending
+
+def get_sample_event():
+    """
+    Pick a real company and disclosure date to use as parameters for the query plans.
+    """
+    disclosures = db_functions.execute_query(
+        "SELECT CompanyID, DisclosureDate FROM data_breach_disclosures ORDER BY DisclosureID LIMIT 1;"
+    )
+    if disclosures.empty:
+        return 1, pd.Timestamp.today().normalize()
+    return int(disclosures.iloc[0]['CompanyID']), pd.Timestamp(disclosures.iloc[0]['DisclosureDate'])
+
+def get_hot_queries():
+    """
+    Build the hot db_functions queries with sample parameters.
+    Returns a list of (name, query, params) tuples.
+    """
+    company_id, event_date = get_sample_event()
+    event_dates = [event_date, event_date + pd.Timedelta(days=30)]
+    event_ranges = [(date, date - pd.Timedelta(days=7), date + pd.Timedelta(days=7)) for date in event_dates]
+
+    queries = [
+        ('event windows', *db_functions.build_event_windows_query(company_id, event_ranges)),
+        ('next available dates', *db_functions.build_next_available_dates_query(company_id, event_dates)),
+        ('next available stock data', *db_functions.build_next_available_stock_data_query(company_id, event_dates)),
+        ('disclosure dates', """
+            SELECT DisclosureDate AS 'Disclosure Date'
+            FROM data_breach_disclosures
+            WHERE CompanyID = %s
+            ORDER BY DisclosureDate ASC;
+        """, [company_id]),
+    ]
+    return queries
+
+def explain_hot_queries():
+    """
+    Run EXPLAIN on the hot queries and report which base-table accesses do not use an index.
+    Returns a list of (query name, table, access type) tuples for every full scan found.
+    """
+    full_scans = []
+    for name, query, params in get_hot_queries():
+        plan = db_functions.execute_query("EXPLAIN " + query.strip().rstrip(';'), params)
+        if plan.empty:
+            print(f"Could not EXPLAIN query: {name}")
+            full_scans.append((name, None, None))
+            continue
+
+        print(f"\nQuery plan for {name}:")
+        print(plan[['table', 'type', 'possible_keys', 'key', 'rows']].to_string(index=False))
+
+        for _, step in plan.iterrows():
+            table = step['table']
+            if table in INDEXED_TABLES or table in ('x', 'y'):
+                if step['key'] is None or pd.isna(step['key']):
+                    full_scans.append((name, table, step['type']))
+
+    return full_scans
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Strasbourg database schema migrations")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('status', help="Show the applied schema version and pending migrations")
+    migrate_parser = subparsers.add_parser('migrate', help="Apply pending migrations")
+    migrate_parser.add_argument('--target', type=int, default=None, help="Stop after this schema version")
+    subparsers.add_parser('explain', help="Check that the hot queries use indexes (exit code 1 on full scans)")
+    args = parser.parse_args(argv)
+
+    if db_config.DB_BACKEND != 'mysql':
+        print(f"Migrations apply to the MySQL backend only; the {db_config.DB_BACKEND} backend is created with its keys.")
+        return 1
+
+    if args.command == 'status':
+        current_version, pending = migration_status()
+        print(f"Schema version: {current_version}")
+        for version, name in pending:
+            print(f" Pending: {version:03d} {name}")
+        return 0
+
+    if args.command == 'migrate':
+        _, pending = migration_status()
+        pending = [version for version, _ in pending if args.target is None or version <= args.target]
+        applied = apply_migrations(args.target)
+        print(f"Applied {len(applied)} migration(s).")
+        if len(applied) < len(pending):
+            print(f"{len(pending) - len(applied)} migration(s) not applied; fix the error and run migrate again.")
+            return 1
+        return 0
+
+    full_scans = explain_hot_queries()
+    if full_scans:
+        print("\nQueries not using an index:")
+        for name, table, access_type in full_scans:
+            print(f" {name}: table {table} ({access_type})")
+        return 1
+    print("\nAll hot queries use indexes.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,25 @@
-from datetime import datetime
+from datetime import datetime, date as date_type
+
+import pandas as pd
+
+from utils.setup_logging import setup_logger
+
+logger = setup_logger('database', log_file='database.log')
+
+VOLUME_SUFFIXES = {'': 1.0, 'K': 1e3, 'M': 1e6, 'B': 1e9}
+VOLUME_PATTERN = r'^([-+]?(?:\d+\.?\d*|\.\d+)(?:E[-+]?\d+)?)([KMB]?)$'
+
+# Column types of every price frame returned by the fetch functions
+PRICE_SCHEMA = {
+    'Requested Date': 'datetime64[ns]',
+    'Date': 'datetime64[ns]',
+    'Stock Open': 'float64',
+    'Stock Close': 'float64',
+    'Stock Volume': 'Int64',
+    'Dow Jones Open': 'float64',
+    'Dow Jones Close': 'float64',
+    'Dow Jones Volume': 'Int64'
+}
 
 def parse_date(date_str):
     """
@@ -7,7 +28,7 @@ def parse_date(date_str):
     try:
         return datetime.strptime(date_str, '%Y-%m-%d')
     except ValueError:
-        print(f"Invalid date format: {date_str}")
+        logger.warning(f"Invalid date format: {date_str}")
         return None
 
 def format_date_for_query(date):
@@ -23,5 +44,66 @@ def format_date_for_query(date):
         else:
             return None
     else:
-        print(f"Unrecognized date type: {date}")
+        logger.warning(f"Unrecognized date type: {date}")
+        return None
+
+
+def format_date_param(date):
+    """
+    Format a date-like value as a 'YYYY-MM-DD' string for use as a query parameter.
+    """
+    if isinstance(date, (datetime, date_type)):
+        return date.strftime('%Y-%m-%d')
+    elif isinstance(date, str):
+        date_obj = parse_date(date)
+        if date_obj:
+            return date_obj.strftime('%Y-%m-%d')
+        return None
+    else:
+        logger.warning(f"Unrecognized date type: {date}")
         return None
+
+def build_date_table(rows, columns):
+    """
+    Build an inline derived table with one row per entry in rows, so that a whole
+    list of dates can be joined against in a single query.
+    Returns the SQL fragment and its flattened query parameters.
+    """
+    row_sql = "SELECT " + ", ".join(f"CAST(%s AS DATE) AS {column}" for column in columns)
+    sql = " UNION ALL ".join([row_sql] * len(rows))
+    params = [format_date_param(value) for row in rows for value in row]
+    return f"({sql})", params
+
+def parse_volumes(values):
+    """
+    Vectorized version of app_utils.convert_volume: parse plain numbers and numbers with a
+    'K', 'M' or 'B' suffix (thousands separators allowed) into a float64 Series.
+    Empty, '-' and other unparseable values become NaN.
+    """
+    values = values if isinstance(values, pd.Series) else pd.Series(values)
+    if pd.api.types.is_numeric_dtype(values.dtype):
+        return values.astype('float64')
+
+    text = values.astype('string').str.strip().str.replace(',', '', regex=False).str.upper()
+    parts = text.str.extract(VOLUME_PATTERN)
+    numbers = pd.to_numeric(parts[0], errors='coerce').astype('float64')
+    multipliers = parts[1].map(VOLUME_SUFFIXES).astype('float64')
+    return numbers * multipliers
+
+def apply_price_schema(frame):
+    """
+    Cast the columns of a price frame that appear in PRICE_SCHEMA to their schema type.
+    Volumes are parsed with parse_volumes and rounded to whole shares; columns that already
+    have the right type are left untouched, so applying the schema twice costs nothing.
+    """
+    converted = {}
+    for column, dtype in PRICE_SCHEMA.items():
+        if column not in frame.columns or frame[column].dtype == dtype:
+            continue
+        if column.endswith('Volume'):
+            converted[column] = parse_volumes(frame[column]).round().astype(dtype)
+        elif dtype.startswith('datetime64'):
+            converted[column] = pd.to_datetime(frame[column]).astype(dtype)
+        else:
+            converted[column] = pd.to_numeric(frame[column], errors='coerce').astype(dtype)
+    return frame.assign(**converted) if converted else frame
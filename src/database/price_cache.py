@@ -0,0 +1,277 @@
+# database/price_cache.py
+
+import argparse
+import os
+import sys
+import threading
+
+import numpy as np
+import pandas as pd
+
+from . import db_config, db_conn_err, db_functions, db_utils
+from utils.setup_logging import setup_logger
+
+logger = setup_logger('database', log_file='database.log')
+
+STOCK_COLUMNS = ['Date', 'Open', 'High', 'Low', 'Close', 'AdjClose', 'Volume']
+DOW_JONES_COLUMNS = ['Date', 'Open', 'Close', 'High', 'Low', 'Volume']
+PRICE_COLUMNS = ['Open', 'High', 'Low', 'Close', 'AdjClose']
+
+_lock = threading.RLock()
+_synced = set()
+_histories = {}
+
+def is_enabled():
+    """
+    Check whether the price cache is enabled and a Parquet engine is installed.
+    """
+    if not db_config.PRICE_CACHE_ENABLED:
+        return False
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+def get_cache_path(name):
+    return os.path.join(db_config.PRICE_CACHE_DIR, f"{name}.parquet")
+
+def stock_cache_name(company_id):
+    return f"stock_{int(company_id)}"
+
+def read_frame(name):
+    """
+    Read a cached table, returning None when it has not been cached yet.
+    """
+    path = get_cache_path(name)
+    if not os.path.exists(path):
+        return None
+    return pd.read_parquet(path)
+
+def write_frame(name, frame):
+    """
+    Write a cached table atomically so that an interrupted sync never leaves a partial file.
+    """
+    if not os.path.exists(db_config.PRICE_CACHE_DIR):
+        os.makedirs(db_config.PRICE_CACHE_DIR)
+    path = get_cache_path(name)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    frame.to_parquet(temp_path, index=False)
+    os.replace(temp_path, path)
+
+def invalidate(company_id=None):
+    """
+    Drop a cached table so that the next sync reloads it in full, for example after older rows
+    were backfilled. Pass None to drop the Dow Jones series.
+    """
+    name = 'dow_jones' if company_id is None else stock_cache_name(company_id)
+    with _lock:
+        path = get_cache_path(name)
+        if os.path.exists(path):
+            os.remove(path)
+        _synced.discard('dow_jones' if company_id is None else company_id)
+        if company_id is None:
+            _histories.clear()
+        else:
+            _histories.pop(company_id, None)
+
+def get_max_date(frame):
+    if frame is None or frame.empty:
+        return None
+    return frame['Date'].max()
+
+def apply_cache_schema(frame):
+    """
+    Cast the price columns of a cached table to float64 and Volume to Int64. Tables cached
+    before migration 002 hold Volume as strings like '350.2M', while newer rows come back as
+    BIGINT, so both sides are cast before they are combined.
+    """
+    converted = {column: pd.to_numeric(frame[column], errors='coerce').astype('float64')
+                 for column in PRICE_COLUMNS if column in frame.columns}
+    if 'Volume' in frame.columns:
+        converted['Volume'] = db_utils.parse_volumes(frame['Volume']).round().astype('Int64')
+    return frame.assign(**converted)
+
+def sync_table(name, query, params, columns):
+    """
+    Append the rows newer than the cached max Date to a cached table.
+    The query must select the given columns and take the cached max Date as its last parameter.
+    Returns the number of new rows.
+    """
+    cached = read_frame(name)
+    max_date = get_max_date(cached)
+    since = db_utils.format_date_param(max_date) if max_date is not None else '0001-01-01'
+
+    new_rows = db_functions.db_instance.fetch_dataframe(query, list(params) + [since])
+    if new_rows.empty:
+        return 0
+
+    new_rows = apply_cache_schema(new_rows[columns].copy())
+    combined = new_rows if cached is None else pd.concat([apply_cache_schema(cached), new_rows], ignore_index=True)
+    write_frame(name, combined)
+    logger.info(f"Price cache {name}: {len(new_rows)} new rows synced")
+    return len(new_rows)
+
+def sync_dow_jones():
+    query = """
+        SELECT Date, Open, Close, High, Low, Volume
+        FROM dow_jones
+        WHERE Date > %s
+        ORDER BY Date;
+    """
+    return sync_table('dow_jones', query, [], DOW_JONES_COLUMNS)
+
+def sync_company(company_id):
+    query = """
+        SELECT Date, Open, High, Low, Close, AdjClose, Volume
+        FROM stock_data
+        WHERE CompanyID = %s AND Date > %s
+        ORDER BY Date;
+    """
+    return sync_table(stock_cache_name(company_id), query, [company_id], STOCK_COLUMNS)
+
+def ensure_synced(company_id):
+    """
+    Sync the Dow Jones series and the company's prices once per process.
+    Pass None as company_id to sync only the Dow Jones series.
+    Returns True when the cache is known to match the database.
+    """
+    with _lock:
+        try:
+            if 'dow_jones' not in _synced:
+                sync_dow_jones()
+                _synced.add('dow_jones')
+                _histories.clear()
+            if company_id is not None and company_id not in _synced:
+                sync_company(company_id)
+                _synced.add(company_id)
+                _histories.pop(company_id, None)
+        except db_conn_err.DatabaseConnectionError as e:
+            logger.error(f"Price cache sync failed, serving cached rows only: {e}")
+            return False
+    return True
+
+def get_stock_history(company_id):
+    """
+    Return the company's cached Date, Stock Open, Stock Close and Stock Volume columns.
+    """
+    stock = read_frame(stock_cache_name(company_id))
+    if stock is None:
+        return db_functions.empty_price_frame(['Date', 'Stock Open', 'Stock Close', 'Stock Volume'])
+    return db_utils.apply_price_schema(stock[['Date', 'Open', 'Close', 'Volume']].rename(
+        columns={'Open': 'Stock Open', 'Close': 'Stock Close', 'Volume': 'Stock Volume'}))
+
+def get_dow_jones_history():
+    """
+    Return the cached Date, Dow Jones Open, Dow Jones Close and Dow Jones Volume columns.
+    """
+    dow_jones = read_frame('dow_jones')
+    if dow_jones is None:
+        return db_functions.empty_price_frame(['Date', 'Dow Jones Open', 'Dow Jones Close', 'Dow Jones Volume'])
+    return db_utils.apply_price_schema(dow_jones[['Date', 'Open', 'Close', 'Volume']].rename(
+        columns={'Open': 'Dow Jones Open', 'Close': 'Dow Jones Close', 'Volume': 'Dow Jones Volume'}))
+
+def get_price_history(company_id):
+    """
+    Return the company's cached price history joined with the Dow Jones series, and its
+    sorted dates as datetime64 values for binary search.
+    """
+    with _lock:
+        if company_id in _histories:
+            return _histories[company_id]
+
+        history = get_stock_history(company_id).merge(get_dow_jones_history(), on='Date', how='inner')
+        history = history.sort_values('Date', ignore_index=True)[db_functions.STOCK_DATA_COLUMNS]
+
+        dates = history['Date'].values
+        _histories[company_id] = (history, dates)
+        return history, dates
+
+def covers(company_id, end_date):
+    """
+    Check whether the cache can answer a query for the company up to end_date.
+    After a successful sync the cache matches the database; otherwise only cached dates
+    up to the cached max Date can be served, since historical prices never change.
+    """
+    if not is_enabled():
+        return False
+    if ensure_synced(company_id):
+        return True
+    history, dates = get_price_history(company_id)
+    return len(dates) > 0 and dates[-1] >= np.datetime64(pd.Timestamp(end_date), 'ns')
+
+def get_range(company_id, start_date, end_date):
+    """
+    Return the cached rows with start_date <= Date <= end_date.
+    """
+    history, dates = get_price_history(company_id)
+    start = np.searchsorted(dates, np.datetime64(pd.Timestamp(start_date), 'ns'), side='left')
+    end = np.searchsorted(dates, np.datetime64(pd.Timestamp(end_date), 'ns'), side='right')
+    return history.iloc[start:end].reset_index(drop=True)
+
+def get_next_available_dates(company_id, dates, max_days=7):
+    """
+    Resolve each date to the first cached date on or after it, within max_days.
+    Returns a dict mapping each 'YYYY-MM-DD' date to the resolved 'YYYY-MM-DD' date, or None.
+    """
+    history, history_dates = get_price_history(company_id)
+    requested = pd.to_datetime(pd.Series(dates)).values.astype('datetime64[ns]')
+    positions = np.searchsorted(history_dates, requested, side='left')
+
+    available_dates = {}
+    for date, position in zip(requested, positions):
+        date_str = pd.Timestamp(date).strftime('%Y-%m-%d')
+        if position < len(history_dates) and history_dates[position] <= date + np.timedelta64(max_days, 'D'):
+            available_dates[date_str] = pd.Timestamp(history_dates[position]).strftime('%Y-%m-%d')
+        else:
+            available_dates[date_str] = None
+    return available_dates
+
+def get_date_ranges(company_id, event_ranges):
+    """
+    Return the cached rows of each (event date, start date, end date) range.
+    Returns a dict mapping each 'YYYY-MM-DD' event date to its window DataFrame.
+    """
+    return {
+        pd.Timestamp(event_date).strftime('%Y-%m-%d'): get_range(company_id, start_date, end_date)
+        for event_date, start_date, end_date in event_ranges
+    }
+
+def get_next_available_stock_data(company_id, dates, max_days=7):
+    """
+    Return the cached rows for the first available date on or after each date, within max_days,
+    with a 'Requested Date' column mapping each row back to the date it resolves.
+    """
+    available_dates = get_next_available_dates(company_id, dates, max_days)
+    rows = []
+    for requested_date, available_date in sorted(available_dates.items()):
+        if available_date is not None:
+            row = get_range(company_id, available_date, available_date)
+            row.insert(0, 'Requested Date', requested_date)
+            rows.append(row)
+
+    if not rows:
+        return db_functions.empty_price_frame(['Requested Date'] + db_functions.STOCK_DATA_COLUMNS)
+    return db_utils.apply_price_schema(pd.concat(rows, ignore_index=True))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sync the local price cache with the database")
+    parser.add_argument('company_ids', nargs='*', type=int, help="Company IDs to sync (default: all companies)")
+    args = parser.parse_args(argv)
+
+    if not is_enabled():
+        print("The price cache is disabled or pyarrow is not installed.")
+        return 1
+
+    company_ids = args.company_ids
+    if not company_ids:
+        company_info = db_functions.get_company_info()
+        company_ids = company_info['ID'].astype(int).tolist() if not company_info.empty else []
+
+    print(f"Dow Jones: {sync_dow_jones()} new rows")
+    for company_id in company_ids:
+        print(f"Company ID {company_id}: {sync_company(company_id)} new rows")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,361 @@
+# database/price_stats.py
+
+import argparse
+import json
+import math
+import os
+import sys
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+from . import db_config, db_functions
+from utils.setup_logging import setup_logger
+
+logger = setup_logger('database', log_file='database.log')
+
+_lock = threading.RLock()
+_store = None
+_updated = set()
+
+@contextmanager
+def file_lock(path):
+    """
+    Hold an exclusive lock on path + '.lock' across processes, so that batch workers
+    read and write the statistics file one at a time.
+    """
+    lock_file = open(f"{path}.lock", 'a+')
+    try:
+        if os.name == 'nt':
+            import msvcrt
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        yield
+    finally:
+        # Closing the file releases the lock
+        lock_file.close()
+
+class RunningStats:
+    """
+    Welford accumulator of the count, mean and variance of every value added so far.
+    """
+    def __init__(self, count=0, mean=0.0, m2=0.0):
+        self.count = count
+        self.mean = mean
+        self.m2 = m2
+
+    def add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+    @property
+    def variance(self):
+        return self.m2 / (self.count - 1) if self.count > 1 else float('nan')
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance) if self.count > 1 else float('nan')
+
+    def to_dict(self):
+        return {'count': self.count, 'mean': self.mean, 'm2': self.m2}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['count'], data['mean'], data['m2'])
+
+class RollingStats(RunningStats):
+    """
+    Welford accumulator over the last window values; the oldest value is removed in O(1)
+    as each new one is added.
+    """
+    def __init__(self, window, values=()):
+        super().__init__()
+        self.window = window
+        self.values = deque()
+        for value in values:
+            self.add(value)
+
+    def add(self, value):
+        self.values.append(value)
+        super().add(value)
+        if len(self.values) > self.window:
+            self.remove(self.values.popleft())
+
+    def remove(self, value):
+        if self.count == 1:
+            self.count, self.mean, self.m2 = 0, 0.0, 0.0
+            return
+        delta = value - self.mean
+        self.count -= 1
+        self.mean -= delta / self.count
+        self.m2 = max(self.m2 - delta * (value - self.mean), 0.0)
+
+    def to_dict(self):
+        return {'window': self.window, 'values': list(self.values)}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['window'], data['values'])
+
+class SeriesStats:
+    """
+    All-time and rolling statistics of the daily change (Close - Open) and volume of one price series,
+    with the last date they include.
+    """
+    def __init__(self, rolling_window, last_date=None, change=None, volume=None, rolling_change=None, rolling_volume=None):
+        self.last_date = last_date
+        self.change = change or RunningStats()
+        self.volume = volume or RunningStats()
+        self.rolling_change = rolling_change or RollingStats(rolling_window)
+        self.rolling_volume = rolling_volume or RollingStats(rolling_window)
+
+    def update(self, history, open_column, close_column, volume_column):
+        """
+        Add the rows of a history frame that are newer than last_date. Returns the number of rows added.
+        """
+        if history.empty:
+            return 0
+        dates = history['Date']
+        if self.last_date is not None:
+            history = history[dates > pd.Timestamp(self.last_date)]
+            dates = dates[dates > pd.Timestamp(self.last_date)]
+        if history.empty:
+            return 0
+
+        changes = (history[close_column] - history[open_column]).to_numpy(float)
+        volumes = history[volume_column].to_numpy(float, na_value=np.nan)
+        for change, volume in zip(changes, volumes):
+            if not math.isnan(change):
+                self.change.add(change)
+                self.rolling_change.add(change)
+            if not math.isnan(volume):
+                self.volume.add(volume)
+                self.rolling_volume.add(volume)
+
+        self.last_date = dates.max().strftime('%Y-%m-%d')
+        return len(history)
+
+    def to_dict(self):
+        return {
+            'last_date': self.last_date,
+            'change': self.change.to_dict(),
+            'volume': self.volume.to_dict(),
+            'rolling_change': self.rolling_change.to_dict(),
+            'rolling_volume': self.rolling_volume.to_dict()
+        }
+
+    @classmethod
+    def from_dict(cls, data, rolling_window):
+        rolling_change = RollingStats.from_dict(data['rolling_change'])
+        rolling_volume = RollingStats.from_dict(data['rolling_volume'])
+        if rolling_change.window != rolling_window:
+            return None
+        return cls(rolling_window, data['last_date'], RunningStats.from_dict(data['change']),
+                   RunningStats.from_dict(data['volume']), rolling_change, rolling_volume)
+
+class PriceStatsStore:
+    """
+    Persisted online statistics of the Dow Jones series and of each company's stock prices.
+    Updating reads only the rows after each series' last date, so a nightly update costs O(1) per new row.
+    """
+    def __init__(self, path=None, rolling_window=None):
+        self.path = path or db_config.PRICE_STATS_PATH
+        self.rolling_window = rolling_window or db_config.PRICE_STATS_ROLLING_WINDOW
+        self.series = {}
+        # Series dropped or rebuilt since the last save, which replace the saved ones instead of merging with them
+        self.replaced = set()
+        self.load()
+
+    def read(self):
+        """
+        Return the series saved in the statistics file, keyed by name.
+        """
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, encoding='utf-8') as stats_file:
+                data = json.load(stats_file)
+        except (OSError, ValueError) as e:
+            logger.error(f"Could not read price statistics from {self.path}, rebuilding: {e}")
+            return {}
+        saved = {}
+        for name, series_data in data.items():
+            series = SeriesStats.from_dict(series_data, self.rolling_window)
+            if series is not None:
+                saved[name] = series
+        return saved
+
+    def load(self):
+        self.series.update(self.read())
+
+    def merge(self, saved):
+        """
+        Merge the saved series into this store: a saved series is taken when this store has not
+        replaced it and it includes later rows than this store's copy.
+        """
+        for name, series in saved.items():
+            if name in self.replaced:
+                continue
+            current = self.series.get(name)
+            if (current is None or current.last_date is None
+                    or (series.last_date is not None and pd.Timestamp(series.last_date) > pd.Timestamp(current.last_date))):
+                self.series[name] = series
+
+    def save(self):
+        """
+        Merge the statistics with the ones other processes saved meanwhile and write them atomically,
+        under a file lock, so that parallel updates of different companies are all kept and an
+        interrupted update never leaves a partial file.
+        """
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+        with file_lock(self.path):
+            self.merge(self.read())
+            temp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as stats_file:
+                json.dump({name: series.to_dict() for name, series in self.series.items()}, stats_file)
+            os.replace(temp_path, self.path)
+        self.replaced.clear()
+
+    def get_series(self, name):
+        if name not in self.series:
+            self.series[name] = SeriesStats(self.rolling_window)
+        return self.series[name]
+
+    def update_dow_jones(self):
+        series = self.get_series('dow_jones')
+        history = db_functions.get_dow_jones_history(series.last_date)
+        return series.update(history, 'Dow Jones Open', 'Dow Jones Close', 'Dow Jones Volume')
+
+    def update_company(self, company_id):
+        series = self.get_series(str(int(company_id)))
+        history = db_functions.get_stock_history(company_id, series.last_date)
+        return series.update(history, 'Stock Open', 'Stock Close', 'Stock Volume')
+
+    def invalidate(self, company_id=None, since=None):
+        """
+        Drop a series so that the next update rebuilds it, for example after rows on or before its
+        last date were reloaded. Pass None as company_id for the Dow Jones series. When since is given,
+        the series is only dropped if it already includes that date.
+        """
+        name = 'dow_jones' if company_id is None else str(int(company_id))
+        series = self.series.get(name)
+        if series is None:
+            if since is None:
+                self.replaced.add(name)
+            return
+        if since is None or series.last_date is None or pd.Timestamp(since) <= pd.Timestamp(series.last_date):
+            del self.series[name]
+            self.replaced.add(name)
+
+    def clear(self):
+        """
+        Drop every series so that the next update recomputes them from the full history.
+        """
+        self.replaced.update(self.series)
+        self.series.clear()
+
+    def get_company_stats(self, company_id):
+        """
+        Return the current statistics of a company and of the Dow Jones series, keyed like
+        static_analysis_utils.additional_insights and summarize_findings.
+        """
+        stock = self.get_series(str(int(company_id)))
+        dow_jones = self.get_series('dow_jones')
+        return {
+            'company_id': company_id,
+            'last_date': stock.last_date,
+            'observations': stock.change.count,
+            'stock_price_change_mean': stock.change.mean if stock.change.count else float('nan'),
+            'stock_price_volatility': stock.change.std,
+            'average_stock_volume': stock.volume.mean if stock.volume.count else float('nan'),
+            'dow_jones_change_mean': dow_jones.change.mean if dow_jones.change.count else float('nan'),
+            'dow_jones_volatility': dow_jones.change.std,
+            'average_dow_jones_volume': dow_jones.volume.mean if dow_jones.volume.count else float('nan'),
+            'rolling_window': self.rolling_window,
+            'rolling_stock_price_change_mean': stock.rolling_change.mean if stock.rolling_change.count else float('nan'),
+            'rolling_stock_price_volatility': stock.rolling_change.std,
+            'rolling_average_stock_volume': stock.rolling_volume.mean if stock.rolling_volume.count else float('nan'),
+            'rolling_dow_jones_volatility': dow_jones.rolling_change.std
+        }
+
+def get_store():
+    """
+    Return the process-wide statistics store, loading it on first use.
+    """
+    global _store
+    with _lock:
+        if _store is None:
+            _store = PriceStatsStore()
+        return _store
+
+def update(company_ids):
+    """
+    Bring the Dow Jones and the given companies' statistics up to date and persist them.
+    Returns the number of new rows added.
+    """
+    with _lock:
+        store = get_store()
+        added = store.update_dow_jones()
+        for company_id in company_ids:
+            added += store.update_company(company_id)
+        store.save()
+    logger.info(f"Price statistics updated with {added} new rows")
+    return added
+
+def get_company_stats(company_id):
+    return get_store().get_company_stats(company_id)
+
+def get_baseline(company_id):
+    """
+    Return get_company_stats of a company as the baseline its event windows are compared with,
+    bringing its statistics up to date once per process; each update only reads the new rows.
+    """
+    with _lock:
+        if company_id not in _updated:
+            update([company_id])
+            _updated.add(company_id)
+        return get_company_stats(company_id)
+
+def invalidate(company_id=None, since=None):
+    with _lock:
+        store = get_store()
+        store.invalidate(company_id, since)
+        store.save()
+        if company_id is None:
+            _updated.clear()
+        else:
+            _updated.discard(company_id)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Update the online price statistics")
+    parser.add_argument('--companies', nargs='+', default=['all'], metavar='ID', help="Company IDs or 'all'")
+    parser.add_argument('--rebuild', action='store_true', help="Recompute the statistics from the full history")
+    args = parser.parse_args(argv)
+
+    if any(company_id.lower() == 'all' for company_id in args.companies):
+        company_ids = [int(company_id) for company_id in db_functions.get_company_info()['ID']]
+    else:
+        company_ids = [int(company_id) for company_id in args.companies]
+
+    if args.rebuild:
+        with _lock:
+            get_store().clear()
+
+    added = update(company_ids)
+    print(f"Added {added} new rows to the price statistics")
+    stats = pd.DataFrame([get_company_stats(company_id) for company_id in company_ids])
+    print(stats.to_string(index=False))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,13 +1,13 @@
 # main.py
 
+import argparse
 from datetime import datetime
 
-import analysis
-from utils import setup_logging, display_utils
+from utils import setup_logging, display_utils, report_sink
 
 logger = setup_logging.setup_logger('app', log_file='app.log')
 
-def main():
+def main(charts=False):
     logger.info("Starting Strasbourg")
     greeting()
     
@@ -27,7 +27,9 @@ def main():
             display_utils.display_company_info()
 
         elif choice == '2':
-            analysis.stock_analysis_main()
+            # The analysis stack (scipy, reportlab) is only imported once it is needed
+            from analysis import analyze_results
+            analyze_results.stock_analysis_main(charts)
         
         else:
             print("Invalid choice. Please try again.")
@@ -37,5 +39,28 @@ def greeting():
     print("*** Project: Strasbourg ***")
     print(f"{current_datetime}")
 
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Project Strasbourg")
+    parser.add_argument('--companies', nargs='+', metavar='ID',
+                        help="Analyze these company IDs (or 'all') without prompting, then exit")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Number of worker processes for --companies (default: all cores)")
+    parser.add_argument('--sink', choices=report_sink.SINKS, default=None,
+                        help="Where the analysis output goes (default: console, or null for --companies)")
+    parser.add_argument('--verbosity', type=int, default=report_sink.DETAIL,
+                        help="1 = summaries, 2 = per-event tables, 3 = raw result records (default: 2)")
+    parser.add_argument('--report-file', default=None,
+                        help="File written by the jsonl sink (default: output/report.jsonl)")
+    parser.add_argument('--charts', action='store_true',
+                        help="Render a time series chart of every event into the PDF report")
+    return parser.parse_args(argv)
+
 if __name__ == "__main__":
-    main()
+    args = parse_args()
+    if args.companies:
+        logger.info(f"Starting batch analysis for companies: {' '.join(args.companies)}")
+        from analysis import batch_analysis
+        batch_analysis.run_batch(args.companies, args.workers, args.sink or 'null', args.verbosity, args.report_file, charts=args.charts)
+    else:
+        report_sink.set_sink(report_sink.create_sink(args.sink or 'console', args.verbosity, args.report_file))
+        main(args.charts)
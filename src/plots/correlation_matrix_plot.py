@@ -1,12 +1,48 @@
-import matplotlib.pyplot as plt
-import seaborn as sns
+import numpy as np
 
-def plot_correlation_matrix(data):
+from .render import new_figure, finish_figure
+
+# Matrices with more rows than this are drawn as a plain image, without per-cell annotations
+ANNOTATE_MAX_SIZE = 20
+
+# Most tick labels per axis of a large matrix
+MAX_TICK_LABELS = 60
+
+def draw_heatmap(figure, axes, corr_matrix, annotate_max=ANNOTATE_MAX_SIZE):
+    """
+    Draw a correlation matrix. Small matrices are annotated seaborn heatmaps; larger ones are drawn
+    with imshow as a single image with thinned tick labels, since seaborn builds a patch per cell.
+    """
+    if len(corr_matrix) <= annotate_max:
+        import seaborn as sns
+        sns.heatmap(corr_matrix, annot=True, cmap='coolwarm', vmin=-1, vmax=1, linewidths=0.5, ax=axes)
+        return
+
+    image = axes.imshow(corr_matrix.to_numpy(float), cmap='coolwarm', vmin=-1, vmax=1, interpolation='nearest')
+    figure.colorbar(image, ax=axes)
+    ticks = np.arange(0, len(corr_matrix), max(1, -(-len(corr_matrix) // MAX_TICK_LABELS)))
+    axes.set_xticks(ticks, [str(corr_matrix.columns[tick]) for tick in ticks], rotation=90)
+    axes.set_yticks(ticks, [str(corr_matrix.index[tick]) for tick in ticks])
+
+def plot_correlation_matrix(data, output_file=None):
     """
     Plot the correlation matrix for all variables.
+    With output_file the figure is rendered off-screen to that file instead of shown.
     """
     corr_matrix = data.corr()
-    plt.figure(figsize=(10, 8))
-    sns.heatmap(corr_matrix, annot=True, cmap='coolwarm', linewidths=0.5)
-    plt.title('Correlation Matrix')
-    plt.show()
+    figure = new_figure((10, 8), output_file)
+    axes = figure.subplots()
+    draw_heatmap(figure, axes, corr_matrix)
+    axes.set_title('Correlation Matrix')
+    return finish_figure(figure, output_file)
+
+def plot_cross_correlation(corr_matrix, annotate_max=ANNOTATE_MAX_SIZE, output_file=None):
+    """
+    Plot a precomputed, clustered correlation matrix of many series, such as the one of
+    analysis.cross_correlation. Cells are only annotated up to annotate_max series.
+    """
+    figure = new_figure((12, 10), output_file)
+    axes = figure.subplots()
+    draw_heatmap(figure, axes, corr_matrix, annotate_max)
+    axes.set_title('Cross-Company Correlation of Daily Returns')
+    return finish_figure(figure, output_file)
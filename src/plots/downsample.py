@@ -0,0 +1,64 @@
+# plots/downsample.py
+
+import numpy as np
+import pandas as pd
+
+def lttb_indices(x, y, threshold):
+    """
+    Largest-Triangle-Three-Buckets: pick threshold points of a series that preserve its visual shape.
+    Keeps the first and last points and, from each bucket in between, the point forming the largest
+    triangle with the previously kept point and the average of the next bucket.
+    Returns the sorted positions of the kept points.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    every = (n - 2) / (threshold - 2)
+    # Bucket b covers positions bounds[b] to bounds[b + 1]; the last bound is the final point
+    bounds = np.floor(np.arange(threshold - 1) * every).astype(np.int64) + 1
+    bounds[-1] = n - 1
+    indices = np.empty(threshold, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+
+    kept = 0
+    for bucket in range(threshold - 2):
+        start, end = bounds[bucket], bounds[bucket + 1]
+        next_end = bounds[bucket + 2] if bucket + 2 < threshold - 1 else n
+        average_x = x[end:next_end].mean()
+        average_y = y[end:next_end].mean()
+        areas = np.abs((x[kept] - average_x) * (y[start:end] - y[kept]) - (x[kept] - x[start:end]) * (average_y - y[kept]))
+        kept = start + int(np.argmax(areas))
+        indices[bucket + 1] = kept
+    return indices
+
+def downsample_frame(data, x_column, y_columns, max_points, keep=None):
+    """
+    Reduce a frame to about max_points rows for plotting. Each y column gets an equal share of the
+    budget and is downsampled with LTTB over its non-missing values; the rows kept for any column
+    are kept for all of them. The rows on either side of every value in keep (e.g. event dates)
+    are always kept. Frames within the budget are returned unchanged.
+    """
+    if not max_points or len(data) <= max_points:
+        return data
+
+    x_values = data[x_column]
+    if pd.api.types.is_datetime64_any_dtype(x_values):
+        # Days since the epoch, so that the triangle areas do not lose precision
+        x = x_values.to_numpy('datetime64[ns]').astype(np.int64) / 86400e9
+    else:
+        x = x_values.to_numpy(float)
+
+    budget = max(max_points // len(y_columns), 3)
+    positions = []
+    for y_column in y_columns:
+        y = data[y_column].to_numpy(float, na_value=np.nan)
+        valid = np.flatnonzero(~np.isnan(y))
+        positions.append(valid[lttb_indices(x[valid], y[valid], budget)])
+
+    if keep is not None and len(keep):
+        keep_values = pd.to_datetime(pd.Series(keep)).to_numpy('datetime64[ns]') if pd.api.types.is_datetime64_any_dtype(x_values) else np.asarray(keep)
+        after = np.searchsorted(x_values.to_numpy(), keep_values)
+        positions.append(np.clip(np.concatenate([after - 1, after]), 0, len(data) - 1))
+
+    return data.iloc[np.unique(np.concatenate(positions))]
@@ -1,18 +1,18 @@
-import matplotlib.pyplot as plt
+from .render import new_figure, finish_figure
 
-def plot_histograms(data):
+def plot_histograms(data, output_file=None):
     """
     Plot histograms for stock price changes and Dow Jones changes.
+    With output_file the figure is rendered off-screen to that file instead of shown.
     """
-    plt.figure(figsize=(14, 7))
-    plt.subplot(1, 2, 1)
-    plt.hist(data['Stock Price Change'], bins=30, alpha=0.7, label='Stock Price Change')
-    plt.xlabel('Stock Price Change')
-    plt.title('Distribution of Stock Price Changes')
+    figure = new_figure((14, 7), output_file)
+    stock_axes, dow_jones_axes = figure.subplots(1, 2)
+    stock_axes.hist(data['Stock Price Change'], bins=30, alpha=0.7, label='Stock Price Change')
+    stock_axes.set_xlabel('Stock Price Change')
+    stock_axes.set_title('Distribution of Stock Price Changes')
 
-    plt.subplot(1, 2, 2)
-    plt.hist(data['Dow Jones Change'], bins=30, alpha=0.7, label='Dow Jones Change', color='orange')
-    plt.xlabel('Dow Jones Change')
-    plt.title('Distribution of Dow Jones Changes')
-    plt.tight_layout()
-    plt.show()
+    dow_jones_axes.hist(data['Dow Jones Change'], bins=30, alpha=0.7, label='Dow Jones Change', color='orange')
+    dow_jones_axes.set_xlabel('Dow Jones Change')
+    dow_jones_axes.set_title('Distribution of Dow Jones Changes')
+    figure.tight_layout()
+    return finish_figure(figure, output_file)
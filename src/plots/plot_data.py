@@ -1,11 +1,12 @@
 from .time_series_plot import plot_time_series
 from .histogram_plot import plot_histograms
-from .correlation_matrix_plot import plot_correlation_matrix
+from .correlation_matrix_plot import plot_correlation_matrix, plot_cross_correlation
 from .significance_plot import plot_significance
 
 __all__ = [
     "plot_time_series",
     "plot_histograms",
     "plot_correlation_matrix",
+    "plot_cross_correlation",
     "plot_significance"
 ]
@@ -0,0 +1,139 @@
+# plots/render.py
+
+import hashlib
+import json
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from database import db_config
+
+FORMATS = ['png', 'svg']
+
+# Bump when the plotting code changes, so that cached figures are rendered again
+FIGURE_VERSION = 'v2'
+
+# Size in inches of the per-event and price history charts, small enough to lay out two to a row in the PDF report
+EVENT_CHART_SIZE = (7, 3.5)
+
+def new_figure(figsize, output_file=None):
+    """
+    Create a figure for a plot function. Figures that go to a file are plain matplotlib Figures,
+    rendered off-screen by the Agg (or SVG) canvas without touching pyplot or a window;
+    only figures that are shown use pyplot.
+    """
+    if output_file is None:
+        import matplotlib.pyplot as plt
+        return plt.figure(figsize=figsize)
+    from matplotlib.figure import Figure
+    return Figure(figsize=figsize)
+
+def finish_figure(figure, output_file=None):
+    """
+    Save the figure to output_file and return the path, or show it when no file is given.
+    """
+    if output_file is None:
+        import matplotlib.pyplot as plt
+        plt.show()
+        return None
+    figure.savefig(output_file)
+    return output_file
+
+def plot_function(kind):
+    from . import plot_data
+    return getattr(plot_data, f"plot_{kind}")
+
+def hash_data(data):
+    """
+    Hash the input data of a figure: a DataFrame or a list of result dicts.
+    """
+    if not isinstance(data, pd.DataFrame):
+        data = pd.DataFrame.from_records(list(data))
+    digest = hashlib.sha256()
+    digest.update(json.dumps([str(column) for column in data.columns]).encode())
+    digest.update(pd.util.hash_pandas_object(data, index=False).values.tobytes())
+    return digest.hexdigest()
+
+def figure_path(kind, data, params=None, file_format='png', cache_dir=None):
+    """
+    Path of a figure in the figure cache, named after a hash of its kind, input data and parameters.
+    """
+    if file_format not in FORMATS:
+        raise ValueError(f"Unknown figure format: {file_format}")
+    digest = hashlib.sha256()
+    for part in (kind, FIGURE_VERSION, json.dumps(params or {}, sort_keys=True, default=str), hash_data(data)):
+        digest.update(part.encode())
+        digest.update(b'\0')
+    return os.path.join(cache_dir or db_config.FIGURE_CACHE_DIR, f"{kind}_{digest.hexdigest()[:32]}.{file_format}")
+
+def render_to(path, kind, data, params=None):
+    """
+    Render a figure to path through a temporary file in the same directory, so that concurrent
+    runs never read a partly written figure.
+    """
+    directory = os.path.dirname(path)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory, exist_ok=True)
+    file_descriptor, temp_path = tempfile.mkstemp(prefix=".render_", suffix=os.path.splitext(path)[1], dir=directory)
+    os.close(file_descriptor)
+    try:
+        plot_function(kind)(data, **(params or {}), output_file=temp_path)
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    return path
+
+def render_figure(kind, data, params=None, file_format='png', cache_dir=None):
+    """
+    Render one figure off-screen and return its path in the figure cache. A figure that was already
+    rendered from the same data and parameters is reused.
+    """
+    path = figure_path(kind, data, params, file_format, cache_dir)
+    if not os.path.exists(path):
+        render_to(path, kind, data, params)
+    return path
+
+def init_worker():
+    import matplotlib
+    matplotlib.use('Agg')
+
+def render_figures(jobs, workers=None, cache_dir=None):
+    """
+    Render (kind, data, params, file_format) jobs and return their paths in job order.
+    Cached figures are reused; the others are rendered across a process pool, or in this process
+    when workers is 1.
+    """
+    paths = [figure_path(kind, data, params, file_format, cache_dir) for kind, data, params, file_format in jobs]
+    pending = {}
+    for path, (kind, data, params, _) in zip(paths, jobs):
+        if not os.path.exists(path) and path not in pending:
+            pending[path] = (kind, data, params)
+
+    workers = min(workers or os.cpu_count() or 1, len(pending))
+    if workers <= 1:
+        for path, (kind, data, params) in pending.items():
+            render_to(path, kind, data, params)
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as executor:
+            futures = [executor.submit(render_to, path, kind, data, params) for path, (kind, data, params) in pending.items()]
+            for future in futures:
+                future.result()
+    return paths
+
+def render_event_charts(company_id, events, history=None, workers=None, file_format='png'):
+    """
+    Render the time series chart of every (disclosure date, surrounding data DataFrame) event of a
+    company, marking the disclosure date. When the company's price history is given, a chart of
+    the whole history with every disclosure marked comes first; it is downsampled to
+    db_config.PLOT_MAX_POINTS. Returns the chart paths in that order.
+    """
+    params = {'company_id': company_id, 'figsize': EVENT_CHART_SIZE, 'max_points': db_config.PLOT_MAX_POINTS}
+    jobs = [('time_series', surrounding_data, {**params, 'event_dates': [pd.Timestamp(disclosure_date)]}, file_format)
+            for disclosure_date, surrounding_data in events if len(surrounding_data)]
+    if history is not None and len(history):
+        event_dates = [pd.Timestamp(disclosure_date) for disclosure_date, _ in events]
+        jobs.insert(0, ('time_series', history, {**params, 'event_dates': event_dates}, file_format))
+    return render_figures(jobs, workers)
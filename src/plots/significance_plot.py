@@ -1,45 +1,30 @@
-import matplotlib.pyplot as plt
+from .render import new_figure, finish_figure
 
-def plot_significance(results):
-    dates = [r['disclosure_date'] for r in results]
-    t_test_p_values = [r['t_test_p_value'] for r in results]
-    wilcoxon_p_values = [r['wilcoxon_p_value'] for r in results]
-    correlation_p_values = [r['correlation_p_value'] for r in results]
-    mwu_p_values = [r['mwu_p_value'] for r in results]
-
-    plt.figure(figsize=(14, 10))
-
-    plt.subplot(2, 2, 1)
-    plt.plot(dates, t_test_p_values, marker='o', linestyle='-', label='T-test P-values')
-    plt.axhline(y=0.05, color='r', linestyle='--', label='Significance Level (0.05)')
-    plt.xlabel('Disclosure Dates')
-    plt.ylabel('P-values')
-    plt.title('T-test P-values Over Time')
-    plt.legend()
+# Result column and title of each subplot
+SIGNIFICANCE_PLOTS = [
+    ('t_test_p_value', 'T-test'),
+    ('wilcoxon_p_value', 'Wilcoxon'),
+    ('correlation_p_value', 'Correlation'),
+    ('mwu_p_value', 'Mann-Whitney U')
+]
 
-    plt.subplot(2, 2, 2)
-    plt.plot(dates, wilcoxon_p_values, marker='o', linestyle='-', label='Wilcoxon P-values')
-    plt.axhline(y=0.05, color='r', linestyle='--', label='Significance Level (0.05)')
-    plt.xlabel('Disclosure Dates')
-    plt.ylabel('P-values')
-    plt.title('Wilcoxon P-values Over Time')
-    plt.legend()
-
-    plt.subplot(2, 2, 3)
-    plt.plot(dates, correlation_p_values, marker='o', linestyle='-', label='Correlation P-values')
-    plt.axhline(y=0.05, color='r', linestyle='--', label='Significance Level (0.05)')
-    plt.xlabel('Disclosure Dates')
-    plt.ylabel('P-values')
-    plt.title('Correlation P-values Over Time')
-    plt.legend()
+def plot_significance(results, output_file=None):
+    """
+    Plot the p-values of each test over the disclosure dates. results may be a list of result dicts
+    or a results table. With output_file the figure is rendered off-screen to that file instead of shown.
+    """
+    if hasattr(results, 'to_dict'):
+        results = results.to_dict('records')
+    dates = [r['disclosure_date'] for r in results]
 
-    plt.subplot(2, 2, 4)
-    plt.plot(dates, mwu_p_values, marker='o', linestyle='-', label='Mann-Whitney U P-values')
-    plt.axhline(y=0.05, color='r', linestyle='--', label='Significance Level (0.05)')
-    plt.xlabel('Disclosure Dates')
-    plt.ylabel('P-values')
-    plt.title('Mann-Whitney U P-values Over Time')
-    plt.legend()
+    figure = new_figure((14, 10), output_file)
+    for axes, (column, name) in zip(figure.subplots(2, 2).flat, SIGNIFICANCE_PLOTS):
+        axes.plot(dates, [r[column] for r in results], marker='o', linestyle='-', label=f'{name} P-values')
+        axes.axhline(y=0.05, color='r', linestyle='--', label='Significance Level (0.05)')
+        axes.set_xlabel('Disclosure Dates')
+        axes.set_ylabel('P-values')
+        axes.set_title(f'{name} P-values Over Time')
+        axes.legend()
 
-    plt.tight_layout()
-    plt.show()
+    figure.tight_layout()
+    return finish_figure(figure, output_file)
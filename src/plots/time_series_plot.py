@@ -1,14 +1,25 @@
-import matplotlib.pyplot as plt
+from database import db_config
+from .downsample import downsample_frame
+from .render import new_figure, finish_figure
 
-def plot_time_series(data, company_id):
+def plot_time_series(data, company_id, event_dates=None, figsize=(14, 7), max_points=None, output_file=None):
     """
-    Plot time series for stock prices and Dow Jones indices.
+    Plot time series for stock prices and Dow Jones indices, with a marker at each event date.
+    Series longer than max_points (db_config.PLOT_MAX_POINTS by default, 0 to plot every row) are
+    downsampled with LTTB, keeping the rows around the event dates.
+    With output_file the figure is rendered off-screen to that file instead of shown.
     """
-    plt.figure(figsize=(14, 7))
-    plt.plot(data['Date'], data['Stock Close'], label='Stock Close Price')
-    plt.plot(data['Date'], data['Dow Jones Close'], label='Dow Jones Close Price', linestyle='--')
-    plt.xlabel('Date')
-    plt.ylabel('Close Price')
-    plt.title(f'Time Series of Stock and Dow Jones Close Prices for Company ID: {company_id}')
-    plt.legend()
-    plt.show()
+    max_points = db_config.PLOT_MAX_POINTS if max_points is None else max_points
+    data = downsample_frame(data, 'Date', ['Stock Close', 'Dow Jones Close'], max_points, event_dates)
+
+    figure = new_figure(figsize, output_file)
+    axes = figure.subplots()
+    axes.plot(data['Date'], data['Stock Close'], label='Stock Close Price')
+    axes.plot(data['Date'], data['Dow Jones Close'], label='Dow Jones Close Price', linestyle='--')
+    for event_date in event_dates or []:
+        axes.axvline(event_date, color='r', linestyle=':', linewidth=1)
+    axes.set_xlabel('Date')
+    axes.set_ylabel('Close Price')
+    axes.set_title(f'Time Series of Stock and Dow Jones Close Prices for Company ID: {company_id}')
+    axes.legend()
+    return finish_figure(figure, output_file)
@@ -0,0 +1,22 @@
+-- 001_add_keys_and_indexes.sql
+-- Primary keys and composite indexes for the (CompanyID, Date) lookups
+-- and the dow_jones date joins in database/db_functions.py.
+
+DELETE FROM stock_data
+WHERE CompanyID IS NULL OR Date IS NULL;
+
+ALTER TABLE `stock_data`
+  MODIFY `CompanyID` int(11) NOT NULL,
+  MODIFY `Date` date NOT NULL,
+  ADD PRIMARY KEY (`CompanyID`, `Date`),
+  ADD KEY `idx_stock_data_date` (`Date`);
+
+ALTER TABLE `dow_jones`
+  ADD PRIMARY KEY (`Date`);
+
+ALTER TABLE `company_info`
+  ADD PRIMARY KEY (`CompanyID`);
+
+ALTER TABLE `data_breach_disclosures`
+  ADD PRIMARY KEY (`DisclosureID`),
+  ADD KEY `idx_disclosures_company_date` (`CompanyID`, `DisclosureDate`);
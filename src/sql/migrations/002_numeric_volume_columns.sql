@@ -0,0 +1,24 @@
+-- 002_numeric_volume_columns.sql
+-- Store dow_jones.Volume as BIGINT instead of strings like '350.2M',
+-- backfilling the numeric value from the existing text column.
+
+ALTER TABLE `dow_jones`
+  CHANGE `Volume` `VolumeText` varchar(20) DEFAULT NULL;
+
+ALTER TABLE `dow_jones`
+  ADD COLUMN `Volume` bigint(20) DEFAULT NULL AFTER `Low`;
+
+UPDATE dow_jones
+SET Volume = CASE
+    WHEN VolumeText IS NULL OR TRIM(VolumeText) = '' THEN NULL
+    WHEN UPPER(TRIM(VolumeText)) LIKE '%K' THEN ROUND(CAST(REPLACE(LEFT(TRIM(VolumeText), CHAR_LENGTH(TRIM(VolumeText)) - 1), ',', '') AS DECIMAL(20,4)) * 1000)
+    WHEN UPPER(TRIM(VolumeText)) LIKE '%M' THEN ROUND(CAST(REPLACE(LEFT(TRIM(VolumeText), CHAR_LENGTH(TRIM(VolumeText)) - 1), ',', '') AS DECIMAL(20,4)) * 1000000)
+    WHEN UPPER(TRIM(VolumeText)) LIKE '%B' THEN ROUND(CAST(REPLACE(LEFT(TRIM(VolumeText), CHAR_LENGTH(TRIM(VolumeText)) - 1), ',', '') AS DECIMAL(20,4)) * 1000000000)
+    ELSE ROUND(CAST(REPLACE(TRIM(VolumeText), ',', '') AS DECIMAL(20,4)))
+END;
+
+ALTER TABLE `dow_jones`
+  DROP COLUMN `VolumeText`;
+
+ALTER TABLE `stock_data`
+  MODIFY `Volume` bigint(20) DEFAULT NULL;
@@ -1,26 +1,18 @@
 # app_utils.py
 
 import pandas as pd
-from database import db_functions
+from database import db_functions, db_utils
 
 def format_stock_data_df(df):
     try:
         if 'Date' not in df.columns:
             raise ValueError("Input DataFrame must contain 'Date' column")
 
-        expected_columns = ['Date', 'Stock Open', 'Stock Close', 'Stock Volume', 'Dow Jones Open', 'Dow Jones Close', 'Dow Jones Volume']
+        expected_columns = db_functions.STOCK_DATA_COLUMNS
         if not all(col in df.columns for col in expected_columns):
             raise ValueError(f"Input DataFrame must contain columns: {expected_columns}")
 
-        df['Date'] = pd.to_datetime(df['Date']).dt.date
-        df['Stock Open'] = pd.to_numeric(df['Stock Open'], errors='coerce')
-        df['Stock Close'] = pd.to_numeric(df['Stock Close'], errors='coerce')
-        df['Stock Volume'] = pd.to_numeric(df['Stock Volume'], errors='coerce')
-        df['Dow Jones Open'] = pd.to_numeric(df['Dow Jones Open'], errors='coerce')
-        df['Dow Jones Close'] = pd.to_numeric(df['Dow Jones Close'], errors='coerce')
-        df['Dow Jones Volume'] = pd.to_numeric(df['Dow Jones Volume'].str.replace('M', '').astype(float) * 1e6, errors='coerce')
-
-        df = df.dropna()
+        df = db_utils.apply_price_schema(df).dropna()
 
         print("Formatted DataFrame:")
         print(df.head())
@@ -64,11 +56,19 @@ def get_disclosure_dates(company_id):
     
 def convert_volume(volume_str):
     """
-    Convert volume strings with suffixes 'M' (million) and 'B' (billion) to float.
+    Convert volume strings with suffixes 'K' (thousand), 'M' (million) and 'B' (billion) to float.
+    Empty values and '-' become NaN.
     """
+    if volume_str is None:
+        return float('nan')
     if isinstance(volume_str, str):
-        if 'M' in volume_str:
-            return float(volume_str.replace('M', '')) * 1e6
-        elif 'B' in volume_str:
-            return float(volume_str.replace('B', '')) * 1e9
-    return float(volume_str)
\ No newline at end of file
+        volume_str = volume_str.strip().replace(',', '').upper()
+        if volume_str in ('', '-'):
+            return float('nan')
+        if volume_str.endswith('K'):
+            return float(volume_str[:-1]) * 1e3
+        elif volume_str.endswith('M'):
+            return float(volume_str[:-1]) * 1e6
+        elif volume_str.endswith('B'):
+            return float(volume_str[:-1]) * 1e9
+    return float(volume_str)
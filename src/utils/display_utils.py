@@ -1,21 +1,16 @@
 from database import db_functions
 import pandas as pd
-from tabulate import tabulate
+from utils import report_sink
 
-def display_dataframe_to_user(title, df):
+def display_dataframe_to_user(title, df, level=report_sink.SUMMARY):
+    """
+    Show a DataFrame through the active report sink. df may be a callable returning the
+    DataFrame, so that it is only built when the sink shows tables of this level.
+    """
     try:
-        print("\n" + title)
-        print("=" * len(title))
-        
-        if df.empty:
-            print("The DataFrame is empty.")
-            return
-
-        table = tabulate(df, headers='keys', tablefmt='psql')
-        print(table)
-
+        report_sink.table(title, df, level)
     except Exception as e:
-        print(f"Error displaying DataFrame: {e}")
+        report_sink.message(f"Error displaying DataFrame: {e}")
 
 def display_all_companies():
     company_info_df = db_functions.get_company_info()
@@ -54,22 +49,21 @@ def display_disclosure_dates_count(disclosure_dates):
 
 def display_company_info(company_info):
     if company_info.empty:
-        print("No company information available.")
+        report_sink.message("No company information available.")
         return
     
     row = company_info.iloc[0]
     line = "=" * 40
-    print(f"\n{line}")
-    print("   Company Information")
-    print(f"{line}")
-    print(f" ID: {row['ID']}")
-    print(f" Name: {row['Name']}")
-    print(f" Location: {row['Location']}")
-    print(f" Stock Symbol: {row['Stock Symbol']}")
+    report_sink.message("\n".join([
+        f"\n{line}",
+        "   Company Information",
+        f"{line}",
+        f" ID: {row['ID']}",
+        f" Name: {row['Name']}",
+        f" Location: {row['Location']}",
+        f" Stock Symbol: {row['Stock Symbol']}"
+    ]))
 
 def display_stock_data(company_id, stock_data_df):
-    print(f"\nCompany ID: {company_id} Stock Data")
-    if not stock_data_df.empty:
-        print(tabulate(stock_data_df, headers='keys', tablefmt='grid'))
-    else:
-        print("No data available.")
+    report_sink.message(f"\nCompany ID: {company_id} Stock Data", report_sink.DETAIL)
+    report_sink.table(None, stock_data_df, report_sink.DETAIL, tablefmt='grid', empty_message="No data available.")
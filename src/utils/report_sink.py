@@ -0,0 +1,163 @@
+# utils/report_sink.py
+
+import contextlib
+import json
+import os
+import sys
+import threading
+
+# Verbosity levels: output is emitted when its level is at most the sink's verbosity
+SUMMARY = 1
+DETAIL = 2
+DEBUG = 3
+
+SINKS = ['console', 'null', 'jsonl']
+
+class NullSink:
+    """
+    Discard all output. The other sinks extend it, so every sink supports the same calls.
+    """
+    verbosity = 0
+
+    def enabled(self, level):
+        return level <= self.verbosity
+
+    def message(self, text, level=SUMMARY):
+        pass
+
+    def table(self, title, frame, level=DETAIL, tablefmt='psql', empty_message="The DataFrame is empty.", showindex=True):
+        pass
+
+    def record(self, kind, data, level=DEBUG):
+        pass
+
+    def close(self):
+        pass
+
+class ConsoleSink(NullSink):
+    """
+    Print messages and tabulate tables to the terminal, for interactive use.
+    """
+    def __init__(self, verbosity=DETAIL, stream=None):
+        self.verbosity = verbosity
+        self.stream = stream
+
+    def write(self, text):
+        print(text, file=self.stream or sys.stdout)
+
+    def message(self, text, level=SUMMARY):
+        if self.enabled(level):
+            self.write(text)
+
+    def table(self, title, frame, level=DETAIL, tablefmt='psql', empty_message="The DataFrame is empty.", showindex=True):
+        """
+        Render a DataFrame. frame may also be a callable returning the DataFrame, so that it is only
+        built when this sink shows tables of the given level.
+        """
+        if not self.enabled(level):
+            return
+        from tabulate import tabulate
+
+        if title:
+            self.write("\n" + title)
+            self.write("=" * len(title))
+        frame = frame() if callable(frame) else frame
+        if frame.empty:
+            self.write(empty_message)
+            return
+        # Prices are daily, so show datetime columns as plain dates
+        date_columns = frame.select_dtypes('datetime').columns
+        if len(date_columns):
+            frame = frame.assign(**{column: frame[column].dt.date for column in date_columns})
+        self.write(tabulate(frame, headers='keys', tablefmt=tablefmt, showindex=showindex))
+
+    def record(self, kind, data, level=DEBUG):
+        if self.enabled(level):
+            self.write(data)
+
+def to_json_value(value):
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    if hasattr(value, 'item'):
+        return value.item()
+    return str(value)
+
+class JsonLinesSink(NullSink):
+    """
+    Append messages and records to a JSON-lines file, one object per line, for batch runs.
+    Tables are not rendered. Each line is written and flushed in one call, so several worker
+    processes can append to the same file.
+    """
+    def __init__(self, path, verbosity=DEBUG, append=True):
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        self.path = path
+        self.verbosity = verbosity
+        if not append:
+            open(path, 'w', encoding='utf-8').close()
+        # Always write in append mode, so that lines from other processes are never overwritten
+        self.file = open(path, 'a', encoding='utf-8')
+        self.lock = threading.Lock()
+
+    def write(self, data):
+        line = json.dumps(data, default=to_json_value) + "\n"
+        with self.lock:
+            self.file.write(line)
+            self.file.flush()
+
+    def message(self, text, level=SUMMARY):
+        if self.enabled(level):
+            self.write({'type': 'message', 'level': level, 'pid': os.getpid(), 'text': text.strip()})
+
+    def record(self, kind, data, level=DEBUG):
+        if self.enabled(level):
+            self.write({'type': kind, 'pid': os.getpid(), **data})
+
+    def close(self):
+        self.file.close()
+
+def create_sink(kind='console', verbosity=DETAIL, path=None, append=True):
+    """
+    Create a sink by name: 'console', 'null' or 'jsonl' (written to path, output/report.jsonl by default).
+    """
+    if kind == 'console':
+        return ConsoleSink(verbosity)
+    if kind == 'null':
+        return NullSink()
+    if kind == 'jsonl':
+        return JsonLinesSink(path or os.path.join("output", "report.jsonl"), verbosity, append)
+    raise ValueError(f"Unknown report sink: {kind}")
+
+_sink = ConsoleSink()
+
+def get_sink():
+    return _sink
+
+def set_sink(sink):
+    """
+    Make sink the active sink of this process and return the previous one.
+    """
+    global _sink
+    previous, _sink = _sink, sink
+    return previous
+
+@contextlib.contextmanager
+def using_sink(sink):
+    previous = set_sink(sink)
+    try:
+        yield sink
+    finally:
+        set_sink(previous)
+
+def enabled(level):
+    return _sink.enabled(level)
+
+def message(text, level=SUMMARY):
+    _sink.message(text, level)
+
+def table(title, frame, level=DETAIL, tablefmt='psql', empty_message="The DataFrame is empty.", showindex=True):
+    _sink.table(title, frame, level, tablefmt, empty_message, showindex)
+
+def record(kind, data, level=DEBUG):
+    _sink.record(kind, data, level)
@@ -0,0 +1,79 @@
+# utils/startup_benchmark.py
+
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that only the analysis, report and plot stages need; importing them at startup is a regression
+HEAVY_MODULES = ['scipy.stats', 'matplotlib', 'seaborn', 'reportlab']
+DEFAULT_BUDGET_MS = 1000
+
+IMPORT_TIME_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$')
+
+def parse_import_times(output):
+    """
+    Parse the stderr of python -X importtime into a dict of module name -> (self us, cumulative us).
+    """
+    times = {}
+    for line in output.splitlines():
+        match = IMPORT_TIME_LINE.match(line)
+        if match:
+            times[match.group(4)] = (int(match.group(1)), int(match.group(2)))
+    return times
+
+def measure_imports(module):
+    """
+    Import module in a fresh interpreter with -X importtime and return its parsed import times.
+    """
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [SRC_DIR, env.get('PYTHONPATH')]))
+    completed = subprocess.run([sys.executable, '-X', 'importtime', '-c', f"import {module}"],
+                               capture_output=True, text=True, env=env)
+    if completed.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{completed.stderr}")
+    return parse_import_times(completed.stderr)
+
+def heavy_imports(times):
+    """
+    Return the HEAVY_MODULES (or their submodules) that were imported.
+    """
+    return sorted({heavy for heavy in HEAVY_MODULES for name in times if name == heavy or name.startswith(heavy + '.')})
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure the import time of the application entry point")
+    parser.add_argument('--module', default='main', help="Module to import (default: main)")
+    parser.add_argument('--repeats', type=int, default=5, help="Fresh interpreters to time; the median is reported")
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS, help="Fail when the median import time exceeds this")
+    parser.add_argument('--top', type=int, default=15, help="Number of slowest modules to list")
+    args = parser.parse_args(argv)
+
+    runs = [measure_imports(args.module) for _ in range(args.repeats)]
+    totals = [times[args.module][1] / 1000 for times in runs]
+    median_ms = statistics.median(totals)
+    last = runs[-1]
+
+    print(f"Import time of {args.module}: median {median_ms:.0f} ms over {args.repeats} runs "
+          f"(min {min(totals):.0f} ms, max {max(totals):.0f} ms, budget {args.budget_ms:.0f} ms)")
+    print("\nSlowest modules by self time:")
+    for name, (self_us, cumulative_us) in sorted(last.items(), key=lambda item: item[1][0], reverse=True)[:args.top]:
+        print(f"  {self_us / 1000:8.1f} ms self {cumulative_us / 1000:8.1f} ms cumulative  {name}")
+
+    failed = False
+    heavy = heavy_imports(last)
+    if heavy:
+        print(f"\nFAIL: {args.module} imports {', '.join(heavy)} at startup")
+        failed = True
+    if median_ms > args.budget_ms:
+        print(f"\nFAIL: median import time {median_ms:.0f} ms exceeds the {args.budget_ms:.0f} ms budget")
+        failed = True
+    if not failed:
+        print("\nOK")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,9 @@
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+# The modules write their logs, caches and outputs relative to the working directory;
+# keep them out of the source tree
+os.chdir(tempfile.mkdtemp(prefix='strasbourg_tests_'))
@@ -0,0 +1,87 @@
+import warnings
+
+import numpy as np
+import pytest
+from scipy import stats
+
+from analysis import batch_statistics
+
+SCIPY_TESTS = {
+    't_test': stats.ttest_rel,
+    'wilcoxon': stats.wilcoxon,
+    'correlation': stats.pearsonr,
+    'mannwhitneyu': stats.mannwhitneyu
+}
+STATISTIC_KEYS = {
+    't_test': 't_statistic',
+    'wilcoxon': 'wilcoxon_statistic',
+    'correlation': 'correlation_coefficient',
+    'mannwhitneyu': 'mwu_statistic'
+}
+
+def scipy_results(stock_changes, dow_jones_changes, test):
+    """
+    Statistic and p-value of every row from scipy.stats on the row's complete pairs; NaN where scipy raises.
+    """
+    results = []
+    for stock_row, dow_jones_row in zip(stock_changes, dow_jones_changes):
+        complete = ~np.isnan(stock_row) & ~np.isnan(dow_jones_row)
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore')
+                result = SCIPY_TESTS[test](stock_row[complete], dow_jones_row[complete])
+            results.append((float(result[0]), float(result[1])))
+        except ValueError:
+            results.append((np.nan, np.nan))
+    return np.array(results).reshape(-1, 2)
+
+def random_windows(seed, events, days, decimals=None, zero_fraction=0.0, nan_fraction=0.0):
+    rng = np.random.default_rng(seed)
+    stock_changes = rng.normal(0.1, 1.0, (events, days))
+    dow_jones_changes = rng.normal(0.0, 1.0, (events, days))
+    if decimals is not None:
+        stock_changes = stock_changes.round(decimals)
+        dow_jones_changes = dow_jones_changes.round(decimals)
+    zeros = rng.random((events, days)) < zero_fraction
+    stock_changes[zeros] = dow_jones_changes[zeros]
+    stock_changes[rng.random((events, days)) < nan_fraction] = np.nan
+    dow_jones_changes[rng.random((events, days)) < nan_fraction] = np.nan
+    return stock_changes, dow_jones_changes
+
+CASES = {
+    'random': random_windows(1, 40, 15),
+    'long windows': random_windows(2, 10, 80),
+    'ties': random_windows(3, 8, 12, decimals=1),
+    'zero differences': random_windows(4, 8, 10, zero_fraction=0.2),
+    'ties and zeros in long windows': random_windows(5, 10, 60, decimals=1, zero_fraction=0.1),
+    'nan rows': random_windows(6, 40, 15, nan_fraction=0.3),
+    'short windows': (np.array([[np.nan, np.nan, np.nan], [0.5, np.nan, np.nan], [0.5, -0.2, np.nan], [1.0, np.nan, 2.0]]),
+                      np.array([[np.nan, 0.1, np.nan], [0.2, 0.3, np.nan], [0.1, 0.4, np.nan], [0.5, 0.5, 1.0]]))
+}
+
+@pytest.mark.parametrize('test', list(SCIPY_TESTS))
+@pytest.mark.parametrize('case', list(CASES))
+def test_matches_scipy(case, test):
+    stock_changes, dow_jones_changes = CASES[case]
+    batch_results = batch_statistics.run_statistical_tests(stock_changes, dow_jones_changes)
+    expected = scipy_results(stock_changes, dow_jones_changes, test)
+    np.testing.assert_allclose(batch_results[test][STATISTIC_KEYS[test]], expected[:, 0], rtol=1e-9, atol=1e-12, equal_nan=True)
+    np.testing.assert_allclose(batch_results[test]['p_value'], expected[:, 1], rtol=1e-9, atol=1e-12, equal_nan=True)
+
+def test_single_observation_errors():
+    from analysis import static_analysis_utils
+
+    # scipy raises for a correlation of one pair and for a Wilcoxon test of a single zero difference
+    results = static_analysis_utils.perform_statistical_tests_batch([
+        {'Stock Price Change': np.array([0.3]), 'Dow Jones Change': np.array([0.3])},
+        {'Stock Price Change': np.array([0.5]), 'Dow Jones Change': np.array([0.2])}
+    ])
+    assert 'error' in results[0]['wilcoxon'] and 'error' in results[0]['correlation']
+    assert 'error' not in results[1]['wilcoxon'] and 'error' in results[1]['correlation']
+    assert results[1]['wilcoxon']['p_value'] == stats.wilcoxon([0.5], [0.2]).pvalue
+
+def test_observations_count_complete_pairs():
+    stock_changes, dow_jones_changes = CASES['nan rows']
+    batch_results = batch_statistics.run_statistical_tests(stock_changes, dow_jones_changes)
+    expected = (~np.isnan(stock_changes) & ~np.isnan(dow_jones_changes)).sum(axis=1)
+    np.testing.assert_array_equal(batch_results['observations'], expected)
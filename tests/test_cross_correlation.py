@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from analysis import cross_correlation, price_cube
+
+def returns(days=600, series=12, seed=25):
+    """
+    Correlated daily returns with scattered gaps, a block of missing days and one sparse series.
+    """
+    rng = np.random.default_rng(seed)
+    market = rng.normal(0, 0.01, days)
+    values = market[:, None] * rng.uniform(0, 2, series) + rng.normal(0, 0.01, (days, series))
+    values[rng.uniform(size=values.shape) < 0.1] = np.nan
+    values[100:250, 3] = np.nan
+    # Only a few days overlap with the other series, fewer than min_periods for some pairs
+    values[rng.uniform(size=days) < 0.97, series - 1] = np.nan
+    return values.astype(np.float32)
+
+@pytest.mark.parametrize('min_periods', [2, 20])
+def test_pairwise_correlation_matches_pandas(min_periods):
+    values = returns()
+    correlation = cross_correlation.pairwise_correlation(values, min_periods)
+    expected = pd.DataFrame(values.astype(np.float64)).corr(min_periods=min_periods).to_numpy()
+
+    np.testing.assert_array_equal(np.isnan(correlation), np.isnan(expected))
+    np.testing.assert_allclose(correlation, expected, rtol=0, atol=2e-6, equal_nan=True)
+    if min_periods == 20:
+        assert np.isnan(correlation[-1, :-1]).any()
+
+def test_cluster_order_is_a_permutation():
+    correlation = cross_correlation.pairwise_correlation(returns(), 20)
+    order = cross_correlation.cluster_order(correlation)
+    assert sorted(order) == list(range(len(correlation)))
+    assert list(cross_correlation.cluster_order(correlation[:2, :2])) == [0, 1]
+
+def test_clustered_matrix_keeps_its_labels():
+    values = returns(series=6).astype(np.float64)
+    closes = np.cumprod(1 + np.nan_to_num(values), axis=0)
+    dates = pd.bdate_range('2020-01-01', periods=len(closes)).values.astype('datetime64[D]')
+    cube = price_cube.PriceCube(dates, [11, 12, 13, 14, 15], None, np.asfortranarray(closes[:, 1:]), None,
+                                None, closes[:, 0], None)
+    clustered = cross_correlation.cross_correlation(cube)
+    unclustered = cross_correlation.cross_correlation(cube, cluster=False)
+    assert list(clustered.index) == list(clustered.columns)
+    pd.testing.assert_frame_equal(clustered, unclustered.loc[clustered.index, clustered.columns])
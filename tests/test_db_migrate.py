@@ -0,0 +1,31 @@
+import pytest
+
+from database import db_config
+
+def mysql_reachable():
+    if db_config.DB_BACKEND != 'mysql':
+        return False
+    import mysql.connector
+    try:
+        connection = mysql.connector.connect(database=db_config.DB_NAME, user=db_config.DB_USER,
+                                             password=db_config.DB_PASSWORD, host=db_config.DB_HOST,
+                                             use_pure=True, connection_timeout=2)
+    except mysql.connector.Error:
+        return False
+    connection.close()
+    return True
+
+pytestmark = pytest.mark.skipif(not mysql_reachable(), reason="needs a reachable MySQL/MariaDB database with DB_BACKEND=mysql")
+
+def test_migrations_apply_completely():
+    from database import db_migrate
+
+    db_migrate.apply_migrations()
+    _, pending = db_migrate.migration_status()
+    assert pending == []
+
+def test_hot_queries_use_indexes():
+    from database import db_migrate
+
+    db_migrate.apply_migrations()
+    assert db_migrate.explain_hot_queries() == []
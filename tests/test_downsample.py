@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from plots import downsample
+
+def reference_lttb(x, y, threshold):
+    """
+    Straightforward LTTB, one bucket at a time, as described by Steinarsson (2013).
+    """
+    n = len(x)
+    every = (n - 2) / (threshold - 2)
+    kept = [0]
+    previous = 0
+    for bucket in range(threshold - 2):
+        start = int(np.floor(bucket * every)) + 1
+        end = int(np.floor((bucket + 1) * every)) + 1
+        next_end = min(int(np.floor((bucket + 2) * every)) + 1, n)
+        if bucket == threshold - 3:
+            end, next_end = n - 1, n
+        average_x, average_y = x[end:next_end].mean(), y[end:next_end].mean()
+        best, best_area = start, -1.0
+        for position in range(start, end):
+            area = abs((x[previous] - average_x) * (y[position] - y[previous])
+                       - (x[previous] - x[position]) * (average_y - y[previous]))
+            if area > best_area:
+                best, best_area = position, area
+        kept.append(best)
+        previous = best
+    kept.append(n - 1)
+    return np.array(kept)
+
+@pytest.mark.parametrize('n, threshold', [(1000, 100), (5000, 2000), (101, 3), (50, 49)])
+def test_lttb_matches_reference(n, threshold):
+    rng = np.random.default_rng(n)
+    x = np.sort(rng.uniform(0, n, n))
+    y = np.cumsum(rng.normal(0, 1, n))
+    indices = downsample.lttb_indices(x, y, threshold)
+
+    assert len(indices) == threshold
+    assert indices[0] == 0 and indices[-1] == n - 1
+    assert np.all(np.diff(indices) > 0)
+    np.testing.assert_array_equal(indices, reference_lttb(x, y, threshold))
+
+def test_short_series_are_kept_whole():
+    x = np.arange(10.0)
+    np.testing.assert_array_equal(downsample.lttb_indices(x, x, 10), np.arange(10))
+    np.testing.assert_array_equal(downsample.lttb_indices(x, x, 50), np.arange(10))
+
+def price_history(days):
+    rng = np.random.default_rng(24)
+    return pd.DataFrame({
+        'Date': pd.bdate_range('1990-01-01', periods=days),
+        'Stock Close': 100 + np.cumsum(rng.normal(0, 1, days)),
+        'Dow Jones Close': 10000 + np.cumsum(rng.normal(0, 50, days))
+    })
+
+def test_downsample_frame_keeps_endpoints_and_event_rows():
+    history = price_history(20000)
+    event_dates = [history['Date'].iloc[1234], history['Date'].iloc[15000] + pd.Timedelta(days=1)]
+    sampled = downsample.downsample_frame(history, 'Date', ['Stock Close', 'Dow Jones Close'], 1000, keep=event_dates)
+
+    assert len(sampled) <= 1000 + 2 * len(event_dates)
+    assert sampled.index.is_monotonic_increasing
+    kept = set(sampled.index)
+    assert {0, len(history) - 1} <= kept
+    # The rows on either side of every event date
+    assert {1233, 1234, 15000, 15001} <= kept
+
+def test_downsample_frame_skips_missing_values():
+    history = price_history(5000)
+    history.loc[history.index[-100:], 'Stock Close'] = np.nan
+    sampled = downsample.downsample_frame(history, 'Date', ['Stock Close'], 500)
+    assert 4899 in sampled.index
+    assert sampled['Stock Close'].notna().all()
+
+def test_frames_within_budget_are_unchanged():
+    history = price_history(500)
+    assert downsample.downsample_frame(history, 'Date', ['Stock Close'], 1000) is history
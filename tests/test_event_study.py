@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+from analysis import event_study
+
+def lstsq_fit(stock_returns, market_returns):
+    """
+    Alpha, beta and residual standard deviation of one event from np.linalg.lstsq on its complete days.
+    """
+    complete = ~np.isnan(stock_returns) & ~np.isnan(market_returns)
+    design = np.column_stack([np.ones(complete.sum()), market_returns[complete]])
+    (alpha, beta), residuals, _, _ = np.linalg.lstsq(design, stock_returns[complete], rcond=None)
+    return alpha, beta, np.sqrt(residuals[0] / (complete.sum() - 2))
+
+@pytest.mark.parametrize('nan_fraction', [0.0, 0.2])
+def test_market_model_matches_lstsq(nan_fraction):
+    rng = np.random.default_rng(13)
+    events, days = 25, event_study.ESTIMATION_WINDOW
+    market_returns = rng.normal(0.0, 0.01, (events, days))
+    stock_returns = (rng.normal(0.0005, 0.001, (events, 1)) + rng.uniform(0.5, 1.5, (events, 1)) * market_returns
+                     + rng.normal(0.0, 0.02, (events, days)))
+    stock_returns[rng.random((events, days)) < nan_fraction] = np.nan
+    market_returns[rng.random((events, days)) < nan_fraction] = np.nan
+
+    alpha, beta, sigma, observations = event_study.fit_market_model(stock_returns, market_returns)
+
+    expected = np.array([lstsq_fit(stock_row, market_row) for stock_row, market_row in zip(stock_returns, market_returns)])
+    np.testing.assert_allclose(alpha, expected[:, 0], rtol=1e-9, atol=1e-12)
+    np.testing.assert_allclose(beta, expected[:, 1], rtol=1e-9)
+    np.testing.assert_allclose(sigma, expected[:, 2], rtol=1e-9)
+    np.testing.assert_array_equal(observations, (~np.isnan(stock_returns) & ~np.isnan(market_returns)).sum(axis=1))
+
+def test_short_estimation_windows_are_not_fitted():
+    rng = np.random.default_rng(7)
+    stock_returns = rng.normal(0.0, 0.01, (2, 40))
+    market_returns = rng.normal(0.0, 0.01, (2, 40))
+    stock_returns[1, event_study.MIN_ESTIMATION_OBSERVATIONS - 1:] = np.nan
+
+    alpha, beta, sigma, observations = event_study.fit_market_model(stock_returns, market_returns)
+    assert observations.tolist() == [40, event_study.MIN_ESTIMATION_OBSERVATIONS - 1]
+    assert not np.isnan([alpha[0], beta[0], sigma[0]]).any()
+    assert np.isnan([alpha[1], beta[1], sigma[1]]).all()
@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from analysis import placebo_tests, price_cube, results_table
+
+DAYS = 300
+WINDOW = 7
+
+@pytest.fixture(scope='module')
+def cube():
+    rng = np.random.default_rng(14)
+    dates = pd.bdate_range('2020-01-01', periods=DAYS)
+    dow_jones_open = rng.uniform(30000, 31000, DAYS)
+    dow_jones = pd.DataFrame({'Date': dates, 'Dow Jones Open': dow_jones_open,
+                              'Dow Jones Close': dow_jones_open + rng.normal(0, 100, DAYS),
+                              'Dow Jones Volume': rng.integers(10 ** 8, 10 ** 9, DAYS)})
+    histories = {}
+    for company_id in (1, 2, 3):
+        stock_open = rng.uniform(90, 110, DAYS)
+        # Days without stock data are never drawn
+        stock_close = np.where(rng.uniform(size=DAYS) < 0.1, np.nan, rng.uniform(90, 110, DAYS))
+        histories[company_id] = pd.DataFrame({'Date': dates, 'Stock Open': stock_open, 'Stock Close': stock_close,
+                                              'Stock Volume': rng.integers(1000, 5000, DAYS)})
+    return price_cube.PriceCube.from_frames(dow_jones, histories)
+
+def company_test_results(cube):
+    rng = np.random.default_rng(0)
+    event_positions = {1: [20, 100, 101, 250], 2: [150], 3: [8, 290]}
+    return {
+        company_id: results_table.from_records([
+            {'disclosure_date': pd.Timestamp(cube.dates[position]), 't_test_p_value': rng.uniform(),
+             'wilcoxon_p_value': rng.uniform(), 'correlation_p_value': rng.uniform(), 'mwu_p_value': rng.uniform()}
+            for position in positions
+        ], company_id)
+        for company_id, positions in event_positions.items()
+    }
+
+def test_seed_reproduces_results_for_any_workers(cube):
+    test_results = company_test_results(cube)
+    runs = [placebo_tests.run_placebo_tests(cube, test_results, placebo_count=300, resamples=200,
+                                            window=WINDOW, seed=42, workers=workers)
+            for workers in (1, 2, 4)]
+    for placebo, permutation in runs[1:]:
+        pd.testing.assert_frame_equal(placebo, runs[0][0])
+        pd.testing.assert_frame_equal(permutation, runs[0][1])
+
+    other_seed = placebo_tests.run_placebo_tests(cube, test_results, placebo_count=300, resamples=200,
+                                                 window=WINDOW, seed=43, workers=2)
+    assert not other_seed[1]['permutation_p_value'].equals(runs[0][1]['permutation_p_value'])
+
+@pytest.mark.parametrize('company_id', [1, 2, 3])
+def test_placebo_positions_avoid_event_windows(cube, company_id):
+    event_dates = list(company_test_results(cube)[company_id]['disclosure_date'])
+    event_positions = np.array([cube.position(event_date) for event_date in event_dates])
+    positions = placebo_tests.draw_placebo_positions(cube, company_id, event_dates, 2000, WINDOW, np.random.default_rng(1))
+
+    assert len(positions) == 2000
+    assert np.abs(positions[:, None] - event_positions[None, :]).min() > WINDOW
+    assert positions.min() >= WINDOW and positions.max() < DAYS - WINDOW
+    assert not np.isnan(cube.stock_close[positions, cube.company_positions[company_id]]).any()
+
+def test_empirical_p_values_match_a_brute_force_count():
+    rng = np.random.default_rng(3)
+    placebo_p_values = np.round(rng.uniform(size=500), 2)
+    placebo_p_values[rng.uniform(size=500) < 0.05] = np.nan
+    # Real p-values include ties with placebo values, the extremes and a missing value
+    real_p_values = np.concatenate([placebo_p_values[:20], [0.0, 1.0, 0.005, np.nan]])
+
+    expected = []
+    for real_p_value in real_p_values:
+        if np.isnan(real_p_value):
+            expected.append(np.nan)
+            continue
+        placebo = [p_value for p_value in placebo_p_values if not np.isnan(p_value)]
+        expected.append((1 + sum(p_value <= real_p_value for p_value in placebo)) / (len(placebo) + 1))
+
+    np.testing.assert_allclose(placebo_tests.empirical_p_values(real_p_values, placebo_p_values), expected,
+                               rtol=0, atol=0, equal_nan=True)
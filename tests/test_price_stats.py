@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from database import price_stats
+
+def history(prefix, seed, days=30):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'Date': pd.bdate_range('2022-01-03', periods=days),
+        f"{prefix} Open": rng.uniform(90, 110, days),
+        f"{prefix} Close": rng.uniform(90, 110, days),
+        f"{prefix} Volume": rng.integers(1000, 5000, days).astype(float)
+    })
+
+def since(frame, last_date):
+    return frame if last_date is None else frame[frame['Date'] > pd.Timestamp(last_date)]
+
+@pytest.fixture
+def histories(monkeypatch):
+    stocks = {company_id: history('Stock', company_id) for company_id in (1, 6, 8)}
+    dow_jones = history('Dow Jones', 0)
+    monkeypatch.setattr(price_stats.db_functions, 'get_stock_history',
+                        lambda company_id, last_date=None: since(stocks[company_id], last_date))
+    monkeypatch.setattr(price_stats.db_functions, 'get_dow_jones_history', lambda last_date=None: since(dow_jones, last_date))
+    return stocks
+
+def update(store, company_ids):
+    store.update_dow_jones()
+    for company_id in company_ids:
+        store.update_company(company_id)
+    store.save()
+
+def test_statistics_match_numpy(tmp_path, histories):
+    store = price_stats.PriceStatsStore(str(tmp_path / 'price_stats.json'), rolling_window=10)
+    update(store, [6])
+    changes = (histories[6]['Stock Close'] - histories[6]['Stock Open']).to_numpy()
+
+    stats = price_stats.PriceStatsStore(store.path, rolling_window=10).get_company_stats(6)
+    assert stats['observations'] == len(changes)
+    np.testing.assert_allclose(stats['stock_price_volatility'], np.std(changes, ddof=1), rtol=1e-12)
+    np.testing.assert_allclose(stats['rolling_stock_price_volatility'], np.std(changes[-10:], ddof=1), rtol=1e-12)
+    np.testing.assert_allclose(stats['average_stock_volume'], histories[6]['Stock Volume'].mean(), rtol=1e-12)
+
+def test_parallel_saves_keep_every_company(tmp_path, histories):
+    # Two workers load the same empty file, then each saves its own companies
+    path = str(tmp_path / 'price_stats.json')
+    first = price_stats.PriceStatsStore(path)
+    second = price_stats.PriceStatsStore(path)
+    update(first, [1])
+    update(second, [6, 8])
+
+    assert set(price_stats.PriceStatsStore(path).series) == {'dow_jones', '1', '6', '8'}
+
+def test_invalidated_series_replace_the_saved_ones(tmp_path, histories):
+    path = str(tmp_path / 'price_stats.json')
+    update(price_stats.PriceStatsStore(path), [1, 6])
+
+    store = price_stats.PriceStatsStore(path)
+    store.invalidate(6)
+    store.save()
+    assert set(price_stats.PriceStatsStore(path).series) == {'dow_jones', '1'}
+
+    # The rebuilt series replaces the one saved before it was invalidated
+    store.invalidate(1)
+    store.update_company(1)
+    store.save()
+    assert price_stats.PriceStatsStore(path).series['1'].change.count == len(histories[1])
@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from analysis import result_cache, static_analysis_utils
+from database import db_utils
+
+def price_window(seed, days=15):
+    rng = np.random.default_rng(seed)
+    return db_utils.apply_price_schema(pd.DataFrame({
+        'Date': pd.bdate_range('2021-03-01', periods=days),
+        'Stock Open': rng.uniform(90, 110, days),
+        'Stock Close': rng.uniform(90, 110, days),
+        'Stock Volume': rng.integers(1000, 5000, days),
+        'Dow Jones Open': rng.uniform(30000, 31000, days),
+        'Dow Jones Close': rng.uniform(30000, 31000, days),
+        'Dow Jones Volume': rng.integers(10 ** 8, 10 ** 9, days)
+    }))
+
+@pytest.fixture
+def computed(tmp_path, monkeypatch):
+    """
+    Use a fresh cache file and record the windows that are actually computed.
+    """
+    monkeypatch.setattr(result_cache.db_config, 'RESULT_CACHE_ENABLED', True)
+    monkeypatch.setattr(result_cache, '_cache', result_cache.ResultCache(str(tmp_path / 'results.sqlite')))
+    calls = []
+    perform_tests = static_analysis_utils.perform_statistical_tests_for_windows
+
+    def record(windows):
+        calls.append(len(windows))
+        return perform_tests(windows)
+
+    monkeypatch.setattr(static_analysis_utils, 'perform_statistical_tests_for_windows', record)
+    return calls
+
+DATES = ['2021-03-08', '2021-03-09', '2021-03-10']
+WINDOW = result_cache.window_definition(7)
+
+def test_cache_hit(computed):
+    windows = [price_window(seed) for seed in range(3)]
+    first = result_cache.cached_statistical_tests(1, DATES, windows, WINDOW)
+    second = result_cache.cached_statistical_tests(1, DATES, [window.copy() for window in windows], WINDOW)
+
+    assert computed == [3]
+    for first_results, second_results in zip(first, second):
+        for test in ('t_test', 'wilcoxon', 'correlation', 'mannwhitneyu'):
+            assert first_results[test]['p_value'] == pytest.approx(second_results[test]['p_value'])
+
+def test_changed_data_is_recomputed(computed):
+    windows = [price_window(seed) for seed in range(3)]
+    result_cache.cached_statistical_tests(1, DATES, windows, WINDOW)
+
+    changed = [window.copy() for window in windows]
+    changed[1].loc[4, 'Stock Close'] += 1.0
+    results = result_cache.cached_statistical_tests(1, DATES, changed, WINDOW)
+
+    assert computed == [3, 1]
+    expected = static_analysis_utils.perform_statistical_tests(static_analysis_utils.prepare_data(changed[1]))
+    assert results[1]['t_test']['p_value'] == pytest.approx(expected['t_test']['p_value'])
+
+def test_other_window_definition_is_a_miss(computed):
+    windows = [price_window(seed) for seed in range(3)]
+    result_cache.cached_statistical_tests(1, DATES, windows, WINDOW)
+    result_cache.cached_statistical_tests(1, DATES, windows, result_cache.window_definition(5))
+    result_cache.cached_statistical_tests(2, DATES, windows, WINDOW)
+    assert computed == [3, 3, 3]
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = result_cache.ResultCache(str(tmp_path / 'results.sqlite'), max_entries=2)
+    for day, disclosure_date in enumerate(DATES):
+        cache.put(1, disclosure_date, WINDOW, 'hash', {'day': day})
+        if day == 1:
+            # Touch the first entry, so that the second one is the least recently used
+            assert cache.get(1, DATES[0], WINDOW, 'hash') == {'day': 0}
+
+    assert cache.get(1, DATES[0], WINDOW, 'hash') == {'day': 0}
+    assert cache.get(1, DATES[1], WINDOW, 'hash') is None
+    assert cache.get(1, DATES[2], WINDOW, 'hash') == {'day': 2}
@@ -0,0 +1,70 @@
+import re
+import zipfile
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from analysis import result_export
+from database import db_utils
+
+def price_window(seed, days=5):
+    rng = np.random.default_rng(seed)
+    return db_utils.apply_price_schema(pd.DataFrame({
+        'Date': pd.bdate_range('2021-03-01', periods=days),
+        'Stock Open': rng.uniform(90, 110, days),
+        'Stock Close': rng.uniform(90, 110, days),
+        'Stock Volume': rng.integers(1000, 5000, days),
+        'Dow Jones Open': rng.uniform(30000, 31000, days),
+        'Dow Jones Close': rng.uniform(30000, 31000, days),
+        'Dow Jones Volume': rng.integers(10 ** 8, 10 ** 9, days)
+    }))
+
+def event_results(t_test_stat):
+    return {
+        'disclosure_date': pd.Timestamp('2021-03-03'), 'observations': 5,
+        't_test_stat': t_test_stat, 't_test_p_value': 0.0,
+        'wilcoxon_stat': 0.0, 'wilcoxon_p_value': 0.0625,
+        'correlation_coeff': np.nan, 'correlation_p_value': np.nan,
+        'mwu_stat': 12.5, 'mwu_p_value': 1.0
+    }
+
+def workbook_rows(path):
+    """
+    Rows of each worksheet of an xlsx file, as dicts of cell text by column letter, read straight from its XML.
+    """
+    with zipfile.ZipFile(path) as workbook:
+        names = re.findall(r'<sheet name="([^"]+)"', workbook.read('xl/workbook.xml').decode())
+        sheets = {}
+        for number, name in enumerate(names, start=1):
+            xml = workbook.read(f"xl/worksheets/sheet{number}.xml").decode()
+            sheets[name] = [dict(re.findall(r'<c r="([A-Z]+)\d+"[^>]*>(?:<is>)?<[vt]>([^<]*)</[vt]>', row))
+                            for row in re.findall(r'<row[^>]*>(.*?)</row>', xml)]
+    return sheets
+
+@pytest.mark.parametrize('t_test_stat', [np.inf, -np.inf, np.nan])
+def test_export_round_trip(tmp_path, monkeypatch, t_test_stat):
+    monkeypatch.setattr(result_export, 'EXCEL_MAX_ROWS', 8)
+    events = [(company_id, '2021-03-03', price_window(company_id)) for company_id in (1, 2, 3)]
+    with result_export.ResultExporter('export', str(tmp_path), ['xlsx', 'csv', 'parquet'], buffer_rows=4) as exporter:
+        for company_id, disclosure_date, window in events:
+            exporter.add_event(company_id, disclosure_date, window, event_results(t_test_stat))
+
+    # The 15 data rows continue on new sheets, 7 rows below each header
+    sheets = workbook_rows(tmp_path / 'export.xlsx')
+    assert list(sheets) == ['Data', 'Results', 'Data (2)', 'Data (3)']
+    assert [len(sheets[name]) for name in ('Data', 'Data (2)', 'Data (3)')] == [8, 8, 2]
+    assert len(sheets['Results']) == 4
+    header = {name: column for column, name in sheets['Results'][0].items()}
+    t_test_cells = [row.get(header['t_test_stat']) for row in sheets['Results'][1:]]
+    # Missing values are blank cells
+    assert t_test_cells == [None if np.isnan(t_test_stat) else str(t_test_stat)] * 3
+    assert all(header['correlation_coeff'] not in row for row in sheets['Results'][1:])
+
+    for data in (pd.read_csv(tmp_path / 'export_data.csv'), pd.read_parquet(tmp_path / 'export_data.parquet')):
+        assert len(data) == 15
+        np.testing.assert_allclose(data['Stock Close'], np.concatenate([window['Stock Close'] for _, _, window in events]))
+    for results in (pd.read_csv(tmp_path / 'export_results.csv'), pd.read_parquet(tmp_path / 'export_results.parquet')):
+        assert results['company_id'].tolist() == [1, 2, 3]
+        np.testing.assert_array_equal(results['t_test_stat'], [t_test_stat] * 3)
+        assert results['correlation_coeff'].isna().all()
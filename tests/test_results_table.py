@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from analysis import pdf_report, results_table
+
+def results(events=40, seed=18):
+    rng = np.random.default_rng(seed)
+    records = []
+    for position in range(events):
+        p_values = rng.uniform(0, 0.2, 4)
+        # Some tests could not run on the event's window
+        p_values[rng.uniform(size=4) < 0.2] = np.nan
+        records.append({
+            'company_id': int(rng.integers(1, 4)),
+            'disclosure_date': pd.Timestamp('2019-01-01') + pd.Timedelta(days=int(rng.integers(0, 1000))),
+            'observations': 15,
+            't_test_stat': rng.normal(), 't_test_p_value': p_values[0],
+            'wilcoxon_stat': rng.uniform(0, 60), 'wilcoxon_p_value': p_values[1],
+            'correlation_coeff': np.nan if np.isnan(p_values[2]) else rng.uniform(-1, 1), 'correlation_p_value': p_values[2],
+            'mwu_stat': rng.uniform(0, 120), 'mwu_p_value': p_values[3]
+        })
+    return records
+
+def expected_summary(records, alpha=0.05):
+    """
+    The summary of a list of result dicts, counted one event at a time.
+    """
+    summary = {'total_disclosures': len(records)}
+    for test, (_, stat_column, p_value_column) in results_table.TESTS.items():
+        summary[results_table.SIGNIFICANT_COUNTS[test]] = sum(
+            1 for record in records if not np.isnan(record[p_value_column]) and record[p_value_column] < alpha)
+    for _, stat_column, _ in results_table.TESTS.values():
+        summary[f"average_{stat_column}"] = np.nanmean([record[stat_column] for record in records]) if records else np.nan
+    return summary
+
+def assert_summary(row, expected):
+    for key, value in expected.items():
+        np.testing.assert_allclose(row[key], value, rtol=1e-12, equal_nan=True, err_msg=key)
+
+def test_summarize_counts_and_averages():
+    records = results()
+    summary = results_table.summarize(records)
+    assert len(summary) == 1
+    assert_summary(summary.iloc[0], expected_summary(records))
+
+def test_summarize_empty_table():
+    summary = results_table.summarize([])
+    assert len(summary) == 1
+    row = summary.iloc[0]
+    assert row['total_disclosures'] == 0
+    assert all(row[column] == 0 for column in results_table.SIGNIFICANT_COUNTS.values())
+    assert np.isnan(row['average_t_test_stat'])
+
+@pytest.mark.parametrize('by', ['company_id', 'year'])
+def test_summarize_by(by):
+    records = results()
+    summary = results_table.summarize(records, by=by)
+
+    def key(record):
+        return record['disclosure_date'].year if by == 'year' else record[by]
+
+    keys = sorted({key(record) for record in records})
+    assert summary[by].tolist() == keys
+    for _, row in summary.iterrows():
+        assert_summary(row, expected_summary([record for record in records if key(record) == row[by]]))
+
+def test_empty_results_report(tmp_path):
+    output_file = tmp_path / 'empty.pdf'
+    pdf_report.analyze_results([], str(output_file))
+    assert output_file.stat().st_size > 0
@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from analysis import batch_statistics, price_cube, window_sweep
+
+DAYS = 200
+WINDOWS = [1, 3, 5, 10]
+
+def sweep_cube():
+    """
+    A two-company cube around whose company 1 events the stock changes are a constant 0.1, then
+    the Dow Jones changes plus 0.3, both within +/- 3 days, then some days are missing.
+    Elsewhere the changes are random, so the prefix sums of the wider windows carry roundoff.
+    """
+    rng = np.random.default_rng(15)
+    dates = pd.bdate_range('2020-01-01', periods=DAYS)
+    dow_jones_open = rng.uniform(30000, 31000, DAYS)
+    dow_jones_close = dow_jones_open + rng.normal(0, 100, DAYS)
+    dow_jones = pd.DataFrame({'Date': dates, 'Dow Jones Open': dow_jones_open, 'Dow Jones Close': dow_jones_close,
+                              'Dow Jones Volume': rng.integers(10 ** 8, 10 ** 9, DAYS)})
+
+    histories = {}
+    for company_id in (1, 2):
+        stock_open = rng.uniform(90, 110, DAYS)
+        stock_close = rng.uniform(90, 110, DAYS)
+        if company_id == 1:
+            constant, paired, gaps = slice(47, 54), slice(97, 104), [146, 149, 151, 155]
+            stock_open[constant], stock_close[constant] = 100.0, 100.1
+            stock_open[paired] = dow_jones_open[paired]
+            stock_close[paired] = dow_jones_close[paired] + 0.3
+            stock_open[gaps] = np.nan
+        histories[company_id] = pd.DataFrame({'Date': dates, 'Stock Open': stock_open, 'Stock Close': stock_close,
+                                              'Stock Volume': rng.integers(1000, 5000, DAYS)})
+    return price_cube.PriceCube.from_frames(dow_jones, histories)
+
+COLUMNS = {
+    't_test_stat': ('t_test', 't_statistic'),
+    't_test_p_value': ('t_test', 'p_value'),
+    'wilcoxon_stat': ('wilcoxon', 'wilcoxon_statistic'),
+    'wilcoxon_p_value': ('wilcoxon', 'p_value'),
+    'correlation_coeff': ('correlation', 'correlation_coefficient'),
+    'correlation_p_value': ('correlation', 'p_value'),
+    'mwu_stat': ('mannwhitneyu', 'mwu_statistic'),
+    'mwu_p_value': ('mannwhitneyu', 'p_value')
+}
+
+# Columns that are degenerate for the constant windows of sweep_cube: the correlation with a constant
+# series is undefined and the t statistic of constant differences infinite, where the batch engine,
+# like scipy, leaves a roundoff-sized correlation and a huge finite t statistic
+DEGENERATE = {50: ['correlation_coeff', 'correlation_p_value'], 100: ['t_test_stat', 't_test_p_value']}
+
+@pytest.fixture(scope='module')
+def sweep():
+    cube = sweep_cube()
+    events = [(1, cube.dates[50]), (1, cube.dates[100]), (1, cube.dates[150]), (2, cube.dates[60]), (2, cube.dates[120])]
+    return cube, window_sweep.sweep_windows(cube, events, WINDOWS)
+
+def degenerate_columns(cube, row):
+    position = cube.position(row['event_date'])
+    return DEGENERATE.get(position, []) if row['company_id'] == 1 and row['window'] <= 3 else []
+
+def test_sweep_matches_batch_statistics(sweep):
+    cube, sweep = sweep
+    assert len(sweep) == 5 * len(WINDOWS)
+    for _, row in sweep.iterrows():
+        positions = np.array([cube.position(row['event_date'])])
+        batch_results = batch_statistics.run_statistical_tests(
+            *price_cube.window_changes(cube, row['company_id'], positions, row['window']))
+        assert row['observations'] == batch_results['observations'][0]
+        degenerate = degenerate_columns(cube, row)
+        for column, (test, key) in COLUMNS.items():
+            expected = batch_results[test][key][0]
+            message = f"{column} of {row['company_id']} {row['event_date']} +/- {row['window']}"
+            if column == 'correlation_coeff' and column in degenerate:
+                assert np.isnan(row[column]) and (np.isnan(expected) or abs(expected) < 1e-12), message
+            elif column == 't_test_stat' and column in degenerate:
+                assert np.isposinf(row[column]) and expected > 1e12, message
+            elif column == 't_test_p_value' and column in degenerate:
+                assert row[column] == 0 and expected < 1e-12, message
+            elif column not in degenerate:
+                np.testing.assert_allclose(row[column], expected, rtol=1e-8, equal_nan=True, err_msg=message)
+
+def test_constant_windows(sweep):
+    cube, sweep = sweep
+    rows = [row for _, row in sweep.iterrows() if degenerate_columns(cube, row)]
+    assert len(rows) == 4
+    for row in rows:
+        if 'correlation_coeff' in degenerate_columns(cube, row):
+            assert np.isnan(row['correlation_coeff']) and np.isnan(row['correlation_p_value'])
+        else:
+            assert np.isposinf(row['t_test_stat']) and row['t_test_p_value'] == 0
+
+def test_missing_days_are_left_out(sweep):
+    cube, sweep = sweep
+    gaps = sweep[sweep['event_date'] == cube.dates[150].astype(object)]
+    assert gaps['observations'].tolist() == [1, 5, 7, 17]